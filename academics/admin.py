@@ -1,5 +1,10 @@
 from django.contrib import admin
-from .models import Department, AcademicYear, Course, Enrollment, CourseAssignment, Attendance
+from .cache import bump_version
+from .models import (
+    Department, AcademicYear, Course, CourseOffering, Enrollment, CourseAssignment, Attendance,
+    AttendanceSummary, AttendanceArchive, AnalyticsExport, TranscriptSnapshot,
+    Room, TimeSlot, ClassSession, WaitlistEntry
+)
 
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
@@ -12,13 +17,16 @@ class DepartmentAdmin(admin.ModelAdmin):
 @admin.register(AcademicYear)
 class AcademicYearAdmin(admin.ModelAdmin):
     """Admin for Academic Year model"""
-    list_display = ['year', 'start_date', 'end_date', 'is_current']
+    list_display = ['year', 'start_date', 'end_date', 'is_current', 'attendance_archived']
     list_filter = ['is_current']
+    readonly_fields = ['attendance_archived']
     
     def save_model(self, request, obj, form, change):
         if obj.is_current:
             # Ensure only one academic year is current
             AcademicYear.objects.filter(is_current=True).update(is_current=False)
+            # update() bypasses the signals that invalidate the cache
+            bump_version(AcademicYear._meta.label)
         super().save_model(request, obj, form, change)
 
 @admin.register(Course)
@@ -30,6 +38,25 @@ class CourseAdmin(admin.ModelAdmin):
     ]
     list_filter = ['department', 'semester', 'course_type', 'is_active']
     search_fields = ['code', 'name']
+    filter_horizontal = ['prerequisites']
+
+@admin.register(CourseOffering)
+class CourseOfferingAdmin(admin.ModelAdmin):
+    """Admin for Course Offering model"""
+    list_display = ['course', 'academic_year', 'capacity', 'seats_taken', 'is_open']
+    list_filter = ['academic_year', 'is_open', 'course__department']
+    search_fields = ['course__code', 'course__name']
+    raw_id_fields = ['course']
+    readonly_fields = ['seats_taken']
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    """Admin for Waitlist Entry model"""
+    list_display = ['offering', 'student', 'priority', 'status', 'created_at', 'resolved_at']
+    list_filter = ['status', 'offering__academic_year']
+    search_fields = ['offering__course__code', 'student__student_id', 'student__user__username']
+    raw_id_fields = ['offering', 'student']
+    readonly_fields = ['created_at', 'resolved_at']
 
 @admin.register(Enrollment)
 class EnrollmentAdmin(admin.ModelAdmin):
@@ -88,3 +115,63 @@ class AttendanceAdmin(admin.ModelAdmin):
     def get_student_name(self, obj):
         return obj.student.user.get_full_name()
 
+@admin.register(Room)
+class RoomAdmin(admin.ModelAdmin):
+    """Admin for Room model"""
+    list_display = ['code', 'name', 'room_type', 'capacity', 'is_active']
+    list_filter = ['room_type', 'is_active']
+    search_fields = ['code', 'name']
+
+@admin.register(TimeSlot)
+class TimeSlotAdmin(admin.ModelAdmin):
+    """Admin for Time Slot model"""
+    list_display = ['day_of_week', 'start_time', 'end_time']
+    list_filter = ['day_of_week']
+
+@admin.register(ClassSession)
+class ClassSessionAdmin(admin.ModelAdmin):
+    """Admin for Class Session model"""
+    list_display = ['assignment', 'session_type', 'time_slot', 'room', 'academic_year', 'term']
+    list_filter = ['academic_year', 'term', 'session_type', 'time_slot__day_of_week']
+    search_fields = ['assignment__course__code', 'room__code']
+    raw_id_fields = ['assignment']
+
+@admin.register(AttendanceSummary)
+class AttendanceSummaryAdmin(admin.ModelAdmin):
+    """Admin for Attendance Summary model"""
+    list_display = [
+        'student', 'course', 'academic_year', 'present_count', 'total_count'
+    ]
+    list_filter = ['academic_year', 'course__department']
+    search_fields = ['student__student_id', 'course__code']
+    raw_id_fields = ['student', 'course']
+
+@admin.register(AttendanceArchive)
+class AttendanceArchiveAdmin(admin.ModelAdmin):
+    """Admin for Attendance Archive model"""
+    list_display = [
+        'course', 'academic_year', 'format', 'row_count', 'present_count', 'created_at'
+    ]
+    list_filter = ['academic_year', 'format']
+    search_fields = ['course__code']
+    exclude = ['payload']
+    raw_id_fields = ['course']
+
+@admin.register(AnalyticsExport)
+class AnalyticsExportAdmin(admin.ModelAdmin):
+    """Admin for Analytics Export model"""
+    list_display = [
+        'id', 'academic_year', 'format', 'status', 'since', 'until', 'created_at'
+    ]
+    list_filter = ['status', 'format', 'academic_year']
+    raw_id_fields = ['requested_by']
+
+@admin.register(TranscriptSnapshot)
+class TranscriptSnapshotAdmin(admin.ModelAdmin):
+    """Admin for Transcript Snapshot model"""
+    list_display = [
+        'student', 'academic_year', 'semester', 'credits', 'gpa', 'cgpa'
+    ]
+    list_filter = ['academic_year', 'semester']
+    search_fields = ['student__student_id']
+    raw_id_fields = ['student']
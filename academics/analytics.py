@@ -0,0 +1,253 @@
+"""
+Institution-wide attendance analytics.
+
+One academic year's attendance is loaded into four parallel columns
+(student, course, week, present), held in NumPy arrays when NumPy is
+installed and in stdlib arrays otherwise. Every statistic comes from
+whole-column passes (dense indexing and bincount), not per-student queries:
+
+- weekly attendance per course and per department, with a rolling rate over
+  the trailing ATTENDANCE_TREND_WINDOW weeks;
+- at-risk students, per course (the shortage rule applies course by
+  course): overall or recent rate below the shortage threshold, or a recent
+  rate at least ATTENDANCE_RISK_DROP points below the window before it.
+
+Results are cached against the Attendance, Course, Department and
+AcademicYear version stamps, so they are recomputed after the next
+attendance write (one bump per bulk_mark batch) rather than per request.
+"""
+from array import array
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from .archive import load_archive
+from .cache import read_through
+from .models import Attendance, AttendanceArchive, Course, Department
+from .rollups import get_shortage_threshold
+
+try:
+    import numpy as np
+except ImportError:  # stdlib arrays and Python loops instead
+    np = None
+
+LOAD_CHUNK_SIZE = 10000
+CACHE_LABELS = ['academics.Attendance', 'academics.Course', 'academics.Department', 'academics.AcademicYear']
+
+# Per student and course buckets: the two most recent windows and everything before
+EARLIER, PREVIOUS, RECENT = 0, 1, 2
+
+
+def get_trend_window():
+    """Weeks in the rolling window"""
+    return getattr(settings, 'ATTENDANCE_TREND_WINDOW', 4)
+
+
+def get_risk_drop():
+    """Percentage points the recent rate may fall before a student is flagged"""
+    return getattr(settings, 'ATTENDANCE_RISK_DROP', 15)
+
+
+def _iter_attendance(academic_year):
+    if academic_year.attendance_archived:
+        archives = AttendanceArchive.objects.filter(academic_year=academic_year)
+        for archive in archives.iterator(chunk_size=1):
+            for record in load_archive(archive):
+                yield record.student_id, record.course_id, record.date, record.is_present
+        return
+    yield from Attendance.objects.filter(
+        date__gte=academic_year.start_date,
+        date__lte=academic_year.end_date
+    ).values_list('student_id', 'course_id', 'date', 'is_present').iterator(chunk_size=LOAD_CHUNK_SIZE)
+
+
+def load_columns(academic_year):
+    """(students, courses, weeks, present) columns for one year; weeks count from its start"""
+    students, courses, weeks, present = array('q'), array('q'), array('q'), array('b')
+    start = academic_year.start_date
+    for student_id, course_id, day, is_present in _iter_attendance(academic_year):
+        students.append(student_id)
+        courses.append(course_id)
+        weeks.append((day - start).days // 7)
+        present.append(is_present)
+    if np is not None:
+        return (
+            np.frombuffer(students, dtype=np.int64), np.frombuffer(courses, dtype=np.int64),
+            np.frombuffer(weeks, dtype=np.int64), np.frombuffer(present, dtype=np.int8)
+        )
+    return students, courses, weeks, present
+
+
+def _dense_index(values):
+    """(sorted distinct values, position of each value among them)"""
+    if np is not None:
+        distinct, index = np.unique(values, return_inverse=True)
+        return distinct.tolist(), index
+    distinct = sorted(set(values))
+    positions = {value: position for position, value in enumerate(distinct)}
+    return distinct, array('q', (positions[value] for value in values))
+
+
+def _pair_keys(first_index, second_index, n_second):
+    """One dense-indexable key per (first, second) position pair"""
+    if np is not None:
+        return first_index * n_second + second_index
+    return array('q', (first * n_second + second for first, second in zip(first_index, second_index)))
+
+
+def _student_buckets(weeks, last_week, window):
+    if np is not None:
+        return np.where(
+            weeks > last_week - window, RECENT,
+            np.where(weeks > last_week - 2 * window, PREVIOUS, EARLIER)
+        )
+    return array('q', (
+        RECENT if week > last_week - window else PREVIOUS if week > last_week - 2 * window else EARLIER
+        for week in weeks
+    ))
+
+
+def _group_counts(groups, buckets, present, n_groups, n_buckets):
+    """(present, total) counts per group and bucket, as lists of rows"""
+    if np is not None:
+        keys = groups * n_buckets + buckets
+        size = n_groups * n_buckets
+        totals = np.bincount(keys, minlength=size).reshape(n_groups, n_buckets)
+        hits = np.bincount(keys, weights=present, minlength=size).astype(np.int64).reshape(n_groups, n_buckets)
+        return hits.tolist(), totals.tolist()
+
+    hits = [[0] * n_buckets for _ in range(n_groups)]
+    totals = [[0] * n_buckets for _ in range(n_groups)]
+    for group, bucket, is_present in zip(groups, buckets, present):
+        totals[group][bucket] += 1
+        if is_present:
+            hits[group][bucket] += 1
+    return hits, totals
+
+
+def _rate(hits, total):
+    return round(hits * 100 / total, 2) if total else None
+
+
+def _weekly_series(hits, totals, week_starts, window):
+    series = []
+    for week, week_start in enumerate(week_starts):
+        start = max(0, week - window + 1)
+        series.append({
+            'week': week,
+            'week_start': week_start,
+            'present': hits[week],
+            'total': totals[week],
+            'rate': _rate(hits[week], totals[week]),
+            'rolling_rate': _rate(sum(hits[start:week + 1]), sum(totals[start:week + 1])),
+        })
+    return series
+
+
+def compute_analytics(academic_year):
+    """Course and department trends and the at-risk list for one academic year"""
+    window = get_trend_window()
+    threshold = get_shortage_threshold()
+    drop = get_risk_drop()
+    students, courses, weeks, present = load_columns(academic_year)
+    result = {
+        'academic_year': academic_year.pk,
+        'window': window,
+        'threshold': threshold,
+        'drop': drop,
+        'records': len(present),
+        'backend': 'numpy' if np is not None else 'array',
+        'computed_at': timezone.now(),
+        'courses': [],
+        'departments': [],
+        'at_risk': [],
+        'recent_weeks': None,
+    }
+    if not len(present):
+        return result
+
+    last_week = int(max(weeks))
+    n_weeks = last_week + 1
+    week_starts = [academic_year.start_date + timedelta(weeks=week) for week in range(n_weeks)]
+
+    # Weekly counts per course, then per department by adding course rows
+    course_ids, course_index = _dense_index(courses)
+    course_hits, course_totals = _group_counts(course_index, weeks, present, len(course_ids), n_weeks)
+    catalog = {
+        row['id']: row for row in Course.objects.filter(pk__in=course_ids).values(
+            'id', 'code', 'name', 'department_id'
+        )
+    }
+    department_rows = {}
+    for position, course_id in enumerate(course_ids):
+        course = catalog.get(course_id, {'code': None, 'name': None, 'department_id': None})
+        hits, totals = course_hits[position], course_totals[position]
+        result['courses'].append({
+            'course_id': course_id,
+            'course_code': course['code'],
+            'course_name': course['name'],
+            'department_id': course['department_id'],
+            'present': sum(hits),
+            'total': sum(totals),
+            'rate': _rate(sum(hits), sum(totals)),
+            'weeks': _weekly_series(hits, totals, week_starts, window),
+        })
+        department_hits, department_totals = department_rows.setdefault(
+            course['department_id'], ([0] * n_weeks, [0] * n_weeks)
+        )
+        for week in range(n_weeks):
+            department_hits[week] += hits[week]
+            department_totals[week] += totals[week]
+
+    departments = dict(Department.objects.filter(pk__in=department_rows).values_list('id', 'code'))
+    for department_id, (hits, totals) in sorted(department_rows.items(), key=lambda item: item[0] or 0):
+        result['departments'].append({
+            'department_id': department_id,
+            'department_code': departments.get(department_id),
+            'present': sum(hits),
+            'total': sum(totals),
+            'rate': _rate(sum(hits), sum(totals)),
+            'weeks': _weekly_series(hits, totals, week_starts, window),
+        })
+
+    # Per student and course: counts in the recent window, the one before, and earlier
+    student_ids, student_index = _dense_index(students)
+    pair_keys, pair_index = _dense_index(_pair_keys(student_index, course_index, len(course_ids)))
+    buckets = _student_buckets(weeks, last_week, window)
+    pair_hits, pair_totals = _group_counts(pair_index, buckets, present, len(pair_keys), 3)
+    at_risk = []
+    for pair_key, hits, totals in zip(pair_keys, pair_hits, pair_totals):
+        student_id = student_ids[pair_key // len(course_ids)]
+        course_id = course_ids[pair_key % len(course_ids)]
+        overall = _rate(sum(hits), sum(totals))
+        recent = _rate(hits[RECENT], totals[RECENT])
+        previous = _rate(hits[PREVIOUS], totals[PREVIOUS])
+        flags = []
+        if overall is not None and overall < threshold:
+            flags.append('below_threshold')
+        if recent is not None and recent < threshold:
+            flags.append('recent_below_threshold')
+        if recent is not None and previous is not None and previous - recent >= drop:
+            flags.append('dropping')
+        if flags:
+            at_risk.append({
+                'student_id': student_id,
+                'course_id': course_id,
+                'course_code': catalog.get(course_id, {}).get('code'),
+                'overall_rate': overall,
+                'recent_rate': recent,
+                'previous_rate': previous,
+                'flags': flags,
+            })
+    at_risk.sort(key=lambda row: (
+        row['recent_rate'] if row['recent_rate'] is not None else row['overall_rate'],
+        row['student_id'], row['course_id']
+    ))
+    result['at_risk'] = at_risk
+    result['recent_weeks'] = [week_starts[max(0, last_week - window + 1)], week_starts[last_week]]
+    return result
+
+
+def get_attendance_analytics(academic_year):
+    """compute_analytics() through the versioned cache"""
+    key = f'attendance-analytics:{academic_year.pk}:{get_trend_window()}:{get_risk_drop()}:{get_shortage_threshold()}'
+    return read_through(key, CACHE_LABELS, lambda: compute_analytics(academic_year), timeout=None)
@@ -0,0 +1,339 @@
+"""
+Attendance archival by academic year.
+
+Attendance grows by students x courses x class days every year, but only the
+current year is routinely read and written. archive_year() moves a closed
+year out of the live table into AttendanceArchive: one compressed blob per
+course, as gzipped JSON Lines or, when pyarrow is installed and
+ATTENDANCE_ARCHIVE_FORMAT is 'parquet', as Parquet. The year's
+AttendanceSummary rows are kept as they are, so percentages and shortage
+lists still work, and the year is flagged read-only
+(AcademicYear.attendance_archived); from then on its summaries are frozen.
+Only years that have ended can be archived.
+
+AttendanceViewSet reads archived years back through ArchivedRecords, which
+needs a course or student scope and decodes only the blobs a page touches,
+and find_archived_record(), which checks each blob's exact id index before
+decoding it. restore_year() puts the rows back into the live table
+unchanged.
+"""
+import gzip
+import io
+import json
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from accounts.models import StudentProfile, FacultyProfile
+from .cache import bump_version
+from .models import Attendance, AttendanceArchive, AttendanceSummary
+from .rollups import rebuild_attendance_summaries
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet archives are optional
+    pyarrow = None
+
+JSONL = 'jsonl.gz'
+PARQUET = 'parquet'
+FORMATS = (JSONL, PARQUET)
+
+# Stored per row; the course is implied by the archive the row is in
+COLUMNS = ('id', 'student_id', 'date', 'is_present', 'remarks', 'marked_by_id', 'marked_at', 'updated_at')
+DATE_COLUMNS = {'date'}
+DATETIME_COLUMNS = {'marked_at', 'updated_at'}
+
+RESTORE_BATCH_SIZE = 1000
+
+
+class ArchiveError(Exception):
+    """Raised when a year cannot be archived or restored"""
+
+
+def get_archive_format():
+    """Format for new archives (ATTENDANCE_ARCHIVE_FORMAT, default gzipped JSON Lines)"""
+    return getattr(settings, 'ATTENDANCE_ARCHIVE_FORMAT', JSONL)
+
+
+def _check_format(fmt):
+    if fmt not in FORMATS:
+        raise ArchiveError(f"Unknown archive format '{fmt}'; use one of: {', '.join(FORMATS)}")
+    if fmt == PARQUET and pyarrow is None:
+        raise ArchiveError('Parquet archives require pyarrow; use jsonl.gz instead')
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def encode_rows(rows, fmt):
+    """Archive payload for row tuples in COLUMNS order"""
+    _check_format(fmt)
+    if fmt == PARQUET:
+        schema = pyarrow.schema([
+            ('id', pyarrow.int64()),
+            ('student_id', pyarrow.int64()),
+            ('date', pyarrow.date32()),
+            ('is_present', pyarrow.bool_()),
+            ('remarks', pyarrow.string()),
+            ('marked_by_id', pyarrow.int64()),
+            ('marked_at', pyarrow.timestamp('us', tz='UTC')),
+            ('updated_at', pyarrow.timestamp('us', tz='UTC')),
+        ])
+        columns = list(zip(*rows)) if rows else [()] * len(COLUMNS)
+        table = pyarrow.table(
+            {name: list(values) for name, values in zip(COLUMNS, columns)}, schema=schema
+        )
+        buffer = io.BytesIO()
+        pyarrow.parquet.write_table(table, buffer, compression='zstd')
+        return buffer.getvalue()
+
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as stream:
+        # The header line makes each blob self-describing
+        stream.write(json.dumps(COLUMNS).encode() + b'\n')
+        for row in rows:
+            stream.write(json.dumps(row, default=_json_default).encode() + b'\n')
+    return buffer.getvalue()
+
+
+def decode_rows(payload, fmt):
+    """Row dicts (keyed by column name) from an archive payload"""
+    _check_format(fmt)
+    if fmt == PARQUET:
+        return pyarrow.parquet.read_table(io.BytesIO(bytes(payload))).to_pylist()
+
+    with gzip.GzipFile(fileobj=io.BytesIO(bytes(payload)), mode='rb') as stream:
+        lines = iter(stream)
+        columns = json.loads(next(lines))
+        rows = []
+        for line in lines:
+            row = dict(zip(columns, json.loads(line)))
+            for column in DATE_COLUMNS.intersection(row):
+                row[column] = date.fromisoformat(row[column])
+            for column in DATETIME_COLUMNS.intersection(row):
+                row[column] = datetime.fromisoformat(row[column])
+            rows.append(row)
+        return rows
+
+
+def _load_records(archives, student_id=None):
+    """
+    Unsaved Attendance instances from `archives`.
+
+    Rows of students deleted since archiving are dropped and markers deleted
+    since are cleared, as CASCADE / SET_NULL would have done on the live
+    table.
+    """
+    records = []
+    for archive in archives:
+        for row in decode_rows(archive.payload, archive.format):
+            if student_id is None or row['student_id'] == student_id:
+                records.append(Attendance(course_id=archive.course_id, **row))
+
+    student_ids = {record.student_id for record in records}
+    existing_students = set(
+        StudentProfile.objects.filter(pk__in=student_ids).values_list('pk', flat=True)
+    )
+    marker_ids = {record.marked_by_id for record in records} - {None}
+    existing_markers = set(
+        FacultyProfile.objects.filter(pk__in=marker_ids).values_list('pk', flat=True)
+    )
+    kept = []
+    for record in records:
+        if record.student_id not in existing_students:
+            continue
+        if record.marked_by_id not in existing_markers:
+            record.marked_by_id = None
+        kept.append(record)
+    return kept
+
+
+def load_archive(archive):
+    """Unsaved Attendance instances from one archive blob"""
+    return _load_records([archive])
+
+
+def pack_ids(ids):
+    """Exact id index of a blob: its sorted ids as zlib-compressed little-endian int64"""
+    index = array('q', sorted(ids))
+    if sys.byteorder != 'little':
+        index.byteswap()
+    return zlib.compress(index.tobytes())
+
+
+def _index_contains(id_index, pk):
+    index = array('q')
+    index.frombytes(zlib.decompress(bytes(id_index)))
+    if sys.byteorder != 'little':
+        index.byteswap()
+    position = bisect_left(index, pk)
+    return position < len(index) and index[position] == pk
+
+
+class ArchivedRecords:
+    """
+    Attendance of an archived year for some courses and/or one student.
+
+    A lazy sequence for Paginator, ordered by course and then newest first
+    within a course. Per-course row counts come from the kept summaries, so
+    a slice decodes only the blobs it overlaps, one at a time.
+    """
+
+    def __init__(self, academic_year, course_ids=None, student_id=None):
+        if course_ids is None and student_id is None:
+            raise ArchiveError(
+                f'Attendance for {academic_year} is archived; read it per course or student (?course=, ?student=)'
+            )
+        summaries = AttendanceSummary.objects.filter(academic_year=academic_year, total_count__gt=0)
+        if course_ids is not None:
+            summaries = summaries.filter(course_id__in=course_ids)
+        if student_id is not None:
+            summaries = summaries.filter(student_id=student_id)
+        self.academic_year = academic_year
+        self.student_id = student_id
+        self.counts = list(
+            summaries.order_by('course_id').values('course_id')
+            .annotate(rows=Sum('total_count')).values_list('course_id', 'rows')
+        )
+
+    def __len__(self):
+        return sum(rows for course_id, rows in self.counts)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step not in (None, 1):
+            raise TypeError('ArchivedRecords only supports contiguous slices')
+        start, stop, step = index.indices(len(self))
+        records = []
+        offset = 0
+        for course_id, rows in self.counts:
+            if offset >= stop:
+                break
+            if offset + rows > start:
+                records.extend(self._course_records(course_id)[max(start - offset, 0):stop - offset])
+            offset += rows
+        return records
+
+    def _course_records(self, course_id):
+        archive = AttendanceArchive.objects.filter(academic_year=self.academic_year, course_id=course_id).first()
+        if archive is None:
+            return []
+        records = _load_records([archive], self.student_id)
+        records.sort(key=lambda record: (record.date, record.id), reverse=True)
+        return records
+
+
+def find_archived_record(pk):
+    """(academic year id, unsaved Attendance) for an archived record id, or None"""
+    # Id ranges of per-course blobs interleave; the exact index settles which one holds pk
+    archives = AttendanceArchive.objects.filter(min_id__lte=pk, max_id__gte=pk).defer('payload').order_by('pk')
+    for archive in archives.iterator(chunk_size=100):
+        indexed = archive.id_index is not None
+        if indexed and not _index_contains(archive.id_index, pk):
+            continue
+        for record in load_archive(archive):
+            if record.pk == pk:
+                return archive.academic_year_id, record
+        if indexed:
+            # Ids are unique, so no other blob has it (its student was deleted)
+            return None
+    return None
+
+
+def archive_year(academic_year, fmt=None):
+    """
+    Move one closed year's attendance into per-course archives.
+
+    Runs in one transaction. Each blob is decoded again before the live rows
+    are deleted. Returns a report dict.
+    """
+    fmt = fmt or get_archive_format()
+    _check_format(fmt)
+    if academic_year.is_current:
+        raise ArchiveError('The current academic year cannot be archived')
+    if academic_year.end_date >= timezone.localdate():
+        raise ArchiveError(f'{academic_year} has not ended yet (it runs until {academic_year.end_date})')
+    if academic_year.attendance_archived:
+        raise ArchiveError(f'{academic_year} is already archived')
+
+    attendance = Attendance.objects.filter(
+        date__gte=academic_year.start_date,
+        date__lte=academic_year.end_date
+    )
+    report = {'academic_year': str(academic_year), 'format': fmt, 'courses': 0, 'rows': 0, 'bytes': 0}
+
+    with transaction.atomic():
+        # Flag first: writes for the year are refused from here on
+        academic_year.attendance_archived = True
+        academic_year.save(update_fields=['attendance_archived', 'updated_at'])
+
+        course_ids = list(attendance.order_by('course_id').values_list('course_id', flat=True).distinct())
+        for course_id in course_ids:
+            rows = list(
+                attendance.filter(course_id=course_id).order_by('date', 'id').values_list(*COLUMNS)
+            )
+            payload = encode_rows(rows, fmt)
+            if len(decode_rows(payload, fmt)) != len(rows):
+                raise ArchiveError(f'Archive of course {course_id} did not round-trip')
+            ids = [row[0] for row in rows]
+            AttendanceArchive.objects.create(
+                academic_year=academic_year,
+                course_id=course_id,
+                format=fmt,
+                row_count=len(rows),
+                present_count=sum(1 for row in rows if row[3]),
+                min_id=min(ids),
+                max_id=max(ids),
+                id_index=pack_ids(ids),
+                payload=payload
+            )
+            # The year is flagged, so the delete signals leave its summaries alone
+            attendance.filter(course_id=course_id).delete()
+            report['courses'] += 1
+            report['rows'] += len(rows)
+            report['bytes'] += len(payload)
+
+        bump_version('academics.Attendance')
+
+    return report
+
+
+def restore_year(academic_year, batch_size=RESTORE_BATCH_SIZE):
+    """Move an archived year's attendance back into the live table. Returns a report dict."""
+    if not academic_year.attendance_archived:
+        raise ArchiveError(f'{academic_year} is not archived')
+
+    archives = AttendanceArchive.objects.filter(academic_year=academic_year).order_by('course_id')
+    report = {'academic_year': str(academic_year), 'courses': 0, 'rows': 0, 'dropped': 0}
+
+    with transaction.atomic():
+        for archive in archives.iterator(chunk_size=1):
+            records = load_archive(archive)
+            for start in range(0, len(records), batch_size):
+                batch = records[start:start + batch_size]
+                stamps = [(record.marked_at, record.updated_at) for record in batch]
+                Attendance.objects.bulk_create(batch)
+                # bulk_create stamps the auto_now(_add) fields again; put the archived times back
+                for record, (marked_at, updated_at) in zip(batch, stamps):
+                    record.marked_at, record.updated_at = marked_at, updated_at
+                Attendance.objects.bulk_update(batch, ['marked_at', 'updated_at'])
+            report['courses'] += 1
+            report['rows'] += len(records)
+            report['dropped'] += archive.row_count - len(records)
+
+        archives.delete()
+        academic_year.attendance_archived = False
+        academic_year.save(update_fields=['attendance_archived', 'updated_at'])
+        # bulk_create skips the signals that maintain the rollups
+        rebuild_attendance_summaries(academic_year)
+        bump_version('academics.Attendance')
+
+    return report
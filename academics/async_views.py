@@ -0,0 +1,106 @@
+"""
+Async read endpoints for the busiest academics views.
+
+They return the same payloads as their DRF counterparts, with the same role
+scoping and the same error bodies, but query through the async ORM, so an
+ASGI worker keeps serving other requests while one waits on the database. The enrollment and
+attendance feeds use the same (date, id) keyset cursors as the DRF views
+(?cursor=); the other lists use page-number pagination (?page=).
+"""
+from asgiref.sync import sync_to_async
+from core.async_views import aserialize, apaginate, async_api_view, json_response
+from .cache import aget_current_academic_year
+from .models import Course, Enrollment, Attendance, AttendanceSummary
+from .pagination import AttendanceCursorPagination, EnrollmentCursorPagination
+from .scope import get_assigned_course_ids
+from .serializers import (
+    AcademicYearSerializer, CourseSerializer, CourseQuerySerializer, EnrollmentSerializer,
+    AttendanceSerializer, AttendanceQuerySerializer, AttendanceSummarySerializer
+)
+
+
+def _students_only(request):
+    if request.user.user_type != 'student':
+        return json_response({'error': 'Only students can access this endpoint'}, status=403)
+    return None
+
+
+@async_api_view
+async def current_academic_year(request):
+    """Async AcademicYearViewSet.current"""
+    current_year = await aget_current_academic_year()
+    if current_year is None:
+        return json_response({'error': 'No current academic year set'}, status=404)
+    return json_response(await aserialize(AcademicYearSerializer, current_year, request))
+
+
+@async_api_view
+async def course_list(request):
+    """Async CourseViewSet list (filters: department, semester)"""
+    filters = CourseQuerySerializer(data=request.GET)
+    if not filters.is_valid():
+        return json_response(filters.errors, status=400)
+    queryset = Course.objects.filter(is_active=True)
+    for param, lookup in (('department', 'department_id'), ('semester', 'semester')):
+        value = filters.validated_data.get(param)
+        if value:
+            queryset = queryset.filter(**{lookup: value})
+
+    serializer = CourseSerializer(context={'request': request})
+    queryset = serializer.setup_eager_loading(queryset).order_by('code')
+    return await apaginate(request, queryset, CourseSerializer)
+
+
+@async_api_view
+async def my_enrollments(request):
+    """Async EnrollmentViewSet.my_enrollments"""
+    forbidden = _students_only(request)
+    if forbidden:
+        return forbidden
+
+    serializer = EnrollmentSerializer(context={'request': request})
+    queryset = serializer.setup_eager_loading(Enrollment.objects.filter(
+        student__user=request.user,
+        is_active=True
+    ))
+    return await apaginate(request, queryset, EnrollmentSerializer, paginator=EnrollmentCursorPagination())
+
+
+@async_api_view
+async def my_attendance(request):
+    """Async AttendanceViewSet.my_attendance"""
+    forbidden = _students_only(request)
+    if forbidden:
+        return forbidden
+
+    serializer = AttendanceSerializer(context={'request': request})
+    queryset = serializer.setup_eager_loading(
+        Attendance.objects.filter(student__user=request.user)
+    )
+    return await apaginate(request, queryset, AttendanceSerializer, paginator=AttendanceCursorPagination())
+
+
+@async_api_view
+async def attendance_summaries(request):
+    """Async AttendanceSummaryViewSet list (filters: course, academic_year, student)"""
+    # Validated first: the faculty scope reads ?academic_year= too
+    filters = AttendanceQuerySerializer(data=request.GET)
+    if not filters.is_valid():
+        return json_response(filters.errors, status=400)
+
+    user = request.user
+    queryset = AttendanceSummary.objects.all()
+    if user.user_type == 'student':
+        queryset = queryset.filter(student__user=user)
+    elif user.user_type == 'faculty':
+        course_ids = await sync_to_async(get_assigned_course_ids)(request)
+        queryset = queryset.filter(course_id__in=course_ids)
+
+    for param, lookup in (('course', 'course_id'), ('academic_year', 'academic_year_id'), ('student', 'student_id')):
+        value = filters.validated_data.get(param)
+        if value:
+            queryset = queryset.filter(**{lookup: value})
+
+    serializer = AttendanceSummarySerializer(context={'request': request})
+    queryset = serializer.setup_eager_loading(queryset).order_by('course_id', 'student_id')
+    return await apaginate(request, queryset, AttendanceSummarySerializer)
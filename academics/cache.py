@@ -0,0 +1,336 @@
+"""
+Versioned read-through cache for reference data.
+
+Departments, academic years and courses change a few times a semester but
+are read on nearly every request. Each cached entry is keyed by the version
+stamps of the tables it depends on; writes bump the stamp (see
+academics.signals), which orphans every dependent entry at once instead of
+deleting keys one by one. Stamps are bumped when the writing transaction
+commits, so a reader never caches rows under a stamp that a rollback or a
+not-yet-committed write makes stale. The backend is the Django cache alias
+named by REFERENCE_CACHE_ALIAS, so tests use local memory and production can
+point the alias at a shared backend such as Redis or Memcached.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+from django.db.models import Manager
+from rest_framework import serializers
+from .models import AcademicYear, Department, Course
+
+_MISSING = object()
+
+
+def get_reference_cache():
+    return caches[getattr(settings, 'REFERENCE_CACHE_ALIAS', 'default')]
+
+
+def _version_key(label):
+    return f'ref:version:{label}'
+
+
+def _modified_key(label):
+    return f'ref:modified:{label}'
+
+
+def get_versions(*labels):
+    """Current version stamp for each model label, initialising missing ones"""
+    cache = get_reference_cache()
+    keys = [_version_key(label) for label in labels]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        # A time-based start value never reuses a stamp that may still be
+        # baked into an older entry if the version key itself was evicted
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return '.'.join(str(found[key]) for key in keys)
+
+
+async def aget_versions(*labels):
+    """Async get_versions()"""
+    cache = get_reference_cache()
+    keys = [_version_key(label) for label in labels]
+    found = await cache.aget_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        await cache.aset_many(missing, timeout=None)
+        found.update(missing)
+    return '.'.join(str(found[key]) for key in keys)
+
+
+def bump_version(*labels):
+    """Invalidate every cached entry that depends on the given model labels (once the transaction commits)"""
+    # Runs at once outside an atomic block; dropped if the transaction rolls back
+    transaction.on_commit(lambda: _bump_now(labels))
+
+
+def _bump_now(labels):
+    cache = get_reference_cache()
+    now = time.time()
+    for label in labels:
+        try:
+            cache.incr(_version_key(label))
+        except ValueError:
+            cache.set(_version_key(label), time.time_ns(), timeout=None)
+        cache.set(_modified_key(label), now, timeout=None)
+
+
+def get_last_modified(*labels):
+    """Latest write time across the given model labels, as an aware datetime"""
+    cache = get_reference_cache()
+    keys = [_modified_key(label) for label in labels]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        # Unknown after a restart or eviction; "now" is a safe upper bound
+        now = time.time()
+        cache.set_many({key: now for key in missing}, timeout=None)
+        found.update({key: now for key in missing})
+    return datetime.fromtimestamp(max(found.values()), tz=timezone.utc)
+
+
+def read_through(key, labels, loader, timeout=DEFAULT_TIMEOUT):
+    """Return the cached value for `key`, calling loader() on a miss"""
+    cache = get_reference_cache()
+    versioned_key = f'ref:{key}:{get_versions(*labels)}'
+    value = cache.get(versioned_key, _MISSING)
+    if value is _MISSING:
+        value = loader()
+        cache.set(versioned_key, value, timeout)
+    return value
+
+
+def read_through_many(keys, labels, loader, timeout=DEFAULT_TIMEOUT):
+    """
+    Batch read_through(): `keys` maps ids to cache keys, `loader(ids)` returns
+    {id: value} for the missed ids in one go; returns {id: value}
+    """
+    cache = get_reference_cache()
+    version = get_versions(*labels)
+    versioned = {pk: f'ref:{key}:{version}' for pk, key in keys.items()}
+    found = cache.get_many(list(versioned.values()))
+    values = {pk: found[key] for pk, key in versioned.items() if key in found}
+    missing = [pk for pk in versioned if pk not in values]
+    if missing:
+        loaded = loader(missing)
+        cache.set_many({versioned[pk]: loaded.get(pk) for pk in missing}, timeout)
+        values.update({pk: loaded.get(pk) for pk in missing})
+    return values
+
+
+async def aread_through(key, labels, aloader, timeout=DEFAULT_TIMEOUT):
+    """Async read_through(); `aloader` is a coroutine function"""
+    cache = get_reference_cache()
+    versioned_key = f'ref:{key}:{await aget_versions(*labels)}'
+    value = await cache.aget(versioned_key, _MISSING)
+    if value is _MISSING:
+        value = await aloader()
+        await cache.aset(versioned_key, value, timeout)
+    return value
+
+
+def get_current_academic_year():
+    """The academic year flagged is_current, or None"""
+    return read_through(
+        'academic-year:current',
+        ['academics.AcademicYear'],
+        lambda: AcademicYear.objects.filter(is_current=True).first()
+    )
+
+
+async def aget_current_academic_year():
+    """Async get_current_academic_year(), sharing its cache entry"""
+    return await aread_through(
+        'academic-year:current',
+        ['academics.AcademicYear'],
+        lambda: AcademicYear.objects.filter(is_current=True).afirst()
+    )
+
+
+def get_academic_year(pk):
+    return read_through(
+        f'academic-year:{pk}',
+        ['academics.AcademicYear'],
+        lambda: AcademicYear.objects.filter(pk=pk).first()
+    )
+
+
+def get_department(pk):
+    return read_through(
+        f'department:{pk}',
+        ['academics.Department'],
+        lambda: Department.objects.filter(pk=pk).first()
+    )
+
+
+def get_course(pk):
+    return read_through(
+        f'course:{pk}',
+        ['academics.Course'],
+        lambda: Course.objects.filter(pk=pk).first()
+    )
+
+
+class _CachedReference:
+    """Placeholder for a nested object that will be rendered from the cache"""
+
+    def __init__(self, pk):
+        self.pk = pk
+
+
+class ReferenceCachedSerializerMixin:
+    """
+    Serializer mixin that renders a nested reference object from the cache.
+
+    When used as a nested field, only the foreign key value is read from the
+    parent instance; the representation is served from the reference cache
+    and only built from the database on a miss. Top-level use is unchanged.
+    `cache_dependencies` lists every model label the representation reads.
+
+    In a list, the first reference looked up fetches the cache entries of
+    the whole page's references at once and builds the misses with one
+    query. `live_fields` are left out of the cached entry (e.g. counts of
+    frequently written rows) and filled per batch by get_live_values().
+    """
+    cache_dependencies = ()
+    live_fields = ()
+
+    def _renders_from_cache(self):
+        return bool(self.field_name) and getattr(
+            settings, 'ACADEMICS_REFERENCE_CACHE_NESTED', True
+        ) and len(self.source_attrs) == 1
+
+    @property
+    def self_loading(self):
+        return self._renders_from_cache()
+
+    def get_attribute(self, instance):
+        if not self._renders_from_cache():
+            return super().get_attribute(instance)
+        pk = instance.serializable_value(self.source_attrs[0])
+        return None if pk is None else _CachedReference(pk)
+
+    def to_representation(self, instance):
+        if not isinstance(instance, _CachedReference):
+            return super().to_representation(instance)
+
+        memo = self._reference_memo()
+        if instance.pk not in memo:
+            pks = self._sibling_pks() or set()
+            pks.add(instance.pk)
+            self.prime(pks)
+        return memo[instance.pk]
+
+    def get_live_values(self, pks):
+        """{pk: {field name: value}} for the `live_fields` of the given objects"""
+        return {}
+
+    def _reference_memo(self):
+        return self.__dict__.setdefault('_memo', {})
+
+    def _live_fields(self):
+        return [name for name in self.live_fields if name in self.fields]
+
+    def prime(self, pks):
+        """Load the representations of `pks` into this serializer's memo in one batch"""
+        memo = self._reference_memo()
+        wanted = [pk for pk in pks if pk not in memo]
+        if not wanted:
+            return
+        loaded = {}
+        signature = self._get_signature()
+        cached = read_through_many(
+            {pk: f'rep:{type(self).__name__}:{signature}:{pk}' for pk in wanted},
+            self.cache_dependencies,
+            lambda missing: self._load_representations(missing, loaded)
+        )
+        live_fields = self._live_fields()
+        hits = [pk for pk, value in cached.items() if value is not None and pk not in loaded]
+        live = self.get_live_values(hits) if live_fields and hits else {}
+        for pk, value in cached.items():
+            if pk in loaded:
+                value = loaded[pk]
+            elif value is not None and live_fields:
+                value = dict(value)
+                value.update(live.get(pk, {}))
+            memo[pk] = value
+
+    def _load_representations(self, pks, loaded):
+        """Cache entries for `pks` from one query; full renders are kept in `loaded`"""
+        objs = list(self.setup_eager_loading(self.Meta.model._default_manager.filter(pk__in=pks)))
+        # Nested cached references of the batch are primed together as well
+        for field in self.fields.values():
+            if isinstance(field, ReferenceCachedSerializerMixin) and field._renders_from_cache():
+                attr = field.source_attrs[0]
+                field.prime({obj.serializable_value(attr) for obj in objs} - {None})
+        live_fields = self._live_fields()
+        entries = {}
+        for obj in objs:
+            representation = super().to_representation(obj)
+            loaded[obj.pk] = representation
+            # Live fields keep their place in the entry but not their value
+            entries[obj.pk] = {
+                name: None if name in live_fields else value for name, value in representation.items()
+            }
+        return entries
+
+    def _sibling_pks(self):
+        """Primary keys this field references across the list being rendered, or None"""
+        path = []
+        node = self
+        while True:
+            parent = node.parent
+            if parent is None:
+                return None
+            if isinstance(parent, serializers.ListSerializer):
+                if parent.parent is not None:
+                    return None
+                break
+            if isinstance(parent, ReferenceCachedSerializerMixin) and parent._renders_from_cache():
+                # Rendered from the parent's batch, which primes this field
+                return None
+            path.append(node.source_attrs)
+            node = parent
+
+        rows = parent.instance
+        if rows is None or isinstance(rows, Manager):
+            return None
+        path.reverse()
+        pks = set()
+        for row in rows:
+            for attrs in path[:-1]:
+                for attr in attrs:
+                    row = getattr(row, attr, None)
+                    if row is None:
+                        break
+                if row is None:
+                    break
+            if row is not None:
+                pk = row.serializable_value(path[-1][0])
+                if pk is not None:
+                    pks.add(pk)
+        return pks
+
+    def _get_signature(self):
+        """Hash of the rendered field tree, so sparse and full renders never share entries"""
+        if not hasattr(self, '_signature'):
+            self._signature = hashlib.sha1(_field_tree(self).encode()).hexdigest()[:12]
+        return self._signature
+
+
+def _field_tree(serializer):
+    parts = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        if isinstance(nested, serializers.BaseSerializer):
+            parts.append(f'{name}({_field_tree(nested)})')
+        else:
+            parts.append(name)
+    return ','.join(parts)
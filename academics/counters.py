@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .models import Department, Course, CourseOffering, Enrollment
+
+
+def use_materialized_counters():
+    """Whether serializers read the denormalized counter columns"""
+    return getattr(settings, 'ACADEMICS_MATERIALIZED_COUNTERS', False)
+
+
+def _active_count(model, fk_name):
+    """Correlated subquery counting active rows of `model` pointing at the outer row"""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{fk_name: OuterRef('pk'), 'is_active': True})
+            .order_by()
+            .values(fk_name)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def refresh_department_counts(department_ids=None):
+    """Recompute Department.active_course_count in a single UPDATE"""
+    queryset = Department.objects.all()
+    if department_ids is not None:
+        queryset = queryset.filter(pk__in=department_ids)
+    return queryset.update(active_course_count=_active_count(Course, 'department'))
+
+
+def refresh_course_counts(course_ids=None):
+    """Recompute Course.active_enrollment_count in a single UPDATE"""
+    queryset = Course.objects.all()
+    if course_ids is not None:
+        queryset = queryset.filter(pk__in=course_ids)
+    return queryset.update(active_enrollment_count=_active_count(Enrollment, 'course'))
+
+
+def refresh_offering_counts(course_ids=None, offering_ids=None):
+    """Recompute CourseOffering.seats_taken in a single UPDATE"""
+    queryset = CourseOffering.objects.all()
+    if course_ids is not None:
+        queryset = queryset.filter(course_id__in=course_ids)
+    if offering_ids is not None:
+        queryset = queryset.filter(pk__in=offering_ids)
+    seats = Enrollment.objects.filter(
+        course=OuterRef('course'), academic_year=OuterRef('academic_year'), is_active=True
+    ).order_by().values('course').annotate(total=Count('pk')).values('total')
+    return queryset.update(seats_taken=Coalesce(Subquery(seats), 0))
@@ -0,0 +1,346 @@
+"""
+Columnar analytics export.
+
+Writes the courses, students, enrollments and attendance of one academic
+year (or of all years) to one file per dataset: Parquet or Arrow IPC when
+pyarrow is installed, gzipped CSV otherwise. Rows are read with
+values_list().iterator() and written EXPORT_BATCH_SIZE at a time, so memory
+stays flat however large the tables are. Attendance of archived years is
+read from the archive blobs one course at a time.
+
+Exports are incremental: each run records a watermark (`until`), and the
+next run for the same academic year only writes rows changed after it.
+`until` is taken before the reads, so a write stamped before it but
+committed after the reads would fall between two runs; the next run
+therefore reads from ANALYTICS_EXPORT_OVERLAP seconds before the watermark,
+and skips the rows the previous run already wrote from that margin (kept in
+its `<dataset>.overlap.json`). Deleted rows are not tracked; run a full
+export to resync.
+"""
+import csv
+import gzip
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import chain, islice
+from pathlib import Path
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from accounts.models import StudentProfile
+from .archive import load_archive
+from .models import AnalyticsExport, Attendance, AttendanceArchive, Course, Enrollment
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # Parquet / Arrow output is optional
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 5000
+FORMATS = ('parquet', 'arrow', 'csv.gz')
+
+# Dataset name -> (model, exported columns, columns whose changes count)
+DATASETS = {
+    'courses': (
+        Course,
+        ('id', 'code', 'name', 'department_id', 'credits', 'semester', 'course_type', 'is_active', 'updated_at'),
+        ('updated_at',)
+    ),
+    'students': (
+        StudentProfile,
+        (
+            'id', 'student_id', 'user_id', 'user__username', 'user__first_name', 'user__last_name',
+            'user__email', 'program', 'current_semester', 'enrollment_date', 'is_active', 'updated_at'
+        ),
+        ('updated_at', 'user__updated_at')
+    ),
+    'enrollments': (
+        Enrollment,
+        (
+            'id', 'student_id', 'course_id', 'academic_year_id', 'enrollment_date', 'grade',
+            'grade_points', 'is_active', 'updated_at'
+        ),
+        ('updated_at',)
+    ),
+    'attendance': (
+        Attendance,
+        ('id', 'student_id', 'course_id', 'date', 'is_present', 'remarks', 'marked_by_id', 'marked_at', 'updated_at'),
+        ('updated_at',)
+    ),
+}
+
+
+class ExportError(Exception):
+    """Raised when an export cannot be started"""
+
+
+def get_export_format():
+    """ANALYTICS_EXPORT_FORMAT, or Parquet when pyarrow is installed and gzipped CSV otherwise"""
+    fmt = getattr(settings, 'ANALYTICS_EXPORT_FORMAT', None)
+    if fmt:
+        return fmt
+    return 'parquet' if pyarrow is not None else 'csv.gz'
+
+
+def get_export_dir():
+    return Path(getattr(settings, 'ANALYTICS_EXPORT_DIR', Path(settings.BASE_DIR) / 'exports'))
+
+
+def get_export_overlap():
+    """How far before the previous watermark an incremental export starts reading"""
+    return timedelta(seconds=getattr(settings, 'ANALYTICS_EXPORT_OVERLAP', 300))
+
+
+def _check_format(fmt):
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown export format '{fmt}'; use one of: {', '.join(FORMATS)}")
+    if fmt != 'csv.gz' and pyarrow is None:
+        raise ExportError(f'{fmt} export requires pyarrow; use csv.gz instead')
+
+
+def _resolve_field(model, path):
+    *relations, name = path.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+
+def _arrow_type(field):
+    internal_type = field.get_internal_type()
+    if internal_type == 'BooleanField':
+        return pyarrow.bool_()
+    if internal_type == 'DateField':
+        return pyarrow.date32()
+    if internal_type == 'DateTimeField':
+        return pyarrow.timestamp('us', tz='UTC')
+    if internal_type == 'DecimalField':
+        return pyarrow.decimal128(field.max_digits, field.decimal_places)
+    if internal_type.endswith(('IntegerField', 'AutoField')) or field.is_relation:
+        return pyarrow.int64()
+    return pyarrow.string()
+
+
+def _column_name(path):
+    return path.replace('__', '_')
+
+
+class _CsvWriter:
+    def __init__(self, path, columns):
+        self.file = gzip.open(path, 'wt', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([_column_name(column) for column in columns])
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _ArrowWriter:
+    def __init__(self, path, model, columns, fmt):
+        self.schema = pyarrow.schema([
+            (_column_name(column), _arrow_type(_resolve_field(model, column))) for column in columns
+        ])
+        if fmt == 'parquet':
+            self.sink = None
+            self.writer = pyarrow.parquet.ParquetWriter(str(path), self.schema, compression='zstd')
+        else:
+            self.sink = pyarrow.OSFile(str(path), 'wb')
+            self.writer = pyarrow.ipc.new_file(
+                self.sink, self.schema, options=pyarrow.ipc.IpcWriteOptions(compression='zstd')
+            )
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        self.writer.write_batch(pyarrow.record_batch(
+            [pyarrow.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+            schema=self.schema
+        ))
+
+    def close(self):
+        self.writer.close()
+        if self.sink is not None:
+            self.sink.close()
+
+
+def _queryset(name, academic_year):
+    model = DATASETS[name][0]
+    queryset = model._default_manager.all()
+    if academic_year is None:
+        return queryset
+    year_enrollments = Enrollment.objects.filter(academic_year=academic_year)
+    if name == 'courses':
+        return queryset.filter(pk__in=year_enrollments.values('course_id'))
+    if name == 'students':
+        return queryset.filter(pk__in=year_enrollments.values('student_id'))
+    if name == 'enrollments':
+        return queryset.filter(academic_year=academic_year)
+    return queryset.filter(date__gte=academic_year.start_date, date__lte=academic_year.end_date)
+
+
+def _changed(change_columns, since, until):
+    condition = Q()
+    for column in change_columns:
+        window = Q(**{f'{column}__lte': until})
+        if since is not None:
+            window &= Q(**{f'{column}__gt': since})
+        condition |= window
+    return condition
+
+
+def _archived_attendance_rows(job, columns, since):
+    """Attendance rows of archived years changed after `since`, one course blob at a time"""
+    archives = AttendanceArchive.objects.filter(academic_year__attendance_archived=True).order_by('pk')
+    if job.academic_year_id is not None:
+        archives = archives.filter(academic_year_id=job.academic_year_id)
+    if since is not None:
+        # Blobs are immutable, so one created before the window has nothing new
+        archives = archives.filter(created_at__gt=since)
+    for archive in archives.iterator(chunk_size=1):
+        for record in load_archive(archive):
+            if (since is None or record.updated_at > since) and record.updated_at <= job.until:
+                yield tuple(getattr(record, column) for column in columns)
+
+
+def _overlap_path(directory, name):
+    return directory / f'{name}.overlap.json'
+
+
+def _written_keys(job, name):
+    """Row keys the previous export wrote from its last overlap margin"""
+    if job.since is None:
+        return set()
+    previous = AnalyticsExport.objects.filter(
+        academic_year_id=job.academic_year_id, status='completed', until=job.since
+    ).exclude(pk=job.pk).order_by('-pk').first()
+    if previous is None:
+        return set()
+    try:
+        keys = json.loads(_overlap_path(get_export_dir() / str(previous.pk), name).read_text())
+    except (OSError, ValueError):
+        # Gone; the margin's rows are written again
+        return set()
+    return {tuple(key) for key in keys}
+
+
+def _export_dataset(name, job, directory, batch_size, overlap):
+    model, columns, change_columns = DATASETS[name]
+    # A row's key is its id and change stamps: a row changed again is written again
+    hidden = [column for column in change_columns if column not in columns]
+    stamps = [(list(columns) + hidden).index(column) for column in change_columns]
+    since = job.since - overlap if job.since is not None else None
+    queryset = _queryset(name, job.academic_year).filter(
+        _changed(change_columns, since, job.until)
+    ).order_by('pk').values_list(*columns, *hidden)
+    rows = queryset.iterator(chunk_size=batch_size)
+    if name == 'attendance':
+        rows = chain(rows, _archived_attendance_rows(job, columns, since))
+
+    written = _written_keys(job, name)
+    margin_start = job.until - overlap
+    margin_keys = []
+
+    def new_rows(rows):
+        for row in rows:
+            key = (row[0], *(row[index].isoformat() for index in stamps))
+            # Written now or by an earlier run, it stays written for the next one
+            if any(row[index] > margin_start for index in stamps):
+                margin_keys.append(key)
+            if key not in written:
+                yield row[:len(columns)]
+
+    rows = new_rows(rows)
+
+    path = directory / f'{name}.{job.format}'
+    if job.format == 'csv.gz':
+        writer = _CsvWriter(path, columns)
+    else:
+        writer = _ArrowWriter(path, model, columns, job.format)
+    count = 0
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            writer.write(batch)
+            count += len(batch)
+    finally:
+        writer.close()
+    _overlap_path(directory, name).write_text(json.dumps(margin_keys))
+    return {'file': path.name, 'rows': count, 'bytes': path.stat().st_size}
+
+
+def create_export(academic_year=None, fmt=None, full=False, requested_by=None):
+    """
+    Pending AnalyticsExport starting from the last completed export's watermark.
+
+    The watermark is per academic year (or all years); `full` ignores it.
+    """
+    fmt = fmt or get_export_format()
+    _check_format(fmt)
+    since = None
+    if not full:
+        previous = AnalyticsExport.objects.filter(
+            academic_year=academic_year, status='completed'
+        ).order_by('-until').first()
+        since = previous.until if previous else None
+    return AnalyticsExport.objects.create(
+        academic_year=academic_year, format=fmt, since=since, requested_by=requested_by
+    )
+
+
+def run_export(job, batch_size=EXPORT_BATCH_SIZE):
+    """Write every dataset for a pending export; marks it completed or failed"""
+    job.status = 'running'
+    job.until = timezone.now()
+    job.save(update_fields=['status', 'until'])
+    directory = get_export_dir() / str(job.pk)
+    overlap = get_export_overlap()
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        files = {name: _export_dataset(name, job, directory, batch_size, overlap) for name in DATASETS}
+    except Exception as exc:
+        job.status = 'failed'
+        job.error = str(exc)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        raise
+
+    job.files = files
+    job.status = 'completed'
+    job.finished_at = timezone.now()
+    job.save(update_fields=['files', 'status', 'finished_at'])
+    return job
+
+
+def get_export_path(job, dataset):
+    """Path of one dataset file of a completed export, or None"""
+    entry = job.files.get(dataset)
+    if job.status != 'completed' or entry is None:
+        return None
+    return get_export_dir() / str(job.pk) / entry['file']
+
+
+# Exports requested over the API run one at a time in this process
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analytics-export')
+
+
+def _run_in_background(job_id):
+    try:
+        run_export(AnalyticsExport.objects.get(pk=job_id))
+    except Exception:
+        logger.exception('Analytics export %s failed', job_id)
+    finally:
+        connections.close_all()
+
+
+def submit_export(job):
+    """Run the export in a background thread once the current transaction commits"""
+    transaction.on_commit(lambda: _executor.submit(_run_in_background, job.pk))
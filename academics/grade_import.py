@@ -0,0 +1,240 @@
+"""
+Bulk grade import.
+
+Rows are read lazily from CSV (or XLSX when openpyxl is installed) and
+processed in chunks: each chunk is validated with one enrollment query and
+written with one bulk_update, so memory stays flat however large the file
+is. The whole import runs in one transaction and is rolled back if any row
+fails validation (or on a dry run); the report lists every failing row.
+
+Columns: student_id, grade, and optionally grade_points (defaults to
+Enrollment.GRADE_POINTS) and course_code (defaults to the course the import
+is for).
+"""
+import os
+import zipfile
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from core.uploads import CSVFileError, CSVReader
+from .cache import bump_version
+from .models import Enrollment
+from .transcripts import rebuild_transcripts
+
+try:
+    import openpyxl
+    from openpyxl.utils.exceptions import InvalidFileException
+except ImportError:  # XLSX support is optional
+    openpyxl = None
+    InvalidFileException = None
+
+CHUNK_SIZE = 500
+REQUIRED_COLUMNS = {'student_id', 'grade'}
+VALID_GRADES = {code for code, label in Enrollment.GRADE_CHOICES}
+MAX_GRADE_POINTS = Decimal(max(points for points in Enrollment.GRADE_POINTS.values() if points is not None))
+
+
+class GradeImportError(Exception):
+    """The file as a whole can't be imported (bad format or missing columns)"""
+
+
+def _check_columns(columns):
+    missing = REQUIRED_COLUMNS - set(columns)
+    if missing:
+        raise GradeImportError(f"Missing columns: {', '.join(sorted(missing))}")
+
+
+def iter_csv_rows(fileobj):
+    """Yield (line number, row dict) from a binary (UTF-8) or text CSV file"""
+    try:
+        reader = CSVReader(fileobj)
+        _check_columns(reader.fieldnames)
+        yield from reader
+    except CSVFileError as exc:
+        raise GradeImportError(str(exc))
+
+
+def _open_workbook(fileobj):
+    # Not a zip, a zip without a workbook inside, or damaged sheet XML
+    unreadable = (zipfile.BadZipFile, InvalidFileException, KeyError, ValueError, OSError)
+    try:
+        workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    except unreadable:
+        raise GradeImportError('The file is not a readable XLSX workbook; save it again as .xlsx or use a CSV file')
+    if not workbook.worksheets:
+        workbook.close()
+        raise GradeImportError('The workbook has no sheets')
+    return workbook
+
+
+def iter_xlsx_rows(fileobj):
+    """Yield (row number, row dict) from the first sheet of an XLSX file"""
+    if openpyxl is None:
+        raise GradeImportError('XLSX import requires openpyxl; use a CSV file instead')
+    workbook = _open_workbook(fileobj)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+        _check_columns(header)
+        for number, values in enumerate(rows, start=2):
+            yield number, {
+                name: '' if value is None else str(value)
+                for name, value in zip(header, values) if name
+            }
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename):
+    """Pick the reader from the file extension"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.xlsx':
+        return iter_xlsx_rows(fileobj)
+    if extension in ('.csv', ''):
+        return iter_csv_rows(fileobj)
+    raise GradeImportError(f'Unsupported file type: {extension}')
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class GradeImport:
+    """
+    One import run.
+
+    `allowed_course_ids` limits which courses may be graded (a faculty
+    member's scope); None allows every course.
+    """
+
+    def __init__(self, academic_year, course=None, allowed_course_ids=None, chunk_size=CHUNK_SIZE):
+        self.academic_year = academic_year
+        self.course = course
+        self.allowed_course_ids = allowed_course_ids
+        self.chunk_size = chunk_size
+        self.processed = 0
+        self.updated = 0
+        self.errors = []
+        self._seen = set()
+        self._student_ids = set()
+
+    def run(self, rows, dry_run=False):
+        with transaction.atomic():
+            for chunk in _chunks(rows, self.chunk_size):
+                updates = self._validate(chunk)
+                # Once a row has failed the import will be rolled back, so
+                # later chunks are only validated
+                if updates and not self.errors and not dry_run:
+                    Enrollment.objects.bulk_update(
+                        updates, ['grade', 'grade_points', 'updated_at'], batch_size=self.chunk_size
+                    )
+                    self.updated += len(updates)
+
+            applied = not self.errors and not dry_run
+            if applied and self._student_ids:
+                # bulk_update skips the signals that maintain transcripts
+                rebuild_transcripts(student_ids=self._student_ids)
+                bump_version('academics.Enrollment')
+            if not applied:
+                transaction.set_rollback(True)
+        return self.report(applied, dry_run)
+
+    def report(self, applied, dry_run=False):
+        return {
+            'processed': self.processed,
+            'valid': self.processed - len(self.errors),
+            'updated': self.updated if applied else 0,
+            'applied': applied,
+            'dry_run': dry_run,
+            'errors': sorted(self.errors, key=lambda error: error['row']),
+        }
+
+    def _error(self, line, student_code, course_code, message):
+        self.errors.append({
+            'row': line, 'student_id': student_code, 'course_code': course_code, 'error': message
+        })
+
+    def _parse(self, line, row):
+        """(key, grade, grade points) for a row, or None after recording its error"""
+        student_code = (row.get('student_id') or '').strip()
+        course_code = (row.get('course_code') or '').strip() or (self.course.code if self.course else '')
+        grade = (row.get('grade') or '').strip().upper()
+        raw_points = (row.get('grade_points') or '').strip()
+
+        if not student_code:
+            self._error(line, student_code, course_code, 'student_id is required')
+            return None
+        if not course_code:
+            self._error(line, student_code, course_code, 'course_code is required')
+            return None
+        if grade not in VALID_GRADES:
+            self._error(line, student_code, course_code, f'Invalid grade: {grade or "(blank)"}')
+            return None
+
+        points = Enrollment.GRADE_POINTS[grade]
+        if raw_points:
+            try:
+                points = Decimal(raw_points)
+            except InvalidOperation:
+                self._error(line, student_code, course_code, f'Invalid grade_points: {raw_points}')
+                return None
+            if not 0 <= points <= MAX_GRADE_POINTS:
+                self._error(line, student_code, course_code, f'grade_points must be between 0 and {MAX_GRADE_POINTS}')
+                return None
+
+        key = (student_code, course_code)
+        if key in self._seen:
+            self._error(line, student_code, course_code, 'Duplicate row for this student and course')
+            return None
+        self._seen.add(key)
+        return key, grade, points
+
+    def _validate(self, chunk):
+        """Enrollment instances to update for the valid rows of a chunk"""
+        parsed = []
+        for line, row in chunk:
+            self.processed += 1
+            result = self._parse(line, row)
+            if result is not None:
+                parsed.append((line,) + result)
+        if not parsed:
+            return []
+
+        # One query resolves every (student, course) pair in the chunk
+        enrollments = {
+            (enrollment.student_code, enrollment.course_code): enrollment
+            for enrollment in Enrollment.objects.filter(
+                academic_year=self.academic_year,
+                is_active=True,
+                student__student_id__in={key[0] for line, key, grade, points in parsed},
+                course__code__in={key[1] for line, key, grade, points in parsed}
+            ).only('id', 'student_id', 'course_id').annotate(
+                student_code=F('student__student_id'),
+                course_code=F('course__code')
+            )
+        }
+
+        now = timezone.now()
+        updates = []
+        for line, key, grade, points in parsed:
+            enrollment = enrollments.get(key)
+            if enrollment is None:
+                self._error(line, key[0], key[1], f'Student is not enrolled in this course for {self.academic_year.year}')
+                continue
+            if self.allowed_course_ids is not None and enrollment.course_id not in self.allowed_course_ids:
+                self._error(line, key[0], key[1], 'You are not assigned to this course')
+                continue
+            enrollment.grade = grade
+            enrollment.grade_points = points
+            enrollment.updated_at = now
+            updates.append(enrollment)
+            self._student_ids.add(enrollment.student_id)
+        return updates
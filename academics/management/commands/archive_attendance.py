@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from academics.archive import ArchiveError, FORMATS, archive_year, restore_year
+from academics.models import AcademicYear
+
+
+class Command(BaseCommand):
+    help = (
+        'Move a closed academic year\'s attendance out of the live table into '
+        'compressed per-course archives (or back with --restore)'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--year', required=True, help='Academic year (e.g. 2023-2024)')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Archive format; defaults to ATTENDANCE_ARCHIVE_FORMAT'
+        )
+        parser.add_argument(
+            '--restore', action='store_true',
+            help='Move the archived attendance back into the live table'
+        )
+    
+    def handle(self, *args, **options):
+        academic_year = AcademicYear.objects.filter(year=options['year']).first()
+        if academic_year is None:
+            raise CommandError(f"Academic year {options['year']} does not exist")
+        
+        try:
+            if options['restore']:
+                report = restore_year(academic_year)
+            else:
+                report = archive_year(academic_year, fmt=options['format'])
+        except ArchiveError as exc:
+            raise CommandError(str(exc))
+        
+        if options['restore']:
+            self.stdout.write(
+                f"{report['academic_year']}: {report['rows']} records restored from "
+                f"{report['courses']} courses ({report['dropped']} of deleted students dropped)"
+            )
+            self.stdout.write(self.style.SUCCESS('✅ Successfully restored attendance'))
+        else:
+            self.stdout.write(
+                f"{report['academic_year']}: {report['rows']} records from {report['courses']} "
+                f"courses archived as {report['format']} ({report['bytes']} bytes)"
+            )
+            self.stdout.write(self.style.SUCCESS('✅ Successfully archived attendance'))
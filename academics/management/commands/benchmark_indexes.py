@@ -0,0 +1,179 @@
+import random
+import time
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from accounts.models import StudentProfile, FacultyProfile
+from academics.models import (
+    Department, AcademicYear, Course, Enrollment, CourseAssignment, Attendance
+)
+
+User = get_user_model()
+
+# Indexes added for the viewset access patterns (migration 0006)
+BENCHMARKED_INDEXES = {
+    Course: ['course_active_dept_sem_idx'],
+    Enrollment: ['enrollment_active_course_idx'],
+    CourseAssignment: ['assignment_faculty_year_idx'],
+    Attendance: ['attendance_course_date_idx', 'attendance_student_date_idx'],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway dataset and compare query plans and timings of the '
+        'academics viewset queries with and without the access-pattern indexes. '
+        'Everything runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--courses', type=int, default=20)
+        parser.add_argument('--courses-per-student', type=int, default=5)
+        parser.add_argument('--days', type=int, default=40, help='Class days of attendance')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if not connection.features.can_rollback_ddl:
+            raise CommandError('This benchmark needs a database with transactional DDL')
+
+        with transaction.atomic():
+            self.stdout.write('Seeding benchmark dataset...')
+            context = self.seed(options)
+            after = self.measure(context, options['repeat'], 'with-indexes')
+            self.drop_indexes()
+            before = self.measure(context, options['repeat'], 'without-indexes')
+            transaction.set_rollback(True)
+
+        for name in after:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{name}'))
+            self.stdout.write(f"  without indexes: {before[name]['ms']:.2f} ms")
+            for line in before[name]['plan'].splitlines():
+                self.stdout.write(f'    {line}')
+            self.stdout.write(f"  with indexes:    {after[name]['ms']:.2f} ms")
+            for line in after[name]['plan'].splitlines():
+                self.stdout.write(f'    {line}')
+
+        self.stdout.write(self.style.SUCCESS('\n✅ Benchmark finished (dataset rolled back)'))
+
+    def seed(self, options):
+        rng = random.Random(options['seed'])
+        year = AcademicYear.objects.create(
+            year='BENCH', start_date=date(2000, 7, 1), end_date=date(2001, 6, 30)
+        )
+        departments = Department.objects.bulk_create([
+            Department(name=f'Bench Department {i}', code=f'BD{i}') for i in range(5)
+        ])
+        courses = Course.objects.bulk_create([
+            Course(
+                name=f'Bench Course {i}', code=f'BENCH{i}', credits=3,
+                department=departments[i % len(departments)], semester=i % 8 + 1
+            )
+            for i in range(options['courses'])
+        ])
+
+        password = make_password('benchmark')
+        faculty_user = User.objects.create(
+            username='bench_faculty', user_type='faculty', password=password
+        )
+        faculty = FacultyProfile.objects.create(
+            user=faculty_user, employee_id='BENCHFAC', department='Bench',
+            designation='Professor', joining_date=date(2000, 1, 1)
+        )
+        CourseAssignment.objects.bulk_create([
+            CourseAssignment(faculty=faculty, course=course, academic_year=year)
+            for course in courses[:3]
+        ])
+
+        users = User.objects.bulk_create([
+            User(username=f'bench_student_{i}', user_type='student', password=password)
+            for i in range(options['students'])
+        ], batch_size=1000)
+        students = StudentProfile.objects.bulk_create([
+            StudentProfile(user=user, student_id=f'BENCH{i}', enrollment_date=date(2000, 7, 1))
+            for i, user in enumerate(users)
+        ], batch_size=1000)
+
+        enrollments = []
+        attendance = []
+        days = [date(2000, 8, 1) + timedelta(days=d) for d in range(options['days'])]
+        per_student = min(options['courses_per_student'], len(courses))
+        for student in students:
+            for course in rng.sample(courses, per_student):
+                enrollments.append(Enrollment(student=student, course=course, academic_year=year))
+                attendance.extend(
+                    Attendance(student=student, course=course, date=day, is_present=rng.random() < 0.8)
+                    for day in days
+                )
+        Enrollment.objects.bulk_create(enrollments, batch_size=2000)
+        Attendance.objects.bulk_create(attendance, batch_size=2000)
+        self.stdout.write(
+            f'  {len(students)} students, {len(enrollments)} enrollments, '
+            f'{len(attendance)} attendance rows'
+        )
+        return {
+            'department': departments[0], 'year': year,
+            'faculty_user': faculty_user, 'student_user': users[0]
+        }
+
+    def get_queries(self, context):
+        """Querysets mirroring the filters used by the academics viewsets"""
+        # Resolved once per request by academics.scope
+        assigned_courses = list(CourseAssignment.objects.filter(
+            faculty__user=context['faculty_user'], academic_year=context['year']
+        ).values_list('course_id', flat=True))
+        return {
+            'CourseViewSet: active by department and semester': Course.objects.filter(
+                is_active=True, department=context['department'], semester=1
+            ),
+            'EnrollmentViewSet (student)': Enrollment.objects.filter(
+                is_active=True, student__user=context['student_user']
+            ),
+            'EnrollmentViewSet (faculty)': Enrollment.objects.filter(
+                is_active=True, course_id__in=assigned_courses
+            ).order_by('-enrollment_date', '-id')[:20],
+            'AttendanceViewSet (faculty)': Attendance.objects.filter(
+                course_id__in=assigned_courses
+            ).order_by('-date', '-id')[:20],
+            'AttendanceViewSet (student)': Attendance.objects.filter(
+                student__user=context['student_user']
+            ).order_by('-date', '-id')[:20],
+            'CourseAssignmentViewSet (faculty)': CourseAssignment.objects.filter(
+                faculty__user=context['faculty_user']
+            ),
+        }
+
+    def measure(self, context, repeat, phase):
+        results = {}
+        for name, queryset in self.get_queries(context).items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = {'ms': min(timings), 'plan': self.explain(queryset, phase)}
+        return results
+
+    def explain(self, queryset, phase):
+        # Equivalent to QuerySet.explain(), but the SQL text is tagged with
+        # the phase: SQLite reuses a cached EXPLAIN statement's plan even
+        # after an index has been dropped, so identical text would report
+        # the old plan.
+        sql, params = queryset.query.get_compiler(connection=connection).as_sql()
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql} /* {phase} */', params)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+    def drop_indexes(self):
+        # schema_editor() can't be entered inside an atomic block on SQLite,
+        # so run the generated DROP INDEX statements directly
+        editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model, names in BENCHMARKED_INDEXES.items():
+                for index in model._meta.indexes:
+                    if index.name in names:
+                        cursor.execute(str(index.remove_sql(model, editor)))
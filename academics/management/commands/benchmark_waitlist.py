@@ -0,0 +1,195 @@
+import random
+import time
+from collections import defaultdict
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.db.models import Count, F
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from accounts.models import StudentProfile
+from academics.models import AcademicYear, Course, CourseOffering, Enrollment, WaitlistEntry
+from academics.waitlist import promote_waitlisted, request_promotion, wait_for_promotions
+
+MODES = ('per-drop', 'batched', 'worker')
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database, fill every current course offering and '
+        'give it a waitlist, then run rounds of drop/add churn. Compares promoting '
+        'after every drop with batched promotion and with the background worker, '
+        'and checks that no seat is oversold or promoted twice.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=600)
+        parser.add_argument('--departments', type=int, default=3)
+        parser.add_argument('--waitlist', type=int, default=20, help='Initial waitlist length per offering')
+        parser.add_argument('--rounds', type=int, default=5)
+        parser.add_argument('--drops', type=int, default=5, help='Drops per offering per round')
+        parser.add_argument('--joins', type=int, default=3, help='New waitlist entries per offering per round')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.stdout.write('Seeding benchmark dataset...')
+            call_command(
+                'seed_data', students=options['students'], departments=options['departments'],
+                years=1, class_days=1, seed=options['seed'], prefix='WAIT', no_timetable=True,
+                stdout=StringIO()
+            )
+            # Seeded students already carry a full term; the benchmark is about seats
+            with override_settings(REGISTRATION_MAX_CREDITS=10 ** 6):
+                results, checks = self.run_benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n{'mode':<10} {'offerings':>9} {'drops':>6} {'promoted':>8} {'runs':>5} "
+            f"{'seconds':>8} {'promoted/s':>10} {'queries':>8} {'q/promotion':>11}"
+        ))
+        for mode in MODES:
+            row = results[mode]
+            # The worker's queries run on its own connection and are not captured
+            queries, per_promotion = '-', '-'
+            if row['queries'] is not None:
+                queries = row['queries']
+                per_promotion = f"{row['queries'] / max(row['promoted'], 1):.2f}"
+            self.stdout.write(
+                f"{mode:<10} {row['offerings']:>9} {row['drops']:>6} {row['promoted']:>8} {row['runs']:>5} "
+                f"{row['seconds']:>8.3f} {row['promoted'] / max(row['seconds'], 1e-9):>10.0f} "
+                f"{queries:>8} {per_promotion:>11}"
+            )
+
+        self.stdout.write('')
+        for label, ok in checks:
+            self.stdout.write(f"  {'ok ' if ok else 'FAIL'} {label}")
+        if not all(ok for label, ok in checks):
+            raise CommandError('Waitlist consistency checks failed')
+        self.stdout.write(self.style.SUCCESS('\n✅ Waitlist benchmark finished'))
+
+    def run_benchmark(self, options):
+        rng = random.Random(options['seed'])
+        academic_year = AcademicYear.objects.get(is_current=True)
+        offerings = CourseOffering.objects.filter(academic_year=academic_year)
+        # Every offering starts full
+        offerings.update(capacity=F('seats_taken'))
+        offering_ids = list(offerings.filter(seats_taken__gt=0).order_by('pk').values_list('pk', flat=True))
+        if len(offering_ids) < len(MODES):
+            raise CommandError('Not enough enrolled course offerings; seed more students')
+        student_ids = list(StudentProfile.objects.values_list('pk', flat=True))
+
+        groups = {mode: offering_ids[index::len(MODES)] for index, mode in enumerate(MODES)}
+        self.join(rng, academic_year, offering_ids, student_ids, options['waitlist'])
+
+        results = {}
+        for mode, group in groups.items():
+            row = {'offerings': len(group), 'drops': 0, 'promoted': 0, 'runs': 0, 'seconds': 0.0, 'queries': 0}
+            for _ in range(options['rounds']):
+                dropped = self.drop(rng, academic_year, group, options['drops'])
+                row['drops'] += len(dropped)
+                promoted, runs, seconds, queries = self.promote(mode, dropped)
+                row['promoted'] += promoted
+                row['runs'] += runs
+                row['seconds'] += seconds
+                row['queries'] = None if queries is None else row['queries'] + queries
+                self.join(rng, academic_year, group, student_ids, options['joins'])
+            results[mode] = row
+        return results, self.verify(academic_year)
+
+    def join(self, rng, academic_year, offering_ids, student_ids, count):
+        """Add up to `count` waiting students to each offering's queue"""
+        taken = defaultdict(set)
+        for offering_id, student_id in WaitlistEntry.objects.filter(
+            offering_id__in=offering_ids, status='waiting'
+        ).values_list('offering_id', 'student_id'):
+            taken[offering_id].add(student_id)
+        course_ids = dict(CourseOffering.objects.filter(pk__in=offering_ids).values_list('pk', 'course_id'))
+        for course_id, student_id in Enrollment.objects.filter(
+            academic_year=academic_year, course_id__in=course_ids.values()
+        ).values_list('course_id', 'student_id'):
+            taken[course_id, 'enrolled'].add(student_id)
+
+        entries = []
+        for offering_id in offering_ids:
+            excluded = taken[offering_id] | taken[course_ids[offering_id], 'enrolled']
+            candidates = [pk for pk in rng.sample(student_ids, min(len(student_ids), count * 4)) if pk not in excluded]
+            entries.extend(
+                WaitlistEntry(offering_id=offering_id, student_id=student_id, priority=rng.choice((0, 0, 0, 1)))
+                for student_id in candidates[:count]
+            )
+        WaitlistEntry.objects.bulk_create(entries)
+
+    def drop(self, rng, academic_year, offering_ids, count):
+        """Deactivate up to `count` enrollments per offering; returns the offering id of every drop"""
+        offerings = dict(CourseOffering.objects.filter(pk__in=offering_ids).values_list('course_id', 'pk'))
+        active = defaultdict(list)
+        for pk, course_id in Enrollment.objects.filter(
+            academic_year=academic_year, course_id__in=offerings, is_active=True
+        ).values_list('pk', 'course_id'):
+            active[course_id].append(pk)
+        chosen = {}
+        for course_id, pks in active.items():
+            for pk in rng.sample(pks, min(count, len(pks))):
+                chosen[pk] = course_id
+        # A bulk drop, as an admin closing sections would: the counters are
+        # adjusted here and promotion is left to the mode being measured
+        Enrollment.objects.filter(pk__in=chosen).update(is_active=False)
+        per_course = defaultdict(int)
+        for course_id in chosen.values():
+            per_course[course_id] += 1
+        for course_id, total in per_course.items():
+            CourseOffering.objects.filter(pk=offerings[course_id]).update(seats_taken=F('seats_taken') - total)
+            Course.objects.filter(pk=course_id).update(active_enrollment_count=F('active_enrollment_count') - total)
+        return [offerings[course_id] for course_id in chosen.values()]
+
+    def promote(self, mode, dropped):
+        """(promoted, promotion runs, seconds, queries or None) for one round"""
+        started = time.perf_counter()
+        if mode == 'worker':
+            before = WaitlistEntry.objects.filter(status='promoted').count()
+            with transaction.atomic():
+                for offering_id in dropped:
+                    request_promotion([offering_id])
+            wait_for_promotions()
+            seconds = time.perf_counter() - started
+            promoted = WaitlistEntry.objects.filter(status='promoted').count() - before
+            return promoted, 1, seconds, None
+
+        # The query log is capped; start empty so the capture is not truncated
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            if mode == 'per-drop':
+                reports = [promote_waitlisted([offering_id]) for offering_id in dropped]
+            else:
+                reports = [promote_waitlisted(dropped)]
+        seconds = time.perf_counter() - started
+        return sum(report['promoted'] for report in reports), len(reports), seconds, len(queries)
+
+    def verify(self, academic_year):
+        offerings = CourseOffering.objects.filter(academic_year=academic_year)
+        active = dict(Enrollment.objects.filter(
+            academic_year=academic_year, is_active=True
+        ).values_list('course_id').annotate(total=Count('pk')).values_list('course_id', 'total'))
+        counts_match = all(
+            seats_taken == active.get(course_id, 0)
+            for course_id, seats_taken in offerings.values_list('course_id', 'seats_taken')
+        )
+        within_capacity = not offerings.filter(capacity__isnull=False, seats_taken__gt=F('capacity')).exists()
+        # Churn may drop a promoted student again, but never without an enrollment
+        promoted_enrolled = not WaitlistEntry.objects.filter(status='promoted').exclude(
+            student__enrollments__course=F('offering__course'),
+            student__enrollments__academic_year=F('offering__academic_year'),
+        ).exists()
+        rerun = promote_waitlisted()
+        return [
+            ('seats_taken matches active enrollments', counts_match),
+            ('no offering over capacity', within_capacity),
+            ('every promoted student is enrolled', promoted_enrolled),
+            (f"a second sweep promotes nothing (promoted {rerun['promoted']})", rerun['promoted'] == 0),
+        ]
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from academics.exports import EXPORT_BATCH_SIZE, FORMATS, ExportError, create_export, get_export_dir, run_export
+from academics.models import AcademicYear
+
+
+class Command(BaseCommand):
+    help = (
+        'Export courses, students, enrollments and attendance to columnar files, '
+        'writing only rows changed since the last export unless --full is given'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--year', help='Academic year (e.g. 2024-2025); defaults to all years')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to ANALYTICS_EXPORT_FORMAT')
+        parser.add_argument('--full', action='store_true', help='Ignore the last export watermark')
+        parser.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE)
+    
+    def handle(self, *args, **options):
+        academic_year = None
+        if options['year']:
+            academic_year = AcademicYear.objects.filter(year=options['year']).first()
+            if academic_year is None:
+                raise CommandError(f"Academic year {options['year']} does not exist")
+        
+        try:
+            job = create_export(academic_year=academic_year, fmt=options['format'], full=options['full'])
+        except ExportError as exc:
+            raise CommandError(str(exc))
+        
+        since = job.since.isoformat() if job.since else 'the beginning'
+        self.stdout.write(f'Export {job.pk}: rows changed since {since} as {job.format}')
+        run_export(job, batch_size=options['batch_size'])
+        
+        directory = get_export_dir() / str(job.pk)
+        for dataset, entry in job.files.items():
+            self.stdout.write(f"{dataset}: {entry['rows']} rows, {entry['bytes']} bytes ({directory / entry['file']})")
+        self.stdout.write(self.style.SUCCESS('✅ Successfully exported analytics data'))
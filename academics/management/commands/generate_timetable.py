@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from academics.models import AcademicYear
+from academics.timetable import TimetableError, generate_timetable
+
+
+class Command(BaseCommand):
+    help = 'Place the class sessions of one term in rooms and time slots without clashes'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--year', help='Academic year (e.g. 2024-2025); defaults to the current year')
+        parser.add_argument(
+            '--term', type=int, choices=[1, 2], required=True,
+            help='1 for odd semesters, 2 for even semesters'
+        )
+        parser.add_argument(
+            '--replace', action='store_true',
+            help='Delete the term\'s existing sessions and schedule it from scratch'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report what would be placed without saving'
+        )
+    
+    def handle(self, *args, **options):
+        if options['year']:
+            academic_year = AcademicYear.objects.filter(year=options['year']).first()
+            if academic_year is None:
+                raise CommandError(f"Academic year {options['year']} does not exist")
+        else:
+            academic_year = AcademicYear.objects.filter(is_current=True).first()
+            if academic_year is None:
+                raise CommandError('No current academic year; pass --year')
+        
+        try:
+            report = generate_timetable(
+                academic_year, options['term'], replace=options['replace'], dry_run=options['dry_run']
+            )
+        except TimetableError as exc:
+            raise CommandError(str(exc))
+        
+        self.stdout.write(
+            f"{report['academic_year']} term {report['term']}: {report['placed']} of "
+            f"{report['requested']} sessions placed for {report['courses']} courses "
+            f"({report['kept']} kept) in {report['seconds']}s"
+        )
+        for row in report['unplaced']:
+            self.stdout.write(
+                self.style.WARNING(f"  {row['course']} {row['session_type']}: blocked by {row['reason']}")
+            )
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('✅ Dry run complete, nothing saved'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Successfully generated timetable'))
@@ -0,0 +1,53 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from academics.grade_import import CHUNK_SIZE, GradeImport, GradeImportError, iter_rows
+from academics.models import AcademicYear, Course
+
+
+class Command(BaseCommand):
+    help = (
+        'Import grades from a CSV or XLSX file with columns student_id, grade and '
+        'optionally grade_points and course_code. All rows are applied or none are.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file')
+        parser.add_argument('--year', required=True, help='Academic year (e.g. 2024-2025)')
+        parser.add_argument('--course', help='Course code for rows without a course_code column')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Validate without saving')
+    
+    def handle(self, *args, **options):
+        academic_year = AcademicYear.objects.filter(year=options['year']).first()
+        if academic_year is None:
+            raise CommandError(f"Academic year {options['year']} does not exist")
+        
+        course = None
+        if options['course']:
+            course = Course.objects.filter(code=options['course']).first()
+            if course is None:
+                raise CommandError(f"Course {options['course']} does not exist")
+        
+        started = time.perf_counter()
+        grade_import = GradeImport(academic_year, course=course, chunk_size=options['chunk_size'])
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                report = grade_import.run(iter_rows(fileobj, options['path']), dry_run=options['dry_run'])
+        except (OSError, GradeImportError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+        
+        for error in report['errors']:
+            self.stdout.write(self.style.ERROR(
+                f"row {error['row']}: {error['student_id']} {error['course_code']}: {error['error']}"
+            ))
+        self.stdout.write(
+            f"{report['processed']} rows, {report['valid']} valid, "
+            f"{len(report['errors'])} errors in {elapsed:.2f}s"
+        )
+        if report['errors']:
+            raise CommandError('Import rolled back; fix the rows above and retry')
+        if report['dry_run']:
+            self.stdout.write(self.style.SUCCESS('✅ Dry run passed; nothing was saved'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ Imported {report['updated']} grades"))
@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from accounts.models import StudentProfile, FacultyProfile
-from academics.models import Department, AcademicYear, Course, Enrollment, CourseAssignment
+from academics.models import Department, AcademicYear, Course, CourseOffering, Enrollment, CourseAssignment
 from datetime import date
 
 User = get_user_model()
@@ -112,6 +112,14 @@ class Command(BaseCommand):
             }
         )
         
+        # Open both courses for registration this year
+        for course in (course1, course2):
+            CourseOffering.objects.get_or_create(
+                course=course,
+                academic_year=current_year,
+                defaults={'capacity': 60}
+            )
+        
         # Create Course Assignment
         assignment, created = CourseAssignment.objects.get_or_create(
             faculty=faculty_profile,
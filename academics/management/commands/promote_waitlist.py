@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from academics.waitlist import PROMOTION_BATCH_SIZE, promote_waitlisted
+
+
+class Command(BaseCommand):
+    help = 'Fill free seats from every course waitlist (catches up on promotions lost to a restart)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--offering', type=int, action='append', dest='offerings',
+            help='Only this course offering id (repeatable)'
+        )
+        parser.add_argument('--batch-size', type=int, default=PROMOTION_BATCH_SIZE)
+    
+    def handle(self, *args, **options):
+        report = promote_waitlisted(options['offerings'], batch_size=options['batch_size'])
+        if report['requeued']:
+            self.stdout.write(self.style.WARNING(
+                f"Offerings {', '.join(map(str, report['requeued']))} kept changing under this run; run it again"
+            ))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Promoted {report['promoted']} students from {report['offerings']} waitlists "
+                f"({report['removed']} entries removed, {report['batches']} batches)"
+            )
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from academics.models import AcademicYear
+from academics.rollups import rebuild_attendance_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild attendance percentage rollups from the Attendance table'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--year',
+            help='Academic year to rebuild (e.g. 2024-2025); defaults to all years'
+        )
+    
+    def handle(self, *args, **options):
+        years = AcademicYear.objects.all()
+        if options['year']:
+            years = years.filter(year=options['year'])
+            if not years.exists():
+                raise CommandError(f"Academic year {options['year']} does not exist")
+        
+        for academic_year in years:
+            if academic_year.attendance_archived:
+                # Archived summaries are kept as they were; the live table is empty
+                self.stdout.write(f'{academic_year}: archived, skipped')
+                continue
+            rows = rebuild_attendance_summaries(academic_year)
+            self.stdout.write(f'{academic_year}: {rows} summaries')
+        
+        self.stdout.write(
+            self.style.SUCCESS('✅ Successfully rebuilt attendance summaries')
+        )
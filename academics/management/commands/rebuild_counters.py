@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from academics.counters import refresh_department_counts, refresh_course_counts, refresh_offering_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized active course/enrollment and seat counters'
+    
+    def handle(self, *args, **options):
+        departments = refresh_department_counts()
+        courses = refresh_course_counts()
+        offerings = refresh_offering_counts()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Refreshed counters for {departments} departments, {courses} courses '
+                f'and {offerings} offerings'
+            )
+        )
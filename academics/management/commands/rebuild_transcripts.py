@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from academics.models import AcademicYear
+from academics.transcripts import rebuild_transcripts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild semester GPA / CGPA transcript snapshots from enrollment grades'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--year',
+            help='Rebuild students graded in this academic year (e.g. 2024-2025); defaults to everyone'
+        )
+    
+    def handle(self, *args, **options):
+        academic_year = None
+        if options['year']:
+            academic_year = AcademicYear.objects.filter(year=options['year']).first()
+            if academic_year is None:
+                raise CommandError(f"Academic year {options['year']} does not exist")
+        
+        rows = rebuild_transcripts(academic_year)
+        self.stdout.write(f'{rows} transcript snapshots')
+        self.stdout.write(
+            self.style.SUCCESS('✅ Successfully rebuilt transcripts')
+        )
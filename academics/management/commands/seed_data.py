@@ -0,0 +1,395 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from accounts.models import StudentProfile, FacultyProfile
+from academics.cache import bump_version
+from academics.models import (
+    Department, AcademicYear, Course, CourseOffering, Enrollment, CourseAssignment, Attendance,
+    Room, TimeSlot, ClassSession
+)
+from academics.timetable import generate_timetable
+
+User = get_user_model()
+
+FIRST_NAMES = [
+    'Aarav', 'Diya', 'Ishaan', 'Ananya', 'Kabir', 'Meera', 'Rohan', 'Saanvi',
+    'Vihaan', 'Aditi', 'Arjun', 'Kavya', 'Reyansh', 'Myra', 'Dev', 'Nisha',
+]
+LAST_NAMES = [
+    'Sharma', 'Verma', 'Iyer', 'Patel', 'Reddy', 'Nair', 'Gupta', 'Singh',
+    'Das', 'Menon', 'Joshi', 'Khan', 'Rao', 'Bose', 'Kulkarni', 'Mehta',
+]
+GRADE_DISTRIBUTION = [
+    (grade, points) for grade, points in Enrollment.GRADE_POINTS.items() if points is not None
+]
+SEMESTERS_PER_PROGRAM = 8
+
+
+def _class_days(start, count):
+    """The first `count` weekdays on or after `start`"""
+    days = []
+    day = start
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def generate_attendance(task):
+    """
+    Build attendance rows for one department and academic year.
+
+    Runs in worker processes, so it only uses plain data: the task carries
+    the enrollments and the random state is derived from the seed, the
+    department and the year, which keeps the output identical no matter how
+    many workers are used. Returns (student_id, course_id, date, is_present)
+    tuples.
+    """
+    seed, department_index, year_index, year_start, enrollments, options = task
+    rng = random.Random(f'{seed}:{department_index}:{year_index}')
+    semester_days = {
+        1: _class_days(year_start + timedelta(days=14), options['class_days']),
+        0: _class_days(year_start + timedelta(days=190), options['class_days']),
+    }
+
+    sessions = {}
+    rows = []
+    for student_id, course_id, semester, present_rate in enrollments:
+        if course_id not in sessions:
+            sessions[course_id] = [
+                day for day in semester_days[semester % 2]
+                if rng.random() < options['density']
+            ]
+        for day in sessions[course_id]:
+            rows.append((student_id, course_id, day, rng.random() < present_rate))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Generate a large deterministic dataset for capacity testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=10)
+        parser.add_argument('--courses-per-semester', type=int, default=5)
+        parser.add_argument('--students', type=int, default=5000)
+        parser.add_argument('--years', type=int, default=1, help='Academic years of history, ending with the current one')
+        parser.add_argument('--first-year', type=int, default=2024, help='Start year of the current academic year')
+        parser.add_argument('--class-days', type=int, default=60, help='Class days per semester')
+        parser.add_argument('--density', type=float, default=0.7, help='Fraction of class days each course meets')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=0, help='Processes generating attendance (0 = in-process)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='SEED', help='Prefix for generated codes and usernames')
+        parser.add_argument('--password', default='password123')
+        parser.add_argument('--with-demo', action='store_true', help='Also load the demo data (load_sample_data)')
+        parser.add_argument('--course-capacity', type=int, default=None, help='Seats per course offering (default unlimited)')
+        parser.add_argument('--no-timetable', action='store_true', help='Skip rooms, time slots and the timetable')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if Department.objects.filter(code__startswith=prefix).exists():
+            raise CommandError(f'Data with prefix {prefix} already exists; use a different --prefix')
+        if not 0 < options['density'] <= 1:
+            raise CommandError('--density must be in (0, 1]')
+
+        started = time.perf_counter()
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        with transaction.atomic():
+            years = self.create_years(options)
+            departments, courses_by_department = self.create_catalog(options, years)
+            students = self.create_students(options, departments)
+            tasks = self.create_enrollments(options, years, courses_by_department, students)
+        self.log(started, f'{sum(len(task[4]) for task in tasks)} enrollments')
+
+        total = self.create_attendance(options, tasks)
+        self.log(started, f'{total} attendance rows')
+
+        # bulk_create bypassed the signals that maintain these
+        call_command('rebuild_counters', stdout=self.stdout)
+        call_command('rebuild_attendance_summary', stdout=self.stdout)
+        call_command('rebuild_transcripts', stdout=self.stdout)
+        bump_version(
+            'academics.Department', 'academics.AcademicYear', 'academics.Course',
+            'academics.Enrollment', 'academics.CourseAssignment', 'academics.Attendance',
+            'accounts.FacultyProfile', 'accounts.User'
+        )
+
+        if not options['no_timetable']:
+            self.create_timetable(options, years[-1], courses_by_department, started)
+
+        if options['with_demo']:
+            call_command('load_sample_data', stdout=self.stdout)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Seeded dataset in {time.perf_counter() - started:.1f}s')
+        )
+
+    def log(self, started, message):
+        self.stdout.write(f'[{time.perf_counter() - started:7.1f}s] {message}')
+
+    def create_years(self, options):
+        first = options['first_year'] - options['years'] + 1
+        years = []
+        for start_year in range(first, options['first_year'] + 1):
+            year, created = AcademicYear.objects.get_or_create(
+                year=f'{start_year}-{start_year + 1}',
+                defaults={
+                    'start_date': date(start_year, 7, 1),
+                    'end_date': date(start_year + 1, 6, 30),
+                }
+            )
+            years.append(year)
+        AcademicYear.objects.filter(is_current=True).exclude(pk=years[-1].pk).update(is_current=False)
+        AcademicYear.objects.filter(pk=years[-1].pk).update(is_current=True)
+        return years
+
+    def create_catalog(self, options, years):
+        prefix = options['prefix']
+        password = make_password(options['password'])
+        departments = Department.objects.bulk_create([
+            Department(
+                name=f'{prefix} Department {i + 1}',
+                code=f'{prefix}{i + 1:03d}',
+                description=f'Generated department {i + 1}'
+            )
+            for i in range(options['departments'])
+        ])
+
+        course_types = [choice for choice, label in Course.COURSE_TYPE_CHOICES]
+        courses = Course.objects.bulk_create([
+            Course(
+                name=f'{department.code} Course {semester}.{j + 1}',
+                code=f'{department.code}-{semester}{j + 1:02d}',
+                credits=self.rng.choice([2, 3, 3, 4]),
+                department=department,
+                semester=semester,
+                course_type=course_types[j % len(course_types)],
+                theory_hours=3,
+                practical_hours=2 if j % len(course_types) == 2 else 0
+            )
+            for department in departments
+            for semester in range(1, SEMESTERS_PER_PROGRAM + 1)
+            for j in range(options['courses_per_semester'])
+        ], batch_size=self.batch_size)
+        courses_by_department = {department.pk: [] for department in departments}
+        for course in courses:
+            courses_by_department[course.department_id].append(course)
+
+        # One faculty member per four courses, assigned round-robin
+        faculty_users = []
+        faculty_courses = []
+        for department in departments:
+            department_courses = courses_by_department[department.pk]
+            for i in range(max(1, len(department_courses) // 4)):
+                faculty_users.append(User(
+                    username=f'{prefix.lower()}_faculty_{department.code.lower()}_{i + 1}',
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    user_type='faculty',
+                    password=password
+                ))
+                faculty_courses.append((department, department_courses[i::max(1, len(department_courses) // 4)]))
+        faculty_users = User.objects.bulk_create(faculty_users, batch_size=self.batch_size)
+        faculty = FacultyProfile.objects.bulk_create([
+            FacultyProfile(
+                user=user,
+                employee_id=f'{prefix}F{i + 1:05d}',
+                department=department.name,
+                designation=self.rng.choice(['Professor', 'Associate Professor', 'Assistant Professor']),
+                joining_date=date(2010, 1, 1) + timedelta(days=self.rng.randrange(4000))
+            )
+            for i, (user, (department, _)) in enumerate(zip(faculty_users, faculty_courses))
+        ], batch_size=self.batch_size)
+
+        CourseAssignment.objects.bulk_create([
+            CourseAssignment(
+                faculty=profile, course=course, academic_year=year,
+                is_course_coordinator=True
+            )
+            for profile, (department, assigned) in zip(faculty, faculty_courses)
+            for course in assigned
+            for year in years
+        ], batch_size=self.batch_size)
+
+        # Every course is offered every year; seats are counted by rebuild_counters
+        CourseOffering.objects.bulk_create([
+            CourseOffering(course=course, academic_year=year, capacity=options['course_capacity'])
+            for course in courses
+            for year in years
+        ], batch_size=self.batch_size)
+
+        heads = {}
+        for profile, (department, _) in zip(faculty, faculty_courses):
+            heads.setdefault(department, profile)
+        for department, profile in heads.items():
+            department.head_of_department = profile
+        Department.objects.bulk_update(list(heads), ['head_of_department'])
+        return departments, courses_by_department
+
+    def create_students(self, options, departments):
+        """Students spread over departments and over four admission cohorts per year"""
+        prefix = options['prefix']
+        password = make_password(options['password'])
+        current_start = options['first_year']
+        cohorts = list(range(current_start - options['years'] - 2, current_start + 1))
+
+        students = []
+        for offset in range(0, options['students'], self.batch_size):
+            count = min(self.batch_size, options['students'] - offset)
+            users = User.objects.bulk_create([
+                User(
+                    username=f'{prefix.lower()}_student_{offset + i + 1}',
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    user_type='student',
+                    password=password
+                )
+                for i in range(count)
+            ])
+            profiles = []
+            for i, user in enumerate(users):
+                number = offset + i
+                admitted = cohorts[number // len(departments) % len(cohorts)]
+                profiles.append(StudentProfile(
+                    user=user,
+                    student_id=f'{prefix}{number + 1:07d}',
+                    enrollment_date=date(admitted, 7, 1),
+                    current_semester=min(2 * (current_start - admitted) + 1, SEMESTERS_PER_PROGRAM),
+                    program=departments[number % len(departments)].name,
+                    is_active=current_start - admitted < SEMESTERS_PER_PROGRAM // 2
+                ))
+            profiles = StudentProfile.objects.bulk_create(profiles)
+            for i, profile in enumerate(profiles):
+                number = offset + i
+                students.append((
+                    profile.pk,
+                    departments[number % len(departments)].pk,
+                    cohorts[number // len(departments) % len(cohorts)],
+                    0.6 + 0.4 * self.rng.random()
+                ))
+        return students
+
+    def create_enrollments(self, options, years, courses_by_department, students):
+        """Enroll every student in their department's courses for each year of study"""
+        department_index = {pk: i for i, pk in enumerate(courses_by_department)}
+        tasks = {}
+        batch = []
+        for year_index, year in enumerate(years):
+            closed = year_index < len(years) - 1
+            for student_id, department_id, admitted, present_rate in students:
+                study_year = year.start_date.year - admitted
+                if not 0 <= study_year < SEMESTERS_PER_PROGRAM // 2:
+                    continue
+                semesters = (2 * study_year + 1, 2 * study_year + 2)
+                for course in courses_by_department[department_id]:
+                    if course.semester not in semesters:
+                        continue
+                    grade, points = ('', None)
+                    if closed:
+                        grade, points = self.rng.choice(GRADE_DISTRIBUTION)
+                    batch.append(Enrollment(
+                        student_id=student_id, course=course, academic_year=year,
+                        grade=grade, grade_points=points
+                    ))
+                    key = (department_index[department_id], year_index)
+                    tasks.setdefault(key, []).append(
+                        (student_id, course.pk, course.semester, present_rate)
+                    )
+                if len(batch) >= self.batch_size:
+                    Enrollment.objects.bulk_create(batch)
+                    batch = []
+        Enrollment.objects.bulk_create(batch)
+
+        generator_options = {'class_days': options['class_days'], 'density': options['density']}
+        return [
+            (options['seed'], department, year_index, years[year_index].start_date, rows, generator_options)
+            for (department, year_index), rows in sorted(tasks.items())
+        ]
+
+    def create_timetable(self, options, year, courses_by_department, started):
+        """Rooms for the generated courses, Mon-Fri hourly slots, and the current year's timetable"""
+        prefix = options['prefix']
+        slots = [
+            TimeSlot.objects.get_or_create(
+                day_of_week=day, start_time=f'{hour:02d}:00', end_time=f'{hour + 1:02d}:00'
+            )[0]
+            for day in range(5)
+            for hour in range(9, 17)
+        ]
+        courses = [course for department_courses in courses_by_department.values() for course in department_courses]
+        largest = Enrollment.objects.filter(
+            academic_year=year, course__in=courses
+        ).values('course').annotate(size=Count('id')).aggregate(largest=Max('size'))['largest'] or 60
+
+        # Enough rooms for the busier term with a quarter to spare
+        rooms = []
+        for room_type, field in (('lecture', 'theory_hours'), ('lab', 'practical_hours')):
+            hours = max(
+                sum(getattr(course, field) for course in courses if course.semester % 2 == parity)
+                for parity in (0, 1)
+            )
+            count = math.ceil(hours * 1.25 / len(slots))
+            rooms.extend(
+                Room(code=f'{prefix}-{room_type.upper()}-{i + 1:02d}', room_type=room_type, capacity=largest)
+                for i in range(count)
+            )
+        Room.objects.bulk_create(rooms, batch_size=self.batch_size)
+
+        for term, _ in ClassSession.TERM_CHOICES:
+            report = generate_timetable(year, term)
+            self.log(
+                started,
+                f"term {term}: {report['placed']} of {report['requested']} class sessions placed"
+            )
+
+    def create_attendance(self, options, tasks):
+        if options['workers'] > 0:
+            # Worker processes must not inherit open database connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+                return self.insert_attendance(executor.map(generate_attendance, tasks))
+        return self.insert_attendance(map(generate_attendance, tasks))
+
+    def insert_attendance(self, results):
+        """
+        Insert generated rows with a prepared executemany().
+
+        Building millions of model instances for bulk_create() dominates the
+        run time, so rows go straight to the driver using the backend's own
+        value adaptation.
+        """
+        connection = connections[Attendance.objects.db]
+        ops = connection.ops
+        columns = ['student_id', 'course_id', 'date', 'is_present', 'remarks', 'marked_at', 'updated_at']
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            ops.quote_name(Attendance._meta.db_table),
+            ', '.join(ops.quote_name(column) for column in columns),
+            ', '.join(['%s'] * len(columns))
+        )
+        now = ops.adapt_datetimefield_value(timezone.now())
+        adapted_days = {}
+
+        total = 0
+        for rows in results:
+            for offset in range(0, len(rows), self.batch_size):
+                params = []
+                for student_id, course_id, day, present in rows[offset:offset + self.batch_size]:
+                    if day not in adapted_days:
+                        adapted_days[day] = ops.adapt_datefield_value(day)
+                    params.append((student_id, course_id, adapted_days[day], present, '', now, now))
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.executemany(sql, params)
+            total += len(rows)
+        return total
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:14
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Department = apps.get_model('academics', 'Department')
+    Course = apps.get_model('academics', 'Course')
+    Enrollment = apps.get_model('academics', 'Enrollment')
+
+    active_courses = (
+        Course.objects.filter(department=OuterRef('pk'), is_active=True)
+        .order_by().values('department').annotate(total=Count('pk')).values('total')
+    )
+    Department.objects.update(active_course_count=Coalesce(Subquery(active_courses), 0))
+
+    active_enrollments = (
+        Enrollment.objects.filter(course=OuterRef('pk'), is_active=True)
+        .order_by().values('course').annotate(total=Count('pk')).values('total')
+    )
+    Course.objects.update(active_enrollment_count=Coalesce(Subquery(active_enrollments), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='active_enrollment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='active_course_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0005_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['course', 'date', 'id'], name='attendance_course_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'date', 'id'], name='attendance_student_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancesummary',
+            index=models.Index(fields=['course', 'academic_year'], name='summary_course_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['department', 'semester'], name='course_active_dept_sem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courseassignment',
+            index=models.Index(fields=['faculty', 'academic_year'], name='assignment_faculty_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['course', 'academic_year'], name='enrollment_active_course_idx'),
+        ),
+    ]
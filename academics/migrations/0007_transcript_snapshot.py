@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('academics', '0006_access_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semester', models.PositiveIntegerField()),
+                ('credits', models.PositiveIntegerField(default=0)),
+                ('quality_points', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('gpa', models.DecimalField(blank=True, decimal_places=2, max_digits=4, null=True)),
+                ('cumulative_credits', models.PositiveIntegerField(default=0)),
+                ('cumulative_quality_points', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('cgpa', models.DecimalField(blank=True, decimal_places=2, max_digits=4, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academics.academicyear')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transcript_snapshots', to='accounts.studentprofile')),
+            ],
+            options={
+                'verbose_name': 'Transcript Snapshot',
+                'verbose_name_plural': 'Transcript Snapshots',
+                'ordering': ['student', 'academic_year__start_date', 'semester'],
+                'unique_together': {('student', 'academic_year', 'semester')},
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0007_transcript_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='academicyear',
+            name='attendance_archived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='AttendanceArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('jsonl.gz', 'Gzipped JSON Lines'), ('parquet', 'Parquet')], max_length=10)),
+                ('row_count', models.PositiveIntegerField()),
+                ('present_count', models.PositiveIntegerField()),
+                ('min_id', models.PositiveBigIntegerField()),
+                ('max_id', models.PositiveBigIntegerField()),
+                ('payload', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_archives', to='academics.academicyear')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_archives', to='academics.course')),
+            ],
+            options={
+                'verbose_name': 'Attendance Archive',
+                'verbose_name_plural': 'Attendance Archives',
+                'indexes': [models.Index(fields=['min_id', 'max_id'], name='attendance_archive_ids_idx')],
+                'unique_together': {('academic_year', 'course')},
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0009_analytics_export'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Room',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=20, unique=True)),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('room_type', models.CharField(choices=[('lecture', 'Lecture Hall'), ('lab', 'Laboratory')], default='lecture', max_length=10)),
+                ('capacity', models.PositiveIntegerField()),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Room',
+                'verbose_name_plural': 'Rooms',
+                'ordering': ['code'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TimeSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day_of_week', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+            ],
+            options={
+                'verbose_name': 'Time Slot',
+                'verbose_name_plural': 'Time Slots',
+                'ordering': ['day_of_week', 'start_time'],
+                'unique_together': {('day_of_week', 'start_time', 'end_time')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ClassSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_type', models.CharField(choices=[('theory', 'Theory'), ('practical', 'Practical')], default='theory', max_length=10)),
+                ('term', models.PositiveSmallIntegerField(choices=[(1, 'Odd semesters'), (2, 'Even semesters')])),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='class_sessions', to='academics.academicyear')),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to='academics.courseassignment')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='sessions', to='academics.room')),
+                ('time_slot', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='sessions', to='academics.timeslot')),
+            ],
+            options={
+                'verbose_name': 'Class Session',
+                'verbose_name_plural': 'Class Sessions',
+                'unique_together': {('academic_year', 'term', 'time_slot', 'room')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0010_timetable'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='prerequisites',
+            field=models.ManyToManyField(blank=True, related_name='required_for', to='academics.course'),
+        ),
+        migrations.CreateModel(
+            name='CourseOffering',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('capacity', models.PositiveIntegerField(blank=True, help_text='Leave empty for unlimited seats', null=True)),
+                ('is_open', models.BooleanField(default=True)),
+                ('seats_taken', models.PositiveIntegerField(default=0, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offerings', to='academics.academicyear')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offerings', to='academics.course')),
+            ],
+            options={
+                'verbose_name': 'Course Offering',
+                'verbose_name_plural': 'Course Offerings',
+                'unique_together': {('course', 'academic_year')},
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations
+from django.db.models import Count, Q
+
+
+def backfill_offerings(apps, schema_editor):
+    """
+    0011 added CourseOffering empty, which leaves registration closed for
+    every existing course. Create an offering for every course and year
+    that already has enrollments or a teaching assignment, and for every
+    active course in the current academic year, with unlimited seats and
+    seats_taken counted from the active enrollments. Offerings of past
+    years are created closed.
+    """
+    AcademicYear = apps.get_model('academics', 'AcademicYear')
+    Course = apps.get_model('academics', 'Course')
+    CourseOffering = apps.get_model('academics', 'CourseOffering')
+    Enrollment = apps.get_model('academics', 'Enrollment')
+    CourseAssignment = apps.get_model('academics', 'CourseAssignment')
+
+    seats_taken = {
+        (course_id, year_id): total
+        for course_id, year_id, total in Enrollment.objects.order_by().values(
+            'course_id', 'academic_year_id'
+        ).annotate(total=Count('pk', filter=Q(is_active=True))).values_list(
+            'course_id', 'academic_year_id', 'total'
+        )
+    }
+    pairs = set(seats_taken)
+    pairs.update(CourseAssignment.objects.values_list('course_id', 'academic_year_id').distinct())
+    current = AcademicYear.objects.filter(is_current=True).values_list('pk', flat=True).first()
+    if current is not None:
+        pairs.update(
+            (course_id, current)
+            for course_id in Course.objects.filter(is_active=True).values_list('pk', flat=True)
+        )
+    pairs -= set(CourseOffering.objects.values_list('course_id', 'academic_year_id'))
+
+    CourseOffering.objects.bulk_create([
+        CourseOffering(
+            course_id=course_id, academic_year_id=year_id,
+            is_open=year_id == current, seats_taken=seats_taken.get((course_id, year_id), 0)
+        )
+        for course_id, year_id in sorted(pairs)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0012_waitlist'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_offerings, migrations.RunPython.noop),
+    ]
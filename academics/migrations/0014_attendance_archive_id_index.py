@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0013_backfill_course_offerings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancearchive',
+            name='id_index',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
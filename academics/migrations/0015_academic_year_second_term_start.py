@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0014_attendance_archive_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='academicyear',
+            name='second_term_start',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
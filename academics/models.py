@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from accounts.models import FacultyProfile, StudentProfile
 
@@ -15,6 +16,9 @@ class Department(models.Model):
     )
     established_date = models.DateField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    # Denormalized counter, maintained by academics.counters
+    active_course_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.name} ({self.code})"
@@ -29,6 +33,12 @@ class AcademicYear(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
     is_current = models.BooleanField(default=False)
+    # First day of the even-semester term; until it is set, attendance dates
+    # are not checked against terms (see academics.timetable)
+    second_term_start = models.DateField(null=True, blank=True)
+    # Attendance moved to AttendanceArchive (see academics.archive); read-only
+    attendance_archived = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.year
@@ -55,15 +65,90 @@ class Course(models.Model):
     description = models.TextField(blank=True)
     theory_hours = models.PositiveIntegerField(default=0)
     practical_hours = models.PositiveIntegerField(default=0)
+    prerequisites = models.ManyToManyField('self', symmetrical=False, blank=True, related_name='required_for')
     is_active = models.BooleanField(default=True)
+    # Denormalized counter, maintained by academics.counters
+    active_enrollment_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.code} - {self.name}"
     
     class Meta:
+        indexes = [
+            # CourseViewSet: active courses filtered by department and semester
+            models.Index(
+                fields=['department', 'semester'],
+                condition=models.Q(is_active=True),
+                name='course_active_dept_sem_idx'
+            ),
+        ]
         verbose_name = 'Course'
         verbose_name_plural = 'Courses'
 
+class CourseOffering(models.Model):
+    """A course open for registration in one academic year, with its seat limit"""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='offerings')
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE, related_name='offerings')
+    capacity = models.PositiveIntegerField(null=True, blank=True, help_text='Leave empty for unlimited seats')
+    is_open = models.BooleanField(default=True)
+    # Denormalized seat counter: reserved by academics.registration with
+    # conditional UPDATEs, recomputed by academics.counters
+    seats_taken = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    @property
+    def seats_left(self):
+        return None if self.capacity is None else max(0, self.capacity - self.seats_taken)
+    
+    def __str__(self):
+        return f"{self.course.code} ({self.academic_year})"
+    
+    class Meta:
+        unique_together = ['course', 'academic_year']
+        verbose_name = 'Course Offering'
+        verbose_name_plural = 'Course Offerings'
+
+class WaitlistEntry(models.Model):
+    """A student queued for a seat in a full course offering"""
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('promoted', 'Promoted'),
+        ('removed', 'Removed'),
+    ]
+    
+    offering = models.ForeignKey(CourseOffering, on_delete=models.CASCADE, related_name='waitlist')
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='waitlist_entries')
+    # Higher priorities are served first; entries of equal priority in arrival order
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='waiting')
+    reason = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.student} waiting for {self.offering}"
+    
+    class Meta:
+        ordering = ['-priority', 'id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['offering', 'student'],
+                condition=models.Q(status='waiting'),
+                name='waitlist_one_waiting_entry'
+            ),
+        ]
+        indexes = [
+            # Head of each offering's queue (academics.waitlist)
+            models.Index(
+                fields=['offering', '-priority', 'id'],
+                condition=models.Q(status='waiting'),
+                name='waitlist_queue_idx'
+            ),
+        ]
+        verbose_name = 'Waitlist Entry'
+        verbose_name_plural = 'Waitlist Entries'
+
 class Enrollment(models.Model):
     """Student course enrollments"""
     GRADE_CHOICES = [
@@ -71,6 +156,11 @@ class Enrollment(models.Model):
         ('C+', 'C+'), ('C', 'C'), ('D', 'D'), ('F', 'F'),
         ('I', 'Incomplete'), ('W', 'Withdrawn'),
     ]
+    # Default grade points on a 10-point scale; I and W carry none
+    GRADE_POINTS = {
+        'A+': 10, 'A': 9, 'B+': 8, 'B': 7, 'C+': 6, 'C': 5, 'D': 4, 'F': 0,
+        'I': None, 'W': None,
+    }
     
     student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='enrollments')
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollments')
@@ -79,12 +169,24 @@ class Enrollment(models.Model):
     grade = models.CharField(max_length=2, choices=GRADE_CHOICES, blank=True)
     grade_points = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.student} enrolled in {self.course}"
     
     class Meta:
         unique_together = ['student', 'course', 'academic_year']
+        indexes = [
+            # Supports EnrollmentCursorPagination
+            models.Index(fields=['enrollment_date', 'id'], name='enrollment_date_id_idx'),
+            # Faculty scope (course__in) and active-enrollment counts per course;
+            # student lookups are covered by the unique_together index
+            models.Index(
+                fields=['course', 'academic_year'],
+                condition=models.Q(is_active=True),
+                name='enrollment_active_course_idx'
+            ),
+        ]
         verbose_name = 'Enrollment'
         verbose_name_plural = 'Enrollments'
 
@@ -95,12 +197,17 @@ class CourseAssignment(models.Model):
     academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE)
     is_course_coordinator = models.BooleanField(default=False)
     assigned_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.faculty} teaches {self.course} ({self.academic_year})"
     
     class Meta:
         unique_together = ['faculty', 'course', 'academic_year']
+        indexes = [
+            # Faculty course scope for one academic year
+            models.Index(fields=['faculty', 'academic_year'], name='assignment_faculty_year_idx'),
+        ]
         verbose_name = 'Course Assignment'
         verbose_name_plural = 'Course Assignments'
 
@@ -113,6 +220,7 @@ class Attendance(models.Model):
     remarks = models.CharField(max_length=200, blank=True)
     marked_by = models.ForeignKey(FacultyProfile, on_delete=models.SET_NULL, null=True, blank=True)
     marked_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         status = "Present" if self.is_present else "Absent"
@@ -120,5 +228,205 @@ class Attendance(models.Model):
     
     class Meta:
         unique_together = ['student', 'course', 'date']
+        indexes = [
+            # Supports AttendanceCursorPagination
+            models.Index(fields=['date', 'id'], name='attendance_date_id_idx'),
+            # Faculty feed: course__in ordered by -date
+            models.Index(fields=['course', 'date', 'id'], name='attendance_course_date_idx'),
+            # Student feed: one student ordered by -date across courses
+            models.Index(fields=['student', 'date', 'id'], name='attendance_student_date_idx'),
+        ]
         verbose_name = 'Attendance'
-        verbose_name_plural = 'Attendance Records'
\ No newline at end of file
+        verbose_name_plural = 'Attendance Records'
+
+class Room(models.Model):
+    """Lecture halls and laboratories that class sessions are scheduled in"""
+    ROOM_TYPE_CHOICES = [
+        ('lecture', 'Lecture Hall'),
+        ('lab', 'Laboratory'),
+    ]
+    
+    code = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=100, blank=True)
+    room_type = models.CharField(max_length=10, choices=ROOM_TYPE_CHOICES, default='lecture')
+    capacity = models.PositiveIntegerField()
+    is_active = models.BooleanField(default=True)
+    
+    def __str__(self):
+        return f"{self.code} ({self.get_room_type_display()}, {self.capacity})"
+    
+    class Meta:
+        ordering = ['code']
+        verbose_name = 'Room'
+        verbose_name_plural = 'Rooms'
+
+class TimeSlot(models.Model):
+    """A weekly teaching period"""
+    DAY_CHOICES = [
+        (0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'),
+        (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday'),
+    ]
+    
+    day_of_week = models.PositiveSmallIntegerField(choices=DAY_CHOICES)  # date.weekday()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    
+    def __str__(self):
+        return f"{self.get_day_of_week_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+    
+    class Meta:
+        unique_together = ['day_of_week', 'start_time', 'end_time']
+        ordering = ['day_of_week', 'start_time']
+        verbose_name = 'Time Slot'
+        verbose_name_plural = 'Time Slots'
+
+class ClassSession(models.Model):
+    """A weekly class of one course assignment, in a room and time slot, for one term"""
+    SESSION_TYPE_CHOICES = [
+        ('theory', 'Theory'),
+        ('practical', 'Practical'),
+    ]
+    # Odd semesters run in the first term of the academic year, even ones in the second
+    TERM_CHOICES = [
+        (1, 'Odd semesters'),
+        (2, 'Even semesters'),
+    ]
+    
+    assignment = models.ForeignKey(CourseAssignment, on_delete=models.CASCADE, related_name='sessions')
+    time_slot = models.ForeignKey(TimeSlot, on_delete=models.PROTECT, related_name='sessions')
+    room = models.ForeignKey(Room, on_delete=models.PROTECT, related_name='sessions')
+    session_type = models.CharField(max_length=10, choices=SESSION_TYPE_CHOICES, default='theory')
+    # Copied from the assignment so room clashes can be a unique constraint
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE, related_name='class_sessions')
+    term = models.PositiveSmallIntegerField(choices=TERM_CHOICES)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    @staticmethod
+    def term_for_semester(semester):
+        return 1 if semester % 2 else 2
+    
+    def __str__(self):
+        return f"{self.assignment.course} {self.get_session_type_display()} - {self.time_slot} in {self.room.code}"
+    
+    class Meta:
+        # Also serves the faculty and cohort clash lookups for one slot
+        unique_together = ['academic_year', 'term', 'time_slot', 'room']
+        verbose_name = 'Class Session'
+        verbose_name_plural = 'Class Sessions'
+
+class AttendanceSummary(models.Model):
+    """Per student/course/year attendance counters, maintained by academics.rollups"""
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='attendance_summaries')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='attendance_summaries')
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE)
+    present_count = models.PositiveIntegerField(default=0)
+    total_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    @property
+    def percentage(self):
+        if not self.total_count:
+            return None
+        return round(self.present_count * 100 / self.total_count, 2)
+    
+    def __str__(self):
+        return f"{self.student} - {self.course} ({self.academic_year}): {self.present_count}/{self.total_count}"
+    
+    class Meta:
+        unique_together = ['student', 'course', 'academic_year']
+        indexes = [
+            # Per-course percentage and shortage lists
+            models.Index(fields=['course', 'academic_year'], name='summary_course_year_idx'),
+        ]
+        verbose_name = 'Attendance Summary'
+        verbose_name_plural = 'Attendance Summaries'
+
+class AttendanceArchive(models.Model):
+    """One course's attendance for an archived academic year, stored as a compressed blob"""
+    FORMAT_CHOICES = [
+        ('jsonl.gz', 'Gzipped JSON Lines'),
+        ('parquet', 'Parquet'),
+    ]
+    
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE, related_name='attendance_archives')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='attendance_archives')
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    row_count = models.PositiveIntegerField()
+    present_count = models.PositiveIntegerField()
+    # Attendance id range, to find the blobs that may hold a given record
+    min_id = models.PositiveBigIntegerField()
+    max_id = models.PositiveBigIntegerField()
+    # Exact sorted ids in the blob (see academics.archive); null for archives made before it
+    id_index = models.BinaryField(null=True, blank=True)
+    payload = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.course} ({self.academic_year}): {self.row_count} records"
+    
+    class Meta:
+        unique_together = ['academic_year', 'course']
+        indexes = [
+            models.Index(fields=['min_id', 'max_id'], name='attendance_archive_ids_idx'),
+        ]
+        verbose_name = 'Attendance Archive'
+        verbose_name_plural = 'Attendance Archives'
+
+class AnalyticsExport(models.Model):
+    """One run of the columnar analytics export (see academics.exports)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    FORMAT_CHOICES = [
+        ('parquet', 'Parquet'),
+        ('arrow', 'Arrow IPC'),
+        ('csv.gz', 'Gzipped CSV'),
+    ]
+    
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE, null=True, blank=True)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    # Rows changed after `since` (the previous export's watermark) and up to
+    # `until` are written; a full export has no `since`
+    since = models.DateTimeField(null=True, blank=True)
+    until = models.DateTimeField(null=True, blank=True)
+    files = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Export {self.pk} ({self.academic_year or 'all years'}): {self.status}"
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Analytics Export'
+        verbose_name_plural = 'Analytics Exports'
+
+class TranscriptSnapshot(models.Model):
+    """Per student/term GPA and running CGPA, maintained by academics.transcripts"""
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='transcript_snapshots')
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE)
+    semester = models.PositiveIntegerField()
+    credits = models.PositiveIntegerField(default=0)
+    quality_points = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    gpa = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True)
+    cumulative_credits = models.PositiveIntegerField(default=0)
+    cumulative_quality_points = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    cgpa = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.student} - {self.academic_year} semester {self.semester}: {self.gpa}"
+    
+    class Meta:
+        unique_together = ['student', 'academic_year', 'semester']
+        ordering = ['student', 'academic_year__start_date', 'semester']
+        verbose_name = 'Transcript Snapshot'
+        verbose_name_plural = 'Transcript Snapshots'
@@ -0,0 +1,141 @@
+import base64
+import json
+from collections import OrderedDict
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Cursor pagination on a composite key.
+
+    DRF's CursorPagination positions the cursor on the first ordering field
+    only and falls back to an offset capped at 1000 rows within one value,
+    so a feed with more rows than that on one date never terminates. Here the
+    cursor carries every `ordering` field of the row it points at and the
+    next page is filtered lexicographically, e.g. for ('-date', '-id'):
+    date < d OR (date = d AND id < i). The last field must be unique.
+    """
+    ordering = ('-id',)
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def _fields(self, queryset):
+        return [
+            (name.lstrip('-'), name.startswith('-'), queryset.model._meta.get_field(name.lstrip('-')))
+            for name in self.ordering
+        ]
+
+    def decode_cursor(self, request, fields):
+        """(values, reverse) from ?cursor=, or None for the first page"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = cursor['v']
+            if len(values) != len(fields):
+                raise ValueError
+            values = [field.to_python(value) for (name, descending, field), value in zip(fields, values)]
+            return values, bool(cursor.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, fields, reverse):
+        values = [field.value_to_string(obj) for name, descending, field in fields]
+        cursor = json.dumps({'v': values, 'r': int(reverse)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii')
+
+    def get_page_queryset(self, queryset, request):
+        """Sliced queryset for the requested page (one extra row to detect more)"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.fields = self._fields(queryset)
+        cursor = self.decode_cursor(request, self.fields)
+        self.has_cursor = cursor is not None
+        self.reverse = bool(cursor and cursor[1])
+
+        ordering = []
+        for name, descending, field in self.fields:
+            # Walking backwards flips the order; the page is flipped back later
+            ordering.append(f"{'-' if descending != self.reverse else ''}{name}")
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            position = Q()
+            equal = {}
+            for (name, descending, field), value in zip(self.fields, cursor[0]):
+                lookup = 'lt' if descending != self.reverse else 'gt'
+                position |= Q(**equal, **{f'{name}__{lookup}': value})
+                equal[name] = value
+            queryset = queryset.filter(position)
+        return queryset[:self.page_size + 1]
+
+    def build_page(self, rows):
+        """Trim the look-ahead row and work out the next/previous cursors"""
+        more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = self.has_cursor, more
+        else:
+            self.has_next, self.has_previous = more, self.has_cursor
+        self.page = rows
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.build_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        """paginate_queryset() through the async ORM"""
+        page_queryset = self.get_page_queryset(queryset, request)
+        return self.build_page([obj async for obj in page_queryset])
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        cursor = self.encode_cursor(self.page[-1], self.fields, reverse=False)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        cursor = self.encode_cursor(self.page[0], self.fields, reverse=True)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class AttendanceCursorPagination(KeysetCursorPagination):
+    """Keyset pagination on (date, id) for the attendance feed"""
+    ordering = ('-date', '-id')
+
+
+class EnrollmentCursorPagination(KeysetCursorPagination):
+    """Keyset pagination on (enrollment_date, id) for the enrollment feed"""
+    ordering = ('-enrollment_date', '-id')
@@ -0,0 +1,191 @@
+"""
+Set-based course registration.
+
+register_courses() takes a student's whole cart for one academic year and
+validates it with a fixed number of queries, however many courses it holds:
+
+- every course is active and has an open CourseOffering for the year, and
+  the student is not registered for it already;
+- every prerequisite has been passed (graded above zero in any year);
+- the course's semester is not beyond the student's current year of study
+  (earlier semesters are allowed, for repeats);
+- each term's credits, counting the courses already registered for the
+  year, stay within REGISTRATION_MAX_CREDITS.
+
+The cart is validated inside the registration transaction, after the
+student's row and then the offering rows (in primary key order) are
+locked with SELECT ... FOR UPDATE on backends with row locks, so two
+carts of one student cannot both pass the credit or duplicate checks, and
+carts sharing courses queue on those rows instead of deadlocking, while
+carts over other courses proceed in parallel. Seats are then reserved on
+the offering rows only, with one conditional UPDATE guarded by
+seats_taken < capacity, so a course is never oversold. An enrollment that
+slips in concurrently anyway (e.g. on SQLite) hits the unique constraint
+and is reported as a rejected cart. Courses with students on their waitlist count as full, so freed
+seats go to the queue first. The cart is all or nothing: if any course is
+full the transaction rolls back.
+"""
+from collections import defaultdict
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+from .cache import bump_version
+from accounts.models import StudentProfile
+from .models import ClassSession, Course, CourseOffering, Enrollment, WaitlistEntry
+
+
+class RegistrationError(Exception):
+    """The cart was rejected; `errors` maps course ids (or 'cart') to messages"""
+
+    def __init__(self, errors):
+        super().__init__('Registration rejected')
+        self.errors = errors
+
+
+def get_max_credits():
+    """Credits a student may register for in one term"""
+    return getattr(settings, 'REGISTRATION_MAX_CREDITS', 24)
+
+
+def last_eligible_semester(current_semester):
+    """Last semester of the student's current year of study"""
+    return current_semester + current_semester % 2
+
+
+def lock_cart(student, academic_year, course_ids):
+    """Lock the student's row, then the cart's offerings in primary key order (call inside atomic())"""
+    if not connection.features.has_select_for_update:
+        return
+    list(StudentProfile.objects.select_for_update().filter(pk=student.pk).values_list('pk', flat=True))
+    list(CourseOffering.objects.select_for_update().filter(
+        academic_year=academic_year, course_id__in=course_ids
+    ).order_by('pk').values_list('pk', flat=True))
+
+
+def check_cart(student, academic_year, course_ids):
+    """(offerings, {course id: dropped enrollment id}) for a valid cart; raises RegistrationError"""
+    errors = defaultdict(list)
+    if not student.is_active:
+        raise RegistrationError({'cart': ['Inactive students cannot register']})
+
+    offerings = {
+        offering.course_id: offering
+        for offering in CourseOffering.objects.filter(
+            academic_year=academic_year, course_id__in=course_ids
+        ).select_related('course')
+    }
+    prerequisites = defaultdict(dict)
+    for course_id, prerequisite_id, code in Course.prerequisites.through.objects.filter(
+        from_course_id__in=course_ids
+    ).values_list('from_course_id', 'to_course_id', 'to_course__code'):
+        prerequisites[course_id][prerequisite_id] = code
+    required = {pk for codes in prerequisites.values() for pk in codes}
+    passed = set(Enrollment.objects.filter(
+        student=student, course_id__in=required, grade_points__gt=0
+    ).values_list('course_id', flat=True)) if required else set()
+
+    registered = {}
+    credits = defaultdict(int)
+    for pk, course_id, is_active, semester, course_credits in Enrollment.objects.filter(
+        student=student, academic_year=academic_year
+    ).values_list('pk', 'course_id', 'is_active', 'course__semester', 'course__credits'):
+        registered[course_id] = (pk, is_active)
+        if is_active:
+            credits[ClassSession.term_for_semester(semester)] += course_credits
+
+    last_semester = last_eligible_semester(student.current_semester)
+    reactivate = {}
+    for course_id in course_ids:
+        offering = offerings.get(course_id)
+        if offering is None or not offering.course.is_active:
+            errors[str(course_id)].append(f'Course is not offered in {academic_year}')
+            continue
+        if not offering.is_open:
+            errors[str(course_id)].append('Registration for this course is closed')
+        course = offering.course
+        if course_id in registered:
+            pk, is_active = registered[course_id]
+            if is_active:
+                errors[str(course_id)].append(f'Already registered for {course.code}')
+            else:
+                reactivate[course_id] = pk
+        missing = sorted(code for pk, code in prerequisites[course_id].items() if pk not in passed)
+        if missing:
+            errors[str(course_id)].append(f"Prerequisites not passed: {', '.join(missing)}")
+        if course.semester > last_semester:
+            errors[str(course_id)].append(
+                f'{course.code} is a semester {course.semester} course; '
+                f'you can register up to semester {last_semester}'
+            )
+        credits[ClassSession.term_for_semester(course.semester)] += course.credits
+
+    max_credits = get_max_credits()
+    for term, total in sorted(credits.items()):
+        if total > max_credits:
+            errors['cart'].append(f'Term {term} would have {total} credits; the limit is {max_credits}')
+    if errors:
+        raise RegistrationError(dict(errors))
+    return [offerings[course_id] for course_id in course_ids], reactivate
+
+
+class _SeatsUnavailable(Exception):
+    """Rolls the registration back when an offering was full or closed"""
+
+
+HAS_SEAT = Q(is_open=True) & (Q(capacity__isnull=True) | Q(seats_taken__lt=F('capacity')))
+# Freed seats go to the waitlist first (see academics.waitlist)
+NO_QUEUE = ~Exists(WaitlistEntry.objects.filter(offering=OuterRef('pk'), status='waiting'))
+
+
+def _reserve_seats(offering_ids):
+    """Take one seat on every offering (locked by lock_cart()), or raise _SeatsUnavailable"""
+    reserved = CourseOffering.objects.filter(pk__in=offering_ids).filter(HAS_SEAT, NO_QUEUE).update(
+        seats_taken=F('seats_taken') + 1
+    )
+    if reserved != len(offering_ids):
+        raise _SeatsUnavailable
+
+
+def _unavailable_errors(offering_ids):
+    errors = {}
+    for course_id, is_open in CourseOffering.objects.filter(
+        pk__in=offering_ids
+    ).exclude(HAS_SEAT & NO_QUEUE).values_list('course_id', 'is_open'):
+        errors[str(course_id)] = [
+            'No seats left; join the waitlist' if is_open else 'Registration for this course is closed'
+        ]
+    return errors or {'cart': ['Seats changed during registration; try again']}
+
+
+def register_courses(student, academic_year, course_ids):
+    """Enroll `student` in every course of the cart, or in none; returns the enrollments"""
+    course_ids = sorted(set(course_ids))
+    offering_ids = []
+
+    try:
+        with transaction.atomic():
+            lock_cart(student, academic_year, course_ids)
+            offerings, reactivate = check_cart(student, academic_year, course_ids)
+            offering_ids = [offering.pk for offering in offerings]
+            _reserve_seats(offering_ids)
+            if reactivate:
+                Enrollment.objects.filter(pk__in=reactivate.values()).update(
+                    is_active=True, updated_at=timezone.now()
+                )
+            Enrollment.objects.bulk_create([
+                Enrollment(student=student, course_id=course_id, academic_year=academic_year)
+                for course_id in course_ids if course_id not in reactivate
+            ])
+            # bulk_create and update() skip the signals that maintain the counters
+            Course.objects.filter(pk__in=course_ids).update(
+                active_enrollment_count=F('active_enrollment_count') + 1
+            )
+            bump_version('academics.Enrollment')
+    except _SeatsUnavailable:
+        raise RegistrationError(_unavailable_errors(offering_ids))
+    except IntegrityError:
+        # A concurrent registration of the same course won the race
+        raise RegistrationError({'cart': ['Already registered for one of these courses']})
+
+    return Enrollment.objects.filter(student=student, academic_year=academic_year, course_id__in=course_ids)
@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from .models import AcademicYear, Attendance, AttendanceSummary
+
+
+def get_shortage_threshold():
+    """Attendance percentage below which a student is reported as short"""
+    return getattr(settings, 'ATTENDANCE_SHORTAGE_THRESHOLD', 75)
+
+
+def academic_year_for_date(date):
+    """Academic year whose date range contains `date`, or None"""
+    return AcademicYear.objects.filter(start_date__lte=date, end_date__gte=date).first()
+
+
+def apply_attendance_delta(student_id, course_id, date, present_delta, total_delta):
+    """Add deltas to the summary row the attendance on `date` rolls up into"""
+    academic_year = academic_year_for_date(date)
+    if academic_year is None or academic_year.attendance_archived:
+        # Summaries of archived years are kept as they were when archived
+        return
+
+    summary, created = AttendanceSummary.objects.get_or_create(
+        student_id=student_id,
+        course_id=course_id,
+        academic_year=academic_year
+    )
+    AttendanceSummary.objects.filter(pk=summary.pk).update(
+        present_count=F('present_count') + present_delta,
+        total_count=F('total_count') + total_delta,
+        updated_at=timezone.now()
+    )
+
+
+def rebuild_attendance_summaries(academic_year, course_ids=None, student_ids=None):
+    """
+    Recompute summaries for one academic year from the Attendance table.
+
+    Used by the rebuild command and after bulk writes that bypass signals.
+    Optional course/student filters limit the rebuild to the rows touched.
+    Returns the number of summary rows written.
+    """
+    attendance = Attendance.objects.filter(
+        date__gte=academic_year.start_date,
+        date__lte=academic_year.end_date
+    )
+    summaries = AttendanceSummary.objects.filter(academic_year=academic_year)
+    if course_ids is not None:
+        attendance = attendance.filter(course_id__in=course_ids)
+        summaries = summaries.filter(course_id__in=course_ids)
+    if student_ids is not None:
+        attendance = attendance.filter(student_id__in=student_ids)
+        summaries = summaries.filter(student_id__in=student_ids)
+
+    totals = (
+        attendance.order_by()
+        .values('student_id', 'course_id')
+        .annotate(
+            total=Count('id'),
+            present=Count('id', filter=Q(is_present=True))
+        )
+    )
+    rows = [
+        AttendanceSummary(
+            student_id=row['student_id'],
+            course_id=row['course_id'],
+            academic_year=academic_year,
+            present_count=row['present'],
+            total_count=row['total']
+        )
+        for row in totals.iterator()
+    ]
+
+    with transaction.atomic():
+        summaries.delete()
+        AttendanceSummary.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
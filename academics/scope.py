@@ -0,0 +1,67 @@
+"""
+Faculty course scope.
+
+Faculty see enrollments, attendance and summaries only for the courses they
+are assigned to. The assigned course ids are resolved for one academic year
+(the current one unless the request asks for another with ?academic_year=),
+memoized on the request so every queryset and permission check in it shares
+one lookup, and kept in the reference cache for FACULTY_SCOPE_CACHE_TTL
+seconds. A malformed ?academic_year= is a 400 (ValidationError), not a silent
+fall back to the current year. CourseAssignment writes bump its version stamp (see
+academics.signals), so a changed assignment is visible on the next request.
+"""
+from django.conf import settings
+from rest_framework import serializers
+from .cache import get_current_academic_year, read_through
+from .models import CourseAssignment
+
+
+_year_id_field = serializers.IntegerField(min_value=1)
+
+
+def resolve_scope_year_id(request):
+    """Academic year id requested with ?academic_year=, else the current year's id (or None)"""
+    params = getattr(request, 'query_params', request.GET)
+    requested = params.get('academic_year')
+    if requested:
+        try:
+            return _year_id_field.run_validation(requested)
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({'academic_year': exc.detail})
+    current = get_current_academic_year()
+    return current.pk if current is not None else None
+
+
+def _load_course_ids(user_id, academic_year_id):
+    assignments = CourseAssignment.objects.filter(faculty__user_id=user_id)
+    if academic_year_id is not None:
+        assignments = assignments.filter(academic_year_id=academic_year_id)
+    return frozenset(assignments.values_list('course_id', flat=True))
+
+
+def get_assigned_course_ids(request, academic_year_id=None):
+    """
+    Ids of the courses the requesting faculty member teaches.
+
+    Without `academic_year_id` the year comes from resolve_scope_year_id().
+    When no academic year is current, assignments of every year count.
+    """
+    if academic_year_id is None:
+        academic_year_id = resolve_scope_year_id(request)
+
+    # Store on the underlying HttpRequest so DRF Request wrappers share it
+    holder = getattr(request, '_request', request)
+    memo = holder.__dict__.setdefault('_course_scope', {})
+    if academic_year_id not in memo:
+        user_id = request.user.pk
+        memo[academic_year_id] = read_through(
+            f'faculty-scope:{user_id}:{academic_year_id or "all"}',
+            ['academics.CourseAssignment'],
+            lambda: _load_course_ids(user_id, academic_year_id),
+            timeout=getattr(settings, 'FACULTY_SCOPE_CACHE_TTL', 300)
+        )
+    return memo[academic_year_id]
+
+
+def is_assigned_to_course(request, course_id, academic_year_id=None):
+    return int(course_id) in get_assigned_course_ids(request, academic_year_id)
@@ -1,11 +1,25 @@
+from django.db.models import Count, Q
 from rest_framework import serializers
-from .models import Department, AcademicYear, Course, Enrollment, CourseAssignment, Attendance
+from .models import (
+    Department, AcademicYear, Course, CourseOffering, Enrollment, CourseAssignment, Attendance,
+    AttendanceSummary, AnalyticsExport, TranscriptSnapshot, Room, TimeSlot, ClassSession,
+    WaitlistEntry
+)
 from accounts.serializers import StudentBasicSerializer, FacultyBasicSerializer
+from core.serializers import EagerLoadingMixin, SparseFieldsetMixin, TimedSerializerMixin
+from .cache import ReferenceCachedSerializerMixin
+from .counters import use_materialized_counters
+from .rollups import academic_year_for_date
+from .timetable import SESSION_ROOM_TYPES, check_attendance_date, find_session_clash
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(TimedSerializerMixin, ReferenceCachedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Department model"""
     head_of_department = FacultyBasicSerializer(read_only=True)
     total_courses = serializers.SerializerMethodField()
+    cache_dependencies = (
+        'academics.Department', 'academics.Course',
+        'accounts.FacultyProfile', 'accounts.User'
+    )
     
     class Meta:
         model = Department
@@ -14,34 +28,85 @@ class DepartmentSerializer(serializers.ModelSerializer):
             'established_date', 'is_active', 'total_courses'
         ]
     
+    def get_annotations(self):
+        if use_materialized_counters() or 'total_courses' not in self.fields:
+            return {}
+        return {'num_active_courses': Count('courses', filter=Q(courses__is_active=True))}
+    
     def get_total_courses(self, obj):
+        if hasattr(obj, 'num_active_courses'):
+            return obj.num_active_courses
+        if use_materialized_counters():
+            return obj.active_course_count
         return obj.courses.filter(is_active=True).count()
 
-class AcademicYearSerializer(serializers.ModelSerializer):
+class AcademicYearSerializer(TimedSerializerMixin, ReferenceCachedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Academic Year model"""
+    cache_dependencies = ('academics.AcademicYear',)
     
     class Meta:
         model = AcademicYear
-        fields = ['id', 'year', 'start_date', 'end_date', 'is_current']
+        fields = ['id', 'year', 'start_date', 'end_date', 'second_term_start', 'is_current', 'attendance_archived']
+        read_only_fields = ['attendance_archived']
+    
+    def validate(self, attrs):
+        start_date = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        second_term_start = attrs.get('second_term_start', getattr(self.instance, 'second_term_start', None))
+        if second_term_start is not None and not start_date < second_term_start <= end_date:
+            raise serializers.ValidationError({'second_term_start': 'Must fall after the start date and by the end date'})
+        return attrs
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(TimedSerializerMixin, ReferenceCachedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Course model"""
     department = DepartmentSerializer(read_only=True)
     department_id = serializers.IntegerField(write_only=True)
+    prerequisites = serializers.PrimaryKeyRelatedField(
+        many=True, queryset=Course.objects.all(), required=False
+    )
     total_enrollments = serializers.SerializerMethodField()
+    prefetch_related_fields = ('prerequisites',)
+    # Enrollment writes are frequent, so the count is not part of the cache entry
+    cache_dependencies = (
+        'academics.Course', 'academics.Department',
+        'accounts.FacultyProfile', 'accounts.User'
+    )
+    conditional_dependencies = cache_dependencies + ('academics.Enrollment',)
+    live_fields = ('total_enrollments',)
     
     class Meta:
         model = Course
         fields = [
             'id', 'name', 'code', 'credits', 'department', 'department_id',
             'semester', 'course_type', 'description', 'theory_hours', 
-            'practical_hours', 'is_active', 'total_enrollments'
+            'practical_hours', 'prerequisites', 'is_active', 'total_enrollments'
         ]
     
+    def get_annotations(self):
+        if use_materialized_counters() or 'total_enrollments' not in self.fields:
+            return {}
+        return {
+            'num_active_enrollments': Count('enrollments', filter=Q(enrollments__is_active=True))
+        }
+    
+    def get_live_values(self, pks):
+        if use_materialized_counters():
+            counts = Course.objects.filter(pk__in=pks).values_list('pk', 'active_enrollment_count')
+        else:
+            counts = Enrollment.objects.filter(course_id__in=pks, is_active=True).order_by().values(
+                'course_id'
+            ).annotate(total=Count('pk')).values_list('course_id', 'total')
+        counts = dict(counts)
+        return {pk: {'total_enrollments': counts.get(pk, 0)} for pk in pks}
+    
     def get_total_enrollments(self, obj):
+        if hasattr(obj, 'num_active_enrollments'):
+            return obj.num_active_enrollments
+        if use_materialized_counters():
+            return obj.active_enrollment_count
         return obj.enrollments.filter(is_active=True).count()
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Enrollment model"""
     student = StudentBasicSerializer(read_only=True)
     student_id = serializers.IntegerField(write_only=True)
@@ -58,7 +123,55 @@ class EnrollmentSerializer(serializers.ModelSerializer):
             'grade', 'grade_points', 'is_active'
         ]
 
-class CourseAssignmentSerializer(serializers.ModelSerializer):
+class CourseOfferingSerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
+    """Serializer for Course Offering model"""
+    course_code = serializers.CharField(source='course.code', read_only=True)
+    course_name = serializers.CharField(source='course.name', read_only=True)
+    seats_left = serializers.IntegerField(read_only=True)
+    select_related_fields = ('course',)
+    
+    class Meta:
+        model = CourseOffering
+        fields = [
+            'id', 'course', 'course_code', 'course_name', 'academic_year',
+            'capacity', 'seats_taken', 'seats_left', 'is_open'
+        ]
+        read_only_fields = ['seats_taken']
+
+class RegistrationSerializer(serializers.Serializer):
+    """A student's cart of courses for one academic year"""
+    course_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=20)
+    academic_year = serializers.PrimaryKeyRelatedField(queryset=AcademicYear.objects.all(), required=False)
+    student_id = serializers.IntegerField(required=False, help_text='Admins only; students register themselves')
+
+class WaitlistEntrySerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
+    """Serializer for waitlist entries; `position` is 1 for the next student to get a seat"""
+    student = StudentBasicSerializer(read_only=True)
+    student_id = serializers.IntegerField(write_only=True, required=False, help_text='Admins only')
+    course_id = serializers.IntegerField(write_only=True)
+    course_code = serializers.CharField(source='offering.course.code', read_only=True)
+    academic_year = serializers.PrimaryKeyRelatedField(
+        source='offering.academic_year', queryset=AcademicYear.objects.all(), required=False
+    )
+    position = serializers.IntegerField(read_only=True)
+    select_related_fields = ('offering__course',)
+    
+    class Meta:
+        model = WaitlistEntry
+        fields = [
+            'id', 'student', 'student_id', 'course_id', 'course_code', 'academic_year',
+            'priority', 'status', 'reason', 'position', 'created_at', 'resolved_at'
+        ]
+        read_only_fields = ['status', 'reason', 'created_at', 'resolved_at']
+    
+    def to_internal_value(self, data):
+        attrs = super().to_internal_value(data)
+        # Flatten the source path so views read it like RegistrationSerializer's
+        if 'offering' in attrs:
+            attrs['academic_year'] = attrs.pop('offering')['academic_year']
+        return attrs
+
+class CourseAssignmentSerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Course Assignment model"""
     faculty = FacultyBasicSerializer(read_only=True)
     faculty_id = serializers.IntegerField(write_only=True)
@@ -75,7 +188,7 @@ class CourseAssignmentSerializer(serializers.ModelSerializer):
             'assigned_date'
         ]
 
-class AttendanceSerializer(serializers.ModelSerializer):
+class AttendanceSerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Attendance model"""
     student = StudentBasicSerializer(read_only=True)
     student_id = serializers.IntegerField(write_only=True)
@@ -88,4 +201,212 @@ class AttendanceSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'student', 'student_id', 'course', 'course_id',
             'date', 'is_present', 'remarks', 'marked_by', 'marked_at'
-        ]
\ No newline at end of file
+        ]
+    
+    def validate_date(self, value):
+        academic_year = academic_year_for_date(value)
+        if academic_year is not None and academic_year.attendance_archived:
+            raise serializers.ValidationError(f'Attendance for {academic_year} is archived and read-only')
+        return value
+    
+    def validate(self, attrs):
+        # Only a new or moved record is checked: a PATCH of is_present or remarks keeps its date
+        if 'date' not in attrs and 'course_id' not in attrs:
+            return attrs
+        course_id = attrs.get('course_id', getattr(self.instance, 'course_id', None))
+        date = attrs.get('date', getattr(self.instance, 'date', None))
+        if course_id is not None and date is not None:
+            error = check_attendance_date(course_id, date, academic_year_for_date(date))
+            if error:
+                raise serializers.ValidationError({'date': error})
+        return attrs
+
+class AttendanceRecordSerializer(serializers.Serializer):
+    """One student's mark inside a bulk attendance request"""
+    student_id = serializers.IntegerField()
+    is_present = serializers.BooleanField()
+    remarks = serializers.CharField(max_length=200, required=False, allow_blank=True, default='')
+
+class BulkAttendanceSerializer(serializers.Serializer):
+    """Serializer for marking a whole class session at once"""
+    course_id = serializers.IntegerField()
+    date = serializers.DateField()
+    records = AttendanceRecordSerializer(many=True, allow_empty=False)
+    
+    def validate_course_id(self, value):
+        if not Course.objects.filter(pk=value, is_active=True).exists():
+            raise serializers.ValidationError('Course not found or inactive')
+        return value
+    
+    def validate(self, attrs):
+        student_ids = [record['student_id'] for record in attrs['records']]
+        if len(student_ids) != len(set(student_ids)):
+            raise serializers.ValidationError({'records': 'Duplicate student_id in records'})
+        
+        # One query for the whole class instead of one per student
+        enrolled = set(
+            Enrollment.objects.filter(
+                course_id=attrs['course_id'],
+                student_id__in=student_ids,
+                is_active=True
+            ).values_list('student_id', flat=True)
+        )
+        not_enrolled = sorted(set(student_ids) - enrolled)
+        if not_enrolled:
+            raise serializers.ValidationError({
+                'records': f'Students not enrolled in this course: {not_enrolled}'
+            })
+        return attrs
+
+
+class RoomSerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
+    """Serializer for Room model"""
+    
+    class Meta:
+        model = Room
+        fields = ['id', 'code', 'name', 'room_type', 'capacity', 'is_active']
+
+
+class TimeSlotSerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
+    """Serializer for TimeSlot model"""
+    day_name = serializers.CharField(source='get_day_of_week_display', read_only=True)
+    
+    class Meta:
+        model = TimeSlot
+        fields = ['id', 'day_of_week', 'day_name', 'start_time', 'end_time']
+    
+    def validate(self, attrs):
+        start_time = attrs.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = attrs.get('end_time', getattr(self.instance, 'end_time', None))
+        if start_time is not None and end_time is not None and end_time <= start_time:
+            raise serializers.ValidationError({'end_time': 'End time must be after start time'})
+        return attrs
+
+
+class ClassSessionSerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
+    """Serializer for timetable sessions; academic year and term come from the assignment"""
+    course_code = serializers.CharField(source='assignment.course.code', read_only=True)
+    course_name = serializers.CharField(source='assignment.course.name', read_only=True)
+    faculty = FacultyBasicSerializer(source='assignment.faculty', read_only=True)
+    assignment_id = serializers.IntegerField(write_only=True)
+    time_slot = TimeSlotSerializer(read_only=True)
+    time_slot_id = serializers.IntegerField(write_only=True)
+    room = RoomSerializer(read_only=True)
+    room_id = serializers.IntegerField(write_only=True)
+    select_related_fields = (
+        'assignment__course', 'assignment__faculty__user', 'time_slot', 'room'
+    )
+    
+    class Meta:
+        model = ClassSession
+        fields = [
+            'id', 'course_code', 'course_name', 'faculty', 'assignment_id',
+            'session_type', 'time_slot', 'time_slot_id', 'room', 'room_id',
+            'academic_year', 'term'
+        ]
+        read_only_fields = ['academic_year', 'term']
+    
+    def validate(self, attrs):
+        instance = self.instance
+        try:
+            assignment = CourseAssignment.objects.select_related('course').get(
+                pk=attrs.get('assignment_id', getattr(instance, 'assignment_id', None))
+            )
+        except CourseAssignment.DoesNotExist:
+            raise serializers.ValidationError({'assignment_id': 'Course assignment not found'})
+        try:
+            time_slot = TimeSlot.objects.get(pk=attrs.get('time_slot_id', getattr(instance, 'time_slot_id', None)))
+        except TimeSlot.DoesNotExist:
+            raise serializers.ValidationError({'time_slot_id': 'Time slot not found'})
+        try:
+            room = Room.objects.get(pk=attrs.get('room_id', getattr(instance, 'room_id', None)), is_active=True)
+        except Room.DoesNotExist:
+            raise serializers.ValidationError({'room_id': 'Room not found or inactive'})
+        
+        session_type = attrs.get('session_type', getattr(instance, 'session_type', 'theory'))
+        if room.room_type != SESSION_ROOM_TYPES[session_type]:
+            raise serializers.ValidationError({
+                'room_id': f'{session_type.capitalize()} sessions need a {SESSION_ROOM_TYPES[session_type]} room'
+            })
+        class_size = Enrollment.objects.filter(
+            course_id=assignment.course_id, academic_year_id=assignment.academic_year_id, is_active=True
+        ).count()
+        if room.capacity < class_size:
+            raise serializers.ValidationError({
+                'room_id': f'{room.code} seats {room.capacity}, the course has {class_size} students'
+            })
+        
+        attrs['academic_year_id'] = assignment.academic_year_id
+        attrs['term'] = ClassSession.term_for_semester(assignment.course.semester)
+        clash = find_session_clash(
+            assignment.academic_year_id, attrs['term'], time_slot, room, assignment,
+            exclude_pk=getattr(instance, 'pk', None)
+        )
+        if clash:
+            raise serializers.ValidationError(clash)
+        return attrs
+
+
+class GenerateTimetableSerializer(serializers.Serializer):
+    """Options for generating one term's timetable"""
+    academic_year = serializers.PrimaryKeyRelatedField(queryset=AcademicYear.objects.all(), required=False)
+    term = serializers.ChoiceField(choices=ClassSession.TERM_CHOICES)
+    replace = serializers.BooleanField(required=False, default=False)
+    dry_run = serializers.BooleanField(required=False, default=False)
+
+
+class CourseQuerySerializer(serializers.Serializer):
+    """Query parameters of the course list"""
+    department = serializers.IntegerField(required=False, min_value=1)
+    semester = serializers.IntegerField(required=False, min_value=1)
+
+class AttendanceQuerySerializer(serializers.Serializer):
+    """Query parameters of the attendance and attendance-summary lists"""
+    course = serializers.IntegerField(required=False, min_value=1)
+    student = serializers.IntegerField(required=False, min_value=1)
+    academic_year = serializers.IntegerField(required=False, min_value=1)
+
+class AttendanceSummarySerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
+    """Serializer for precomputed attendance percentages"""
+    student = StudentBasicSerializer(read_only=True)
+    course_code = serializers.CharField(source='course.code', read_only=True)
+    course_name = serializers.CharField(source='course.name', read_only=True)
+    academic_year = serializers.CharField(source='academic_year.year', read_only=True)
+    percentage = serializers.FloatField(read_only=True)
+    select_related_fields = ('course', 'academic_year')
+    
+    class Meta:
+        model = AttendanceSummary
+        fields = [
+            'id', 'student', 'course', 'course_code', 'course_name',
+            'academic_year', 'present_count', 'total_count', 'percentage'
+        ]
+
+
+class TranscriptSnapshotSerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
+    """Serializer for per-term GPA snapshots"""
+    academic_year_name = serializers.CharField(source='academic_year.year', read_only=True)
+    select_related_fields = ('academic_year',)
+    
+    class Meta:
+        model = TranscriptSnapshot
+        fields = [
+            'academic_year', 'academic_year_name', 'semester', 'credits',
+            'quality_points', 'gpa', 'cumulative_credits', 'cgpa'
+        ]
+
+
+class AnalyticsExportSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Serializer for analytics export jobs"""
+    format = serializers.ChoiceField(choices=AnalyticsExport.FORMAT_CHOICES, required=False)
+    full = serializers.BooleanField(write_only=True, required=False, default=False)
+    
+    class Meta:
+        model = AnalyticsExport
+        fields = [
+            'id', 'academic_year', 'format', 'full', 'status', 'since', 'until',
+            'files', 'error', 'requested_by', 'created_at', 'finished_at'
+        ]
+        read_only_fields = [
+            'status', 'since', 'until', 'files', 'error', 'requested_by', 'created_at', 'finished_at'
+        ]
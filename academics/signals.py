@@ -0,0 +1,195 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from accounts.models import FacultyProfile
+from .models import Department, AcademicYear, Course, CourseOffering, Enrollment, CourseAssignment, Attendance
+from .cache import bump_version
+from .counters import (
+    refresh_department_counts, refresh_course_counts, refresh_offering_counts, use_materialized_counters
+)
+from .rollups import apply_attendance_delta
+from .transcripts import GRADED, rebuild_student_transcript, rebuild_transcripts
+from .waitlist import request_promotion
+
+
+def _previous_values(sender, instance, field_names):
+    """Tuple of `field_names` currently stored in the database, if the row exists"""
+    if instance.pk is None:
+        return None
+    return sender.objects.filter(pk=instance.pk).values_list(*field_names).first()
+
+
+# Fields that feed transcript GPAs (see academics.transcripts)
+COURSE_TRANSCRIPT_FIELDS = ('credits', 'semester')
+ENROLLMENT_TRANSCRIPT_FIELDS = ('course_id', 'academic_year_id', 'grade', 'grade_points')
+
+
+@receiver(pre_save, sender=Course)
+def remember_course_department(sender, instance, **kwargs):
+    previous = _previous_values(sender, instance, ('department_id',) + COURSE_TRANSCRIPT_FIELDS)
+    instance._previous_department_id = previous[0] if previous else None
+    instance._previous_transcript_state = previous[1:] if previous else None
+
+
+@receiver(pre_save, sender=Enrollment)
+def remember_enrollment_course(sender, instance, **kwargs):
+    previous = _previous_values(sender, instance, ENROLLMENT_TRANSCRIPT_FIELDS)
+    instance._previous_course_id = previous[0] if previous else None
+    instance._previous_transcript_state = previous
+
+
+@receiver(post_save, sender=Department)
+def department_saved(sender, instance, **kwargs):
+    # save() writes the in-memory counter back, so recompute it afterwards
+    if use_materialized_counters():
+        refresh_department_counts([instance.pk])
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, **kwargs):
+    if use_materialized_counters():
+        department_ids = {instance.department_id, getattr(instance, '_previous_department_id', None)}
+        refresh_department_counts([pk for pk in department_ids if pk is not None])
+        refresh_course_counts([instance.pk])
+    
+    previous = getattr(instance, '_previous_transcript_state', None)
+    current = tuple(getattr(instance, name) for name in COURSE_TRANSCRIPT_FIELDS)
+    if previous is not None and tuple(previous) != current:
+        rebuild_transcripts(student_ids=Enrollment.objects.filter(
+            course=instance
+        ).filter(GRADED).values_list('student_id', flat=True).distinct())
+
+
+@receiver(post_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    if use_materialized_counters():
+        refresh_department_counts([instance.department_id])
+
+
+@receiver(m2m_changed, sender=Course.prerequisites.through)
+def course_prerequisites_changed(sender, action, **kwargs):
+    # Cached course representations list their prerequisites
+    if action.startswith('post_'):
+        bump_version('academics.Course')
+
+
+def _promote_freed_seat(course_id, academic_year_id):
+    """Queue waitlist promotion for the offering a seat was freed in"""
+    request_promotion(CourseOffering.objects.filter(
+        course_id=course_id, academic_year_id=academic_year_id
+    ).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_saved(sender, instance, **kwargs):
+    course_ids = [pk for pk in {instance.course_id, getattr(instance, '_previous_course_id', None)} if pk is not None]
+    if use_materialized_counters():
+        refresh_course_counts(course_ids)
+    # Seats are always counted: registration reserves against them
+    refresh_offering_counts(course_ids=course_ids)
+    
+    previous = getattr(instance, '_previous_transcript_state', None)
+    if previous is not None and (
+        not instance.is_active or tuple(previous[:2]) != (instance.course_id, instance.academic_year_id)
+    ):
+        # Dropped, or moved to another course or year
+        _promote_freed_seat(*previous[:2])
+    current = tuple(getattr(instance, name) for name in ENROLLMENT_TRANSCRIPT_FIELDS)
+    graded = instance.grade_points is not None
+    if (previous is None and graded) or (previous is not None and tuple(previous) != current):
+        rebuild_student_transcript(instance.student_id)
+
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_deleted(sender, instance, **kwargs):
+    if use_materialized_counters():
+        refresh_course_counts([instance.course_id])
+    refresh_offering_counts(course_ids=[instance.course_id])
+    if instance.is_active:
+        _promote_freed_seat(instance.course_id, instance.academic_year_id)
+    if instance.grade_points is not None:
+        rebuild_student_transcript(instance.student_id)
+
+
+@receiver(post_save, sender=CourseOffering)
+def offering_saved(sender, instance, **kwargs):
+    # save() writes the in-memory counter back, so recompute it afterwards
+    refresh_offering_counts(offering_ids=[instance.pk])
+    # More capacity, or registration reopened, may free seats for the waitlist
+    request_promotion([instance.pk])
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_attendance_state(sender, instance, **kwargs):
+    previous = None
+    if instance.pk is not None:
+        previous = sender.objects.filter(pk=instance.pk).values(
+            'student_id', 'course_id', 'date', 'is_present'
+        ).first()
+    instance._previous_state = previous
+
+
+@receiver(post_save, sender=Attendance)
+def attendance_saved(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    if previous is not None and (
+        previous['student_id'], previous['course_id'], previous['date']
+    ) == (instance.student_id, instance.course_id, instance.date):
+        present_delta = int(instance.is_present) - int(previous['is_present'])
+        if present_delta:
+            apply_attendance_delta(
+                instance.student_id, instance.course_id, instance.date, present_delta, 0
+            )
+        return
+    if previous is not None:
+        apply_attendance_delta(
+            previous['student_id'], previous['course_id'], previous['date'],
+            -int(previous['is_present']), -1
+        )
+    apply_attendance_delta(
+        instance.student_id, instance.course_id, instance.date,
+        int(instance.is_present), 1
+    )
+
+
+@receiver(post_delete, sender=Attendance)
+def attendance_deleted(sender, instance, **kwargs):
+    apply_attendance_delta(
+        instance.student_id, instance.course_id, instance.date,
+        -int(instance.is_present), -1
+    )
+
+
+# Models whose writes invalidate cached reference data (see academics.cache)
+REFERENCE_CACHE_MODELS = [
+    Department, AcademicYear, Course, Enrollment, CourseAssignment, FacultyProfile
+]
+
+# User fields rendered inside cached department/course representations
+REFERENCE_USER_FIELDS = {'username', 'first_name', 'last_name', 'user_type'}
+
+
+def invalidate_reference_cache(sender, **kwargs):
+    bump_version(sender._meta.label)
+
+
+for model in REFERENCE_CACHE_MODELS:
+    post_save.connect(invalidate_reference_cache, sender=model)
+    post_delete.connect(invalidate_reference_cache, sender=model)
+
+# Cached attendance analytics (see academics.analytics) depend on Attendance
+post_save.connect(invalidate_reference_cache, sender=Attendance)
+post_delete.connect(invalidate_reference_cache, sender=Attendance)
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login; don't churn the cache for them
+    if update_fields is not None and not REFERENCE_USER_FIELDS.intersection(update_fields):
+        return
+    bump_version(sender._meta.label)
+
+
+@receiver(post_delete, sender=get_user_model())
+def user_deleted(sender, instance, **kwargs):
+    bump_version(sender._meta.label)
@@ -1,3 +1,936 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import tempfile
+import time as clock
+from datetime import date, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from itertools import islice
+from pathlib import Path
+from unittest import mock, skipIf
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+from accounts.models import User, StudentProfile, FacultyProfile
+from . import analytics, waitlist
+from .archive import ArchiveError, archive_year, restore_year
+from .cache import bump_version, get_reference_cache, get_versions
+from .exports import create_export, get_export_path, run_export
+from .models import (
+    Department, AcademicYear, Course, CourseOffering, Enrollment, Attendance,
+    CourseAssignment, Room, TimeSlot, ClassSession, WaitlistEntry, AnalyticsExport,
+    TranscriptSnapshot, AttendanceSummary, AttendanceArchive
+)
+from .pagination import KeysetCursorPagination
+from .registration import RegistrationError, check_cart, register_courses
+from .rollups import rebuild_attendance_summaries
+from .timetable import check_attendance_date, find_session_clash, generate_timetable
+from .urls import router
+from .views import AttendanceViewSet
+from .waitlist import PROMOTION_MAX_RETRIES, _QueueChanged, promote_waitlisted
 
-# Create your tests here.
+
+def create_students(count, prefix='S'):
+    users = User.objects.bulk_create([
+        User(username=f'{prefix.lower()}{i}', user_type='student') for i in range(count)
+    ])
+    return StudentProfile.objects.bulk_create([
+        StudentProfile(user=user, student_id=f'{prefix}{i:05d}', enrollment_date=date(2024, 7, 1))
+        for i, user in enumerate(users)
+    ])
+
+
+def create_courses(department, count, semester=1, prefix='C'):
+    return Course.objects.bulk_create([
+        Course(
+            name=f'Course {i}', code=f'{prefix}{i:03d}', credits=4,
+            department=department, semester=semester
+        )
+        for i in range(count)
+    ])
+
+
+class AcademicsTestCase(TestCase):
+    """Shared fixtures: a department, the current academic year and an admin client"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Computer Science', code='CS')
+        cls.academic_year = AcademicYear.objects.create(
+            year='2024-2025', start_date=date(2024, 7, 1), end_date=date(2025, 6, 30), is_current=True
+        )
+        cls.admin = User.objects.create_user('admin', password='x', user_type='admin', is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+
+class AttendanceCursorPaginationTests(AcademicsTestCase):
+
+    def test_walks_more_than_1000_rows_on_one_date(self):
+        students = create_students(35)
+        courses = create_courses(self.department, 30)
+        day = date(2024, 9, 2)
+        Attendance.objects.bulk_create([
+            Attendance(student=student, course=course, date=day, is_present=True)
+            for student in students for course in courses
+        ])
+        Attendance.objects.bulk_create([
+            Attendance(student=students[0], course=courses[0], date=date(2024, 9, 1))
+        ])
+        expected = list(Attendance.objects.order_by('-date', '-id').values_list('pk', flat=True))
+
+        seen = []
+        pages = []
+        url = '/api/academics/attendance/'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(url)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+            self.assertLessEqual(len(pages), 60)
+        self.assertEqual(seen, expected)
+
+        # The previous link of the last page leads back to the page before it
+        response = self.client.get(pages[-1])
+        previous = self.client.get(response.data['previous'])
+        self.assertEqual(
+            [row['id'] for row in previous.data['results']],
+            expected[(len(pages) - 2) * 20:(len(pages) - 1) * 20]
+        )
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get('/api/academics/attendance/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_async_feed_uses_the_same_cursor(self):
+        student = create_students(1)[0]
+        courses = create_courses(self.department, 45)
+        Attendance.objects.bulk_create([
+            Attendance(student=student, course=course, date=date(2024, 9, 2), is_present=True)
+            for course in courses
+        ])
+        self.client.force_authenticate(student.user)
+
+        walked = []
+        for url in ('/api/academics/attendance/my_attendance/', '/api/academics/async/attendance/mine/'):
+            seen = []
+            while url:
+                data = self.client.get(url).json()
+                self.assertNotIn('count', data)
+                seen.extend(row['id'] for row in data['results'])
+                url = data['next']
+            walked.append(seen)
+        self.assertEqual(walked[0], walked[1])
+        self.assertEqual(len(walked[1]), 45)
+
+        response = self.client.get('/api/academics/async/attendance/mine/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class BulkMarkTests(AcademicsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = create_courses(cls.department, 1)[0]
+        cls.students = create_students(3)
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=cls.course, academic_year=cls.academic_year)
+            for student in cls.students
+        ])
+
+    def mark(self):
+        return self.client.post('/api/academics/attendance/bulk_mark/', {
+            'course_id': self.course.pk,
+            'date': '2024-09-02',
+            'records': [{'student_id': student.pk, 'is_present': True} for student in self.students],
+        }, format='json')
+
+    def test_admin_without_faculty_profile(self):
+        response = self.mark()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Attendance.objects.filter(marked_by__isnull=True).count(), 3)
+
+    def test_faculty_user_without_profile_is_forbidden(self):
+        self.client.force_authenticate(User.objects.create_user('nofaculty', user_type='faculty'))
+        self.assertEqual(self.mark().status_code, 403)
+
+
+class AttendanceQueryParamTests(AcademicsTestCase):
+
+    def test_bad_filters_are_400(self):
+        for url in ('/api/academics/attendance/', '/api/academics/attendance-summary/'):
+            for param in ('course', 'student', 'academic_year'):
+                response = self.client.get(url, {param: 'abc'})
+                self.assertEqual(response.status_code, 400, (url, param))
+                self.assertIn(param, response.data)
+
+    def test_bad_filters_are_400_async(self):
+        response = self.client.get('/api/academics/async/attendance-summary/', {'course': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('course', response.json())
+
+    def test_async_errors_match_sync(self):
+        for sync_url, async_url, params, user in (
+            ('/api/academics/courses/', '/api/academics/async/courses/', {'department': 'cs'}, self.admin),
+            ('/api/academics/courses/', '/api/academics/async/courses/', {'semester': '-1'}, self.admin),
+            ('/api/academics/enrollments/my_enrollments/', '/api/academics/async/enrollments/mine/', {}, self.admin),
+            ('/api/academics/enrollments/my_enrollments/', '/api/academics/async/enrollments/mine/', {}, None),
+        ):
+            with self.subTest(url=async_url, params=params, user=user):
+                self.client.force_authenticate(user)
+                expected = self.client.get(sync_url, params)
+                self.assertIn(expected.status_code, (400, 401, 403))
+                response = self.client.get(async_url, params)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.json(), expected.json())
+
+    def test_bad_scope_year_is_400(self):
+        # Not silently the current year
+        for url in ('/api/academics/offerings/', '/api/academics/sessions/'):
+            response = self.client.get(url, {'academic_year': 'last'})
+            self.assertEqual(response.status_code, 400, url)
+            self.assertIn('academic_year', response.data)
+
+    def test_valid_filters(self):
+        for url in ('/api/academics/attendance/', '/api/academics/attendance-summary/'):
+            response = self.client.get(url, {'course': 1, 'student': 1, 'academic_year': self.academic_year.pk})
+            self.assertEqual(response.status_code, 200, url)
+
+
+class ReferenceCacheTests(AcademicsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        departments = Department.objects.bulk_create([
+            Department(name=f'Department {i}', code=f'D{i}') for i in range(5)
+        ])
+        courses = []
+        for i, department in enumerate(departments):
+            courses += create_courses(department, 3, prefix=f'D{i}C')
+        cls.courses = courses
+        students = create_students(20)
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=course, academic_year=cls.academic_year)
+            for i, student in enumerate(students) for course in courses[i % 15:i % 15 + 1]
+        ])
+
+    def setUp(self):
+        super().setUp()
+        get_reference_cache().clear()
+
+    def test_cold_list_loads_references_in_batches(self):
+        # enrollments, courses (+ prerequisites), departments, academic years
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/academics/enrollments/')
+        self.assertEqual(len(response.data['results']), 20)
+        # warm: enrollments and the live enrollment counts
+        with self.assertNumQueries(2):
+            warm = self.client.get('/api/academics/enrollments/')
+        self.assertEqual(warm.data, response.data)
+
+    def test_enrollment_count_is_live(self):
+        self.client.get('/api/academics/enrollments/')
+        course = self.courses[0]
+        enrollment = Enrollment.objects.filter(course=course).first()
+        Enrollment.objects.filter(pk=enrollment.pk).update(is_active=False)
+        Enrollment.objects.create(
+            student=Enrollment.objects.exclude(course=course).first().student,
+            course=course, academic_year=self.academic_year
+        )
+        response = self.client.get('/api/academics/enrollments/')
+        totals = {row['course']['id']: row['course']['total_enrollments'] for row in response.data['results']}
+        self.assertEqual(totals[course.pk], Enrollment.objects.filter(course=course, is_active=True).count())
+
+    def test_bump_waits_for_commit(self):
+        before = get_versions('academics.Course')
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    bump_version('academics.Course')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(get_versions('academics.Course'), before)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                bump_version('academics.Course')
+                self.assertEqual(get_versions('academics.Course'), before)
+        self.assertNotEqual(get_versions('academics.Course'), before)
+
+
+class RegistrationTests(AcademicsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = create_courses(cls.department, 1)[0]
+        cls.offering = CourseOffering.objects.create(course=cls.course, academic_year=cls.academic_year, capacity=1)
+        cls.students = create_students(2)
+
+    def create(self, student):
+        return self.client.post('/api/academics/enrollments/', {
+            'student_id': student.pk, 'course_id': self.course.pk, 'academic_year_id': self.academic_year.pk,
+        }, format='json')
+
+    def test_create_reserves_a_seat(self):
+        response = self.create(self.students[0])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['course']['id'], self.course.pk)
+        self.offering.refresh_from_db()
+        self.assertEqual(self.offering.seats_taken, 1)
+
+        # The only seat is taken, and a second create is no way around it
+        response = self.create(self.students[1])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(self.course.pk), response.data['errors'])
+        self.assertEqual(self.create(self.students[0]).status_code, 400)
+        self.assertEqual(Enrollment.objects.count(), 1)
+
+    def test_concurrent_duplicate_is_a_registration_error(self):
+        student = self.students[0]
+        # The other registration commits between this one's check and insert
+        def check_then_race(*args):
+            result = check_cart(*args)
+            Enrollment.objects.bulk_create([
+                Enrollment(student=student, course=self.course, academic_year=self.academic_year)
+            ])
+            return result
+
+        with mock.patch('academics.registration.check_cart', side_effect=check_then_race):
+            with self.assertRaises(RegistrationError) as raised:
+                register_courses(student, self.academic_year, [self.course.pk])
+        self.assertIn('cart', raised.exception.errors)
+        self.offering.refresh_from_db()
+        self.assertEqual(self.offering.seats_taken, 0)
+
+
+class GradeImportTests(AcademicsTestCase):
+
+    def test_non_utf8_file_is_400_naming_the_line(self):
+        content = 'student_id,grade\nS00001,A\nS00002,B \u2013 resit\n'.encode('cp1252')
+        response = self.client.post('/api/academics/enrollments/import_grades/', {
+            'file': SimpleUploadedFile('grades.csv', content, content_type='text/csv'),
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Line 3', response.data['error'])
+
+    def test_unreadable_xlsx_is_400(self):
+        for content in (b'student_id,grade\nS00001,A\n', b'PK\x03\x04 truncated'):
+            response = self.client.post('/api/academics/enrollments/import_grades/', {
+                'file': SimpleUploadedFile('grades.xlsx', content),
+            })
+            self.assertEqual(response.status_code, 400)
+            # Without openpyxl the message asks for a CSV file instead
+            self.assertIn('XLSX', response.data['error'])
+
+
+class TimetableTests(AcademicsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        faculty = FacultyProfile.objects.create(
+            user=User.objects.create_user('teacher', user_type='faculty'),
+            employee_id='F001', department='CS', designation='Lecturer', joining_date=date(2020, 1, 1)
+        )
+        cls.course = Course.objects.create(
+            name='Algorithms', code='CS101', credits=4, department=cls.department, semester=1, theory_hours=2
+        )
+        cls.assignment = CourseAssignment.objects.create(
+            faculty=faculty, course=cls.course, academic_year=cls.academic_year
+        )
+        cls.rooms = Room.objects.bulk_create([Room(code=f'R{i}', capacity=60) for i in range(2)])
+        cls.early, cls.late = TimeSlot.objects.bulk_create([
+            TimeSlot(day_of_week=0, start_time=time(9), end_time=time(10)),
+            TimeSlot(day_of_week=0, start_time=time(9, 30), end_time=time(10, 30)),
+        ])
+
+    def test_overlapping_slots_clash(self):
+        report = generate_timetable(self.academic_year, term=1)
+        # The faculty member cannot teach 9:00-10:00 and 9:30-10:30
+        self.assertEqual(report['placed'], 1)
+        self.assertEqual(report['unplaced'], [{'course': 'CS101', 'session_type': 'theory', 'reason': 'faculty'}])
+
+        session = ClassSession.objects.get()
+        other = self.late if session.time_slot == self.early else self.early
+        self.assertEqual(
+            find_session_clash(self.academic_year.pk, 1, other, self.rooms[1], self.assignment),
+            'The faculty member already teaches at this time'
+        )
+
+    def test_attendance_date_without_timetable(self):
+        # Nothing to check against: any date of the year, or outside any year, is accepted
+        for day in (date(2024, 9, 3), date(2025, 3, 4), date(2023, 9, 5)):
+            self.assertIsNone(check_attendance_date(self.course.pk, day, self.academic_year))
+        self.assertIsNone(check_attendance_date(self.course.pk, date(2023, 9, 5), None))
+
+    def test_attendance_date_within_term(self):
+        generate_timetable(self.academic_year, term=1)
+        # The sessions are on Mondays, not Tuesdays
+        self.assertIn('Tuesdays', check_attendance_date(self.course.pk, date(2024, 9, 3), self.academic_year))
+        # No term dates yet: only the weekday is checked
+        self.assertIsNone(check_attendance_date(self.course.pk, date(2025, 3, 3), self.academic_year))
+
+        self.academic_year.second_term_start = date(2025, 1, 6)
+        self.assertIsNone(check_attendance_date(self.course.pk, date(2024, 9, 2), self.academic_year))
+        self.assertIsNone(check_attendance_date(self.course.pk, date(2024, 12, 30), self.academic_year))
+        self.assertIn('runs from 2024-07-01 to 2025-01-05', check_attendance_date(
+            self.course.pk, date(2025, 1, 6), self.academic_year
+        ))
+
+    def test_patch_keeps_the_stored_date(self):
+        student = create_students(1)[0]
+        record = Attendance.objects.create(student=student, course=self.course, date=date(2024, 9, 3))
+        # A timetable placed afterwards doesn't lock existing records
+        generate_timetable(self.academic_year, term=1)
+        response = self.client.patch(f'/api/academics/attendance/{record.pk}/', {'is_present': True})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.patch(f'/api/academics/attendance/{record.pk}/', {'date': '2024-09-10'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date', response.data)
+
+
+class ListQueryCountTests(AcademicsTestCase):
+    """Listing a page costs the same number of queries whatever the page size"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        call_command(
+            'seed_data', students=40, departments=3, courses_per_semester=3, years=3, class_days=4,
+            prefix='QC', stdout=StringIO()
+        )
+        offering = CourseOffering.objects.filter(academic_year=cls.academic_year).first()
+        WaitlistEntry.objects.bulk_create([
+            WaitlistEntry(offering=offering, student=student)
+            for student in StudentProfile.objects.exclude(enrollments__course=offering.course)[:25]
+        ])
+        AnalyticsExport.objects.bulk_create([
+            AnalyticsExport(format='csv.gz', requested_by=cls.admin) for _ in range(25)
+        ])
+
+    def list_rows(self, url, page_size):
+        """Rows of a cold-cache list request with `page_size` rows per page"""
+        for cache in caches.all():
+            cache.clear()
+        with mock.patch.object(PageNumberPagination, 'page_size', page_size), \
+                mock.patch.object(KeysetCursorPagination, 'page_size', page_size):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(response.data['results'])
+
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        for prefix, viewset, basename in router.registry:
+            if not hasattr(viewset, 'list'):
+                continue
+            url = reverse(f'{basename}-list')
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    rows = self.list_rows(url, 2)
+                with self.assertNumQueries(len(queries)):
+                    self.assertGreater(self.list_rows(url, 20), rows)
+
+
+class CounterTests(AcademicsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.students = create_students(3)
+
+    def assertCountersInSync(self, course):
+        course.refresh_from_db()
+        self.department.refresh_from_db()
+        self.assertEqual(course.active_enrollment_count, course.enrollments.filter(is_active=True).count())
+        self.assertEqual(self.department.active_course_count, self.department.courses.filter(is_active=True).count())
+
+    @override_settings(ACADEMICS_MATERIALIZED_COUNTERS=True)
+    def test_counters_follow_enroll_drop_and_delete(self):
+        course = Course.objects.create(name='Algorithms', code='CS101', credits=4, department=self.department, semester=1)
+        self.assertCountersInSync(course)
+        enrollments = [
+            Enrollment.objects.create(student=student, course=course, academic_year=self.academic_year)
+            for student in self.students
+        ]
+        self.assertCountersInSync(course)
+        self.assertEqual(course.active_enrollment_count, 3)
+
+        enrollments[0].is_active = False
+        enrollments[0].save()
+        self.assertCountersInSync(course)
+        enrollments[1].delete()
+        self.assertCountersInSync(course)
+        self.assertEqual(course.active_enrollment_count, 1)
+
+        course.is_active = False
+        course.save()
+        self.assertCountersInSync(course)
+        self.assertEqual(self.department.active_course_count, 0)
+
+    def test_counters_are_left_alone_when_not_served(self):
+        course = Course.objects.create(name='Algorithms', code='CS101', credits=4, department=self.department, semester=1)
+        Enrollment.objects.create(student=self.students[0], course=course, academic_year=self.academic_year)
+        course.refresh_from_db()
+        self.assertEqual(course.active_enrollment_count, 0)
+
+
+class StreamingListTests(AcademicsTestCase):
+
+    def test_streamed_feed_equals_the_paginated_feed(self):
+        student = create_students(1)[0]
+        courses = create_courses(self.department, 45)
+        Attendance.objects.bulk_create([
+            Attendance(student=student, course=course, date=date(2024, 9, 2 + i % 3), is_present=i % 2 == 0)
+            for i, course in enumerate(courses)
+        ])
+        self.client.force_authenticate(student.user)
+
+        paginated = []
+        url = '/api/academics/attendance/my_attendance/'
+        while url:
+            data = self.client.get(url).json()
+            paginated.extend(data['results'])
+            url = data['next']
+
+        # A chunk size that leaves a partial last chunk
+        with mock.patch.object(AttendanceViewSet, 'stream_chunk_size', 7):
+            response = self.client.get('/api/academics/attendance/my_attendance/', {'stream': 'true'})
+        self.assertTrue(response.streaming)
+        streamed = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(streamed), 45)
+        self.assertEqual(streamed, paginated)
+
+
+class SparseFieldsetTests(AcademicsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.courses = create_courses(cls.department, 3)
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=cls.courses[i % 3], academic_year=cls.academic_year)
+            for i, student in enumerate(create_students(12))
+        ])
+
+    def setUp(self):
+        super().setUp()
+        get_reference_cache().clear()
+
+    def rows(self, **params):
+        response = self.client.get('/api/academics/enrollments/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_fields_selects_and_collapses(self):
+        row = self.rows(fields='id,grade,course')[0]
+        self.assertEqual(set(row), {'id', 'grade', 'course'})
+        # Not expanded, so the relation is its primary key
+        self.assertIsInstance(row['course'], int)
+
+    def test_expand_without_fields(self):
+        row = self.rows(expand='course')[0]
+        self.assertIsInstance(row['course'], dict)
+        self.assertIsInstance(row['course']['department'], int)
+        self.assertIsInstance(row['student'], int)
+        self.assertIsInstance(row['academic_year'], int)
+
+    def test_nested_paths(self):
+        row = self.rows(fields='id,course.code,course.department')[0]
+        self.assertEqual(set(row), {'id', 'course'})
+        self.assertEqual(set(row['course']), {'code', 'department'})
+        self.assertIsInstance(row['course']['department'], int)
+
+        row = self.rows(fields='id,course', expand='course.department')[0]
+        self.assertEqual(row['course']['department']['code'], 'CS')
+
+    def test_unknown_names_are_ignored(self):
+        row = self.rows(fields='id,nonexistent', expand='nonexistent.other')[0]
+        self.assertEqual(set(row), {'id'})
+
+    def test_expansion_does_not_add_queries_per_row(self):
+        params = {'expand': 'student,course.department,academic_year'}
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(self.rows(**params)), 12)
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=self.courses[0], academic_year=self.academic_year)
+            for student in create_students(8, prefix='T')
+        ])
+        get_reference_cache().clear()
+        with self.assertNumQueries(len(queries)):
+            self.assertEqual(len(self.rows(**params)), 20)
+
+
+class ConditionalGetTests(AcademicsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = create_courses(cls.department, 1)[0]
+
+    def setUp(self):
+        super().setUp()
+        get_reference_cache().clear()
+        self.url = '/api/academics/courses/'
+        self.first = self.client.get(self.url)
+        self.assertEqual(self.first.status_code, 200)
+
+    def rename_course(self):
+        # Written a little later, so Last-Modified moves past the second it was
+        with mock.patch('academics.cache.time.time', return_value=clock.time() + 10):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(f'{self.url}{self.course.pk}/', {'name': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_matching_etag_is_304(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=self.first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], self.first['ETag'])
+        # The validator is scoped to the URL
+        response = self.client.get(self.url, {'semester': 1}, HTTP_IF_NONE_MATCH=self.first['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since_is_304(self):
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=self.first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_invalidates(self):
+        self.rename_course()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=self.first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], self.first['ETag'])
+        self.assertEqual(response.data['results'][0]['name'], 'Renamed')
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=self.first['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+
+
+class TranscriptTests(AcademicsTestCase):
+    """GPA arithmetic checked against hand-computed values (10-point scale, 2 decimals)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.last_year = AcademicYear.objects.create(
+            year='2023-2024', start_date=date(2023, 7, 1), end_date=date(2024, 6, 30)
+        )
+        cls.student = create_students(1)[0]
+        cls.algorithms, cls.dbms, cls.networks, cls.compilers = Course.objects.bulk_create([
+            Course(name='Algorithms', code='T1', credits=4, department=cls.department, semester=1),
+            Course(name='Databases', code='T2', credits=3, department=cls.department, semester=1),
+            Course(name='Networks', code='T3', credits=2, department=cls.department, semester=2),
+            Course(name='Compilers', code='T4', credits=5, department=cls.department, semester=2),
+        ])
+        cls.grade(cls.algorithms, cls.last_year, 'A')
+        cls.grade(cls.dbms, cls.last_year, 'F')
+        cls.grade(cls.networks, cls.last_year, 'B+')
+        # Incomplete and withdrawn courses carry no credits
+        cls.grade(cls.compilers, cls.last_year, 'I')
+        # Databases repeated after the F
+        cls.retake = cls.grade(cls.dbms, cls.academic_year, 'B')
+
+    @classmethod
+    def grade(cls, course, academic_year, grade):
+        return Enrollment.objects.create(
+            student=cls.student, course=course, academic_year=academic_year,
+            grade=grade, grade_points=Enrollment.GRADE_POINTS[grade]
+        )
+
+    def terms(self):
+        return [
+            (row.academic_year_id, row.semester, row.credits, row.gpa, row.cumulative_credits, row.cgpa)
+            for row in TranscriptSnapshot.objects.filter(student=self.student)
+        ]
+
+    def test_gpa_and_cgpa(self):
+        self.assertEqual(self.terms(), [
+            # A (9 x 4) + F (0 x 3) = 36 over 7 credits
+            (self.last_year.pk, 1, 7, Decimal('5.14'), 7, Decimal('5.14')),
+            # B+ (8 x 2) = 16 over 2; cumulative 52 over 9 = 5.777...
+            (self.last_year.pk, 2, 2, Decimal('8.00'), 9, Decimal('5.78')),
+            # The retake's B (7 x 3) = 21 over 3; the failed attempt still counts: 73 over 12 = 6.083...
+            (self.academic_year.pk, 1, 3, Decimal('7.00'), 12, Decimal('6.08')),
+        ])
+
+    def test_grade_change_rebuilds_snapshots(self):
+        self.retake.grade, self.retake.grade_points = 'A+', Enrollment.GRADE_POINTS['A+']
+        self.retake.save()
+        self.assertEqual(self.terms()[-1], (self.academic_year.pk, 1, 3, Decimal('10.00'), 12, Decimal('6.83')))
+
+        # Withdrawing from the retake leaves only the earlier terms
+        self.retake.grade, self.retake.grade_points = 'W', None
+        self.retake.save()
+        self.assertEqual([term[:2] for term in self.terms()], [(self.last_year.pk, 1), (self.last_year.pk, 2)])
+
+    def test_transcript_endpoint(self):
+        response = self.client.get(f'/api/accounts/students/{self.student.pk}/transcript/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['cgpa'], '6.08')
+        self.assertEqual(response.data['credits'], 12)
+        self.assertEqual(
+            [(course['code'], course['grade']) for course in response.data['terms'][0]['courses']],
+            [('T1', 'A'), ('T2', 'F')]
+        )
+
+
+class ArchiveTests(AcademicsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.last_year = AcademicYear.objects.create(
+            year='2023-2024', start_date=date(2023, 7, 1), end_date=date(2024, 6, 30)
+        )
+        cls.students = create_students(3)
+        cls.courses = create_courses(cls.department, 2)
+        # Courses interleave, so the per-course blobs have overlapping id ranges
+        Attendance.objects.bulk_create([
+            Attendance(
+                student=student, course=course, date=date(2023, 9, day),
+                is_present=(day + i) % 3 != 0, remarks=f'week {day}'
+            )
+            for day in range(1, 8) for i, student in enumerate(cls.students) for course in cls.courses
+        ])
+        rebuild_attendance_summaries(cls.last_year)
+
+    def live_rows(self):
+        return list(Attendance.objects.order_by('id').values_list(
+            'id', 'student_id', 'course_id', 'date', 'is_present', 'remarks', 'marked_by_id', 'marked_at', 'updated_at'
+        ))
+
+    def summaries(self):
+        return list(AttendanceSummary.objects.order_by('id').values_list(
+            'student_id', 'course_id', 'present_count', 'total_count'
+        ))
+
+    def archived_ids(self, params):
+        """Ids of every page of an archived-year list"""
+        ids = []
+        page = 1
+        with mock.patch.object(PageNumberPagination, 'page_size', 4):
+            while page:
+                response = self.client.get('/api/academics/attendance/', {
+                    'academic_year': self.last_year.pk, 'page': page, **params
+                })
+                self.assertEqual(response.status_code, 200)
+                ids.extend(record['id'] for record in response.data['results'])
+                page = page + 1 if response.data['next'] else None
+        return ids
+
+    def test_archive_read_and_restore_round_trip(self):
+        rows = self.live_rows()
+        summaries = self.summaries()
+        with self.captureOnCommitCallbacks(execute=True):
+            report = archive_year(self.last_year)
+        self.assertEqual((report['courses'], report['rows']), (2, 42))
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(self.summaries(), summaries)
+
+        # Unscoped reads would decode the whole year
+        response = self.client.get('/api/academics/attendance/', {'academic_year': self.last_year.pk})
+        self.assertEqual(response.status_code, 400)
+
+        # By course, then newest first within each course
+        student = self.students[1]
+        expected = [
+            row[0] for row in sorted(
+                (row for row in rows if row[1] == student.pk), key=lambda row: (row[2], -row[3].toordinal(), -row[0])
+            )
+        ]
+        self.assertEqual(self.archived_ids({'student': student.pk}), expected)
+        course = self.courses[0]
+        self.assertEqual(
+            sorted(self.archived_ids({'course': course.pk})), [row[0] for row in rows if row[2] == course.pk]
+        )
+
+        # A record of the second blob, inside the first blob's id range
+        row = next(row for row in rows if row[2] == self.courses[1].pk and row[0] > rows[0][0])
+        response = self.client.get(f'/api/academics/attendance/{row[0]}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            (response.data['id'], response.data['date'], response.data['is_present'], response.data['remarks']),
+            (row[0], row[3].isoformat(), row[4], row[5])
+        )
+        self.assertEqual(self.client.get(f'/api/academics/attendance/{rows[-1][0] + 1}/').status_code, 404)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            restore_year(self.last_year)
+        self.assertEqual(self.live_rows(), rows)
+        self.assertEqual(self.summaries(), summaries)
+        self.assertFalse(AttendanceArchive.objects.exists())
+
+    def test_only_ended_years_are_archived(self):
+        with self.assertRaisesMessage(ArchiveError, 'current'):
+            archive_year(self.academic_year)
+        today = timezone.localdate()
+        running = AcademicYear.objects.create(
+            year='running', start_date=today - timedelta(days=300), end_date=today + timedelta(days=60)
+        )
+        with self.assertRaisesMessage(ArchiveError, 'has not ended'):
+            archive_year(running)
+        self.assertFalse(AttendanceArchive.objects.exists())
+
+
+@override_settings(ANALYTICS_EXPORT_FORMAT='csv.gz')
+class ExportTests(AcademicsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        export_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(export_dir.cleanup)
+        overrider = override_settings(ANALYTICS_EXPORT_DIR=Path(export_dir.name))
+        overrider.enable()
+        self.addCleanup(overrider.disable)
+
+    def export(self):
+        """(job, exported ids per dataset) of the next incremental export"""
+        job = run_export(create_export(self.academic_year))
+        ids = {}
+        for name in job.files:
+            with gzip.open(get_export_path(job, name), 'rt', newline='') as stream:
+                ids[name] = sorted(int(row[0]) for row in islice(csv.reader(stream), 1, None))
+        return job, ids
+
+    def test_incremental_runs(self):
+        students = create_students(3)
+        course = create_courses(self.department, 1)[0]
+        enrollments = Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=course, academic_year=self.academic_year) for student in students
+        ])
+
+        job, ids = self.export()
+        self.assertEqual(ids['enrollments'], [enrollment.pk for enrollment in enrollments])
+        self.assertEqual(ids['students'], [student.pk for student in students])
+        # The overlap margin is read again, but its rows are not written again
+        job, ids = self.export()
+        self.assertEqual(ids, {'courses': [], 'students': [], 'enrollments': [], 'attendance': []})
+
+        enrollments[0].grade = 'B'
+        enrollments[0].save()
+        # Stamped before the watermark but committed after the run read the table
+        Enrollment.objects.filter(pk=enrollments[2].pk).update(
+            grade='A', updated_at=job.until - timedelta(seconds=1)
+        )
+        students[1].user.save()
+        job, ids = self.export()
+        self.assertEqual(ids['enrollments'], [enrollments[0].pk, enrollments[2].pk])
+        self.assertEqual(ids['students'], [students[1].pk])
+
+
+class AttendanceAnalyticsTests(AcademicsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.students = create_students(3)
+        cls.courses = create_courses(cls.department, 2)
+        strong, weak = cls.courses
+        first_week = date(2024, 9, 2)
+        rows = []
+        for week in range(10):
+            day = first_week + timedelta(weeks=week)
+            for i, student in enumerate(cls.students):
+                rows.append(Attendance(student=student, course=strong, date=day, is_present=True))
+                # Student 0 misses every other week of the second course; student 2 stops coming
+                is_present = not (i == 0 and week % 2) and not (i == 2 and week >= 6)
+                rows.append(Attendance(student=student, course=weak, date=day, is_present=is_present))
+        Attendance.objects.bulk_create(rows)
+
+    def at_risk(self):
+        return [
+            (row['student_id'], row['course_id'], row['flags'])
+            for row in analytics.compute_analytics(self.academic_year)['at_risk']
+        ]
+
+    def test_at_risk_is_per_course(self):
+        first, second, third = self.students
+        weak = self.courses[1]
+        # Student 0 is at 75% over both courses but 50% in the second one
+        self.assertEqual(self.at_risk(), [
+            (third.pk, weak.pk, ['below_threshold', 'recent_below_threshold', 'dropping']),
+            (first.pk, weak.pk, ['below_threshold', 'recent_below_threshold']),
+        ])
+
+    @skipIf(analytics.np is None, 'NumPy is not installed')
+    def test_numpy_and_pure_python_agree(self):
+        with_numpy = analytics.compute_analytics(self.academic_year)
+        with mock.patch.object(analytics, 'np', None):
+            without_numpy = analytics.compute_analytics(self.academic_year)
+        for result in (with_numpy, without_numpy):
+            del result['backend'], result['computed_at']
+        self.assertEqual(with_numpy, without_numpy)
+
+
+class WaitlistPromotionTests(AcademicsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course = create_courses(cls.department, 1)[0]
+        cls.offering = CourseOffering.objects.create(course=cls.course, academic_year=cls.academic_year, capacity=3)
+        cls.students = create_students(6)
+        Enrollment.objects.create(student=cls.students[0], course=cls.course, academic_year=cls.academic_year)
+        WaitlistEntry.objects.bulk_create([
+            WaitlistEntry(offering=cls.offering, student=student) for student in cls.students[1:]
+        ])
+
+    def seats(self):
+        self.offering.refresh_from_db()
+        active = Enrollment.objects.filter(course=self.course, is_active=True).count()
+        return self.offering.seats_taken, active
+
+    def test_promotion_is_idempotent_and_stops_at_capacity(self):
+        report = promote_waitlisted([self.offering.pk], batch_size=1)
+        self.assertEqual(report['promoted'], 2)
+        self.assertEqual(self.seats(), (3, 3))
+        # The two longest-waiting students got the seats
+        self.assertEqual(
+            list(WaitlistEntry.objects.filter(status='promoted').order_by('id').values_list('student', flat=True)),
+            [self.students[1].pk, self.students[2].pk]
+        )
+
+        report = promote_waitlisted([self.offering.pk])
+        self.assertEqual((report['promoted'], report['removed']), (0, 0))
+        self.assertEqual(self.seats(), (3, 3))
+        self.assertEqual(WaitlistEntry.objects.filter(status='waiting').count(), 3)
+
+    @override_settings(WAITLIST_BACKGROUND_PROMOTION=True)
+    def test_lost_races_are_retried_then_requeued(self):
+        with mock.patch('academics.waitlist.time.sleep') as sleep, \
+                mock.patch('academics.waitlist._enqueue') as enqueue, \
+                mock.patch('academics.waitlist._promote_batch', side_effect=_QueueChanged):
+            report = promote_waitlisted([self.offering.pk])
+        self.assertEqual(report['retries'], PROMOTION_MAX_RETRIES)
+        self.assertEqual(report['requeued'], [self.offering.pk])
+        # Backing off: each pause twice the one before
+        delays = [call.args[0] for call in sleep.call_args_list]
+        self.assertEqual(delays, [delays[0] * 2 ** attempt for attempt in range(PROMOTION_MAX_RETRIES)])
+        enqueue.assert_called_once_with([self.offering.pk])
+        self.assertEqual(self.seats(), (1, 1))
+
+    def test_a_lost_race_is_retried(self):
+        real_batch = waitlist._promote_batch
+        calls = []
+
+        def lose_the_first_race(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise _QueueChanged
+            return real_batch(*args)
+
+        with mock.patch('academics.waitlist.time.sleep'), \
+                mock.patch('academics.waitlist._promote_batch', side_effect=lose_the_first_race):
+            report = promote_waitlisted([self.offering.pk])
+        self.assertEqual((report['retries'], report['requeued'], report['promoted']), (1, [], 2))
+        self.assertEqual(self.seats(), (3, 3))
@@ -0,0 +1,287 @@
+"""
+Timetable generation and session-based attendance checks.
+
+Every course assigned for an academic year needs theory_hours weekly theory
+sessions in lecture halls and practical_hours practical sessions in labs,
+in the term its semester runs in. generate_timetable() places them
+greedily, most constrained first (labs, then the largest classes), with no
+clashes:
+
+- a faculty member teaches one session at a time;
+- a room hosts one session at a time and fits the class;
+- no student has two sessions at once. The cohort is the course's
+  enrolled students, or its department and semester before anyone has
+  enrolled.
+
+Slots clash when they fall on the same day and their times overlap (9:00-
+10:00 and 9:30-10:30), not only when they are the same slot. Clashes are
+found through per-slot sets of busy faculty, rooms and students; a placed
+session marks every slot overlapping its own, so each placement costs a
+few set lookups per slot instead of a scan over every session placed so
+far. Soft preferences spread a course
+over different days and the load over slots. Existing sessions are kept
+(and block their slots) unless `replace` is set; sessions that cannot be
+placed are reported with the constraint that blocked them most often.
+
+Once a course has a timetable for the year, its attendance can only be
+marked on the weekdays it meets and, when the year has its second term's
+start date (AcademicYear.second_term_start), within the term its sessions
+are in. Courses without sessions are not checked.
+"""
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from django.db import transaction
+from .models import ClassSession, Course, CourseAssignment, Enrollment, Room, TimeSlot
+
+SESSION_ROOM_TYPES = {'theory': 'lecture', 'practical': 'lab'}
+
+
+class TimetableError(Exception):
+    """Raised when a timetable cannot be generated"""
+
+
+class _Demand:
+    """One session still to be placed"""
+    __slots__ = ('assignment_id', 'course', 'faculty_id', 'session_type', 'room_type', 'size', 'cohort')
+
+    def __init__(self, assignment, session_type, size, cohort):
+        self.assignment_id = assignment.pk
+        self.course = assignment.course
+        self.faculty_id = assignment.faculty_id
+        self.session_type = session_type
+        self.room_type = SESSION_ROOM_TYPES[session_type]
+        self.size = size
+        self.cohort = cohort
+
+
+def overlapping_slots(slots):
+    """Slot id -> ids of the slots on the same day whose times overlap it (itself included)"""
+    by_day = defaultdict(list)
+    for slot in slots:
+        by_day[slot.day_of_week].append(slot)
+    return {
+        slot.pk: [
+            other.pk for other in day_slots
+            if other.start_time < slot.end_time and slot.start_time < other.end_time
+        ]
+        for day_slots in by_day.values() for slot in day_slots
+    }
+
+
+class _Schedule:
+    """Per-slot conflict sets of one term's sessions"""
+
+    def __init__(self, overlaps):
+        self.overlaps = overlaps
+        self.faculty = defaultdict(set)
+        self.rooms = defaultdict(set)
+        self.students = defaultdict(set)
+        self.load = Counter()
+        self.course_days = defaultdict(Counter)
+
+    def add(self, slot, room_id, faculty_id, course_id, cohort):
+        # Busy in every slot that overlaps this one, so checks stay one lookup per slot
+        for slot_id in self.overlaps[slot.pk]:
+            self.faculty[slot_id].add(faculty_id)
+            self.rooms[slot_id].add(room_id)
+            self.students[slot_id].update(cohort)
+        self.load[slot.pk] += 1
+        self.course_days[course_id][slot.day_of_week] += 1
+
+
+def _cohorts(academic_year, courses):
+    """
+    Course id -> (cohort keys, class size).
+
+    The keys are the enrolled student ids, or (department, semester) for a
+    course nobody has enrolled in yet.
+    """
+    enrolled = defaultdict(set)
+    for course_id, student_id in Enrollment.objects.filter(
+        academic_year=academic_year, course__in=courses, is_active=True
+    ).values_list('course_id', 'student_id').iterator(chunk_size=5000):
+        enrolled[course_id].add(student_id)
+    cohorts = {}
+    for course in courses:
+        students = enrolled[course.pk]
+        if students:
+            cohorts[course.pk] = (frozenset(students), len(students))
+        else:
+            cohorts[course.pk] = (frozenset([('cohort', course.department_id, course.semester)]), 0)
+    return cohorts
+
+
+def _course_assignments(academic_year, term):
+    """One assignment per active course of the term: the coordinator's, else the earliest"""
+    assignments = {}
+    for assignment in CourseAssignment.objects.filter(
+        academic_year=academic_year, course__is_active=True
+    ).select_related('course').order_by('-is_course_coordinator', 'pk'):
+        course = assignment.course
+        if ClassSession.term_for_semester(course.semester) == term:
+            assignments.setdefault(course.pk, assignment)
+    return assignments
+
+
+def generate_timetable(academic_year, term, replace=False, dry_run=False):
+    """Place the missing sessions of one academic year and term; returns a report dict"""
+    started = time.perf_counter()
+    slots = list(TimeSlot.objects.order_by('day_of_week', 'start_time'))
+    rooms = list(Room.objects.filter(is_active=True).order_by('capacity', 'code'))
+    if not slots:
+        raise TimetableError('No time slots defined')
+    if not rooms:
+        raise TimetableError('No active rooms defined')
+    rooms_by_type = defaultdict(list)
+    for room in rooms:
+        rooms_by_type[room.room_type].append(room)
+    slots_by_id = {slot.pk: slot for slot in slots}
+
+    existing = ClassSession.objects.filter(academic_year=academic_year, term=term)
+    kept = [] if replace else list(existing.select_related('assignment__course'))
+    assignments = _course_assignments(academic_year, term)
+    courses = {assignment.course.pk: assignment.course for assignment in assignments.values()}
+    courses.update({session.assignment.course.pk: session.assignment.course for session in kept})
+    cohorts = _cohorts(academic_year, list(courses.values()))
+
+    schedule = _Schedule(overlapping_slots(slots))
+    placed_counts = Counter()
+    for session in kept:
+        course_id = session.assignment.course.pk
+        schedule.add(
+            slots_by_id[session.time_slot_id], session.room_id,
+            session.assignment.faculty_id, course_id, cohorts[course_id][0]
+        )
+        placed_counts[(course_id, session.session_type)] += 1
+
+    demands = []
+    for course_id, assignment in assignments.items():
+        course = assignment.course
+        cohort, size = cohorts[course_id]
+        for session_type, hours in (('theory', course.theory_hours), ('practical', course.practical_hours)):
+            for _ in range(max(0, hours - placed_counts[(course_id, session_type)])):
+                demands.append(_Demand(assignment, session_type, size, cohort))
+
+    with transaction.atomic():
+        if replace and not dry_run:
+            existing.delete()
+
+        # Most constrained first: scarce room types, then the largest classes
+        room_supply = {room_type: len(typed) for room_type, typed in rooms_by_type.items()}
+        demands.sort(key=lambda demand: (
+            room_supply.get(demand.room_type, 0), -demand.size, -len(demand.cohort), demand.course.code
+        ))
+
+        sessions = []
+        unplaced = []
+        for demand in demands:
+            candidates = rooms_by_type.get(demand.room_type, [])
+            candidates = [room for room in candidates if room.capacity >= demand.size]
+            blocked = Counter()
+            placed = False
+            # Prefer days the course does not meet on yet, then the emptiest slots
+            course_days = schedule.course_days[demand.course.pk]
+            for slot in sorted(slots, key=lambda slot: (course_days[slot.day_of_week], schedule.load[slot.pk])):
+                if demand.faculty_id in schedule.faculty[slot.pk]:
+                    blocked['faculty'] += 1
+                    continue
+                if not schedule.students[slot.pk].isdisjoint(demand.cohort):
+                    blocked['students'] += 1
+                    continue
+                busy_rooms = schedule.rooms[slot.pk]
+                room = next((room for room in candidates if room.pk not in busy_rooms), None)
+                if room is None:
+                    blocked['room'] += 1
+                    continue
+                schedule.add(slot, room.pk, demand.faculty_id, demand.course.pk, demand.cohort)
+                sessions.append(ClassSession(
+                    assignment_id=demand.assignment_id, time_slot=slot, room=room,
+                    session_type=demand.session_type, academic_year=academic_year, term=term
+                ))
+                placed = True
+                break
+            if not placed:
+                unplaced.append({
+                    'course': demand.course.code,
+                    'session_type': demand.session_type,
+                    'reason': blocked.most_common(1)[0][0] if blocked else 'room',
+                })
+
+        if not dry_run:
+            ClassSession.objects.bulk_create(sessions, batch_size=1000)
+
+    return {
+        'academic_year': str(academic_year),
+        'term': term,
+        'courses': len(assignments),
+        'requested': len(demands),
+        'placed': len(sessions),
+        'unplaced': unplaced,
+        'kept': sum(placed_counts.values()),
+        'dry_run': dry_run,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def find_session_clash(academic_year, term, time_slot, room, assignment, exclude_pk=None):
+    """Describe the clash a manually placed session would cause, or None"""
+    # Sessions in any slot of the same day whose times overlap this one
+    sessions = ClassSession.objects.filter(
+        academic_year=academic_year, term=term,
+        time_slot__day_of_week=time_slot.day_of_week,
+        time_slot__start_time__lt=time_slot.end_time,
+        time_slot__end_time__gt=time_slot.start_time
+    )
+    if exclude_pk is not None:
+        sessions = sessions.exclude(pk=exclude_pk)
+    if sessions.filter(room=room).exists():
+        return f'{room.code} is already booked at this time'
+    if sessions.filter(assignment__faculty_id=assignment.faculty_id).exists():
+        return 'The faculty member already teaches at this time'
+    students = Enrollment.objects.filter(
+        course_id=assignment.course_id, academic_year=academic_year, is_active=True
+    ).values('student_id')
+    if sessions.filter(
+        assignment__course__enrollments__academic_year=academic_year,
+        assignment__course__enrollments__is_active=True,
+        assignment__course__enrollments__student_id__in=students
+    ).exists():
+        return 'Students of this course already have a class at this time'
+    return None
+
+
+def get_session_days(course_id, academic_year):
+    """Terms and weekdays (date.weekday()) of the course's sessions in the academic year"""
+    days = ClassSession.objects.filter(
+        academic_year=academic_year, assignment__course_id=course_id
+    ).values_list('term', 'time_slot__day_of_week').distinct()
+    terms = {term for term, weekday in days}
+    weekdays = {weekday for term, weekday in days}
+    return terms, weekdays
+
+
+def get_term_dates(academic_year, term):
+    """(first, last) day of a term, or None while the year's second term has no start date"""
+    if academic_year.second_term_start is None:
+        return None
+    if term == 1:
+        return academic_year.start_date, academic_year.second_term_start - timedelta(days=1)
+    return academic_year.second_term_start, academic_year.end_date
+
+
+def check_attendance_date(course_id, date, academic_year):
+    """Error message when the course has a timetable and `date` is outside its term or on a day it doesn't meet"""
+    if academic_year is None:
+        return None
+    terms, weekdays = get_session_days(course_id, academic_year)
+    if not weekdays:
+        return None
+    bounds = [get_term_dates(academic_year, term) for term in sorted(terms)]
+    if None not in bounds and not any(first <= date <= last for first, last in bounds):
+        first, last = bounds[0]
+        return f'The course runs from {first} to {last} in {academic_year}'
+    if date.weekday() not in weekdays:
+        day = dict(TimeSlot.DAY_CHOICES)[date.weekday()]
+        return f'The course has no class session on {day}s'
+    return None
@@ -0,0 +1,127 @@
+"""
+Semester GPA and cumulative CGPA.
+
+A term is (academic year, course semester). Only graded enrollments count:
+grade_points set and grade not Incomplete/Withdrawn (F counts with 0 points).
+Per-term credits and quality points (grade_points * credits) are aggregated
+in the database; the running CGPA is then a single pass over the aggregated
+terms, in order, for each student.
+
+TranscriptSnapshot rows hold the results. A student's CGPA depends on every
+earlier term, so recomputation is done per student: a single grade change
+rebuilds that student's handful of rows (see academics.signals), while the
+batch mode rebuilds every student graded in an academic year.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import transaction
+from django.db.models import DecimalField, F, Q, Sum
+from .models import Enrollment, TranscriptSnapshot
+
+UNGRADED = ['I', 'W']
+GRADED = Q(grade_points__isnull=False) & ~Q(grade__in=UNGRADED)
+
+_CENT = Decimal('0.01')
+
+
+def _ratio(points, credits):
+    if not credits:
+        return None
+    return (Decimal(points) / credits).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def term_totals(enrollments):
+    """Credits and quality points per student and term, in transcript order"""
+    return (
+        enrollments.filter(GRADED)
+        .order_by()
+        .values('student_id', 'academic_year_id', 'course__semester')
+        .annotate(
+            credits=Sum('course__credits'),
+            quality_points=Sum(
+                F('grade_points') * F('course__credits'),
+                output_field=DecimalField(max_digits=10, decimal_places=2)
+            )
+        )
+        .order_by('student_id', 'academic_year__start_date', 'course__semester')
+    )
+
+
+def build_snapshots(totals):
+    """TranscriptSnapshot instances with running CGPA from ordered term totals"""
+    rows = []
+    student_id = None
+    cumulative_credits = 0
+    cumulative_points = Decimal(0)
+    for term in totals:
+        if term['student_id'] != student_id:
+            student_id = term['student_id']
+            cumulative_credits = 0
+            cumulative_points = Decimal(0)
+        points = Decimal(term['quality_points'] or 0).quantize(_CENT)
+        cumulative_credits += term['credits']
+        cumulative_points += points
+        rows.append(TranscriptSnapshot(
+            student_id=student_id,
+            academic_year_id=term['academic_year_id'],
+            semester=term['course__semester'],
+            credits=term['credits'],
+            quality_points=points,
+            gpa=_ratio(points, term['credits']),
+            cumulative_credits=cumulative_credits,
+            cumulative_quality_points=cumulative_points,
+            cgpa=_ratio(cumulative_points, cumulative_credits)
+        ))
+    return rows
+
+
+def rebuild_transcripts(academic_year=None, student_ids=None):
+    """
+    Recompute snapshots for the given students, or for every student with
+    an enrollment in `academic_year`, or for everyone.
+
+    All of a student's terms are rebuilt, since later CGPAs depend on the
+    earlier ones. Returns the number of snapshot rows written.
+    """
+    students = None
+    if student_ids is not None:
+        students = list(student_ids)
+    elif academic_year is not None:
+        students = Enrollment.objects.filter(academic_year=academic_year).values('student_id')
+
+    enrollments = Enrollment.objects.all()
+    snapshots = TranscriptSnapshot.objects.all()
+    if students is not None:
+        enrollments = enrollments.filter(student_id__in=students)
+        snapshots = snapshots.filter(student_id__in=students)
+
+    rows = build_snapshots(term_totals(enrollments).iterator())
+    with transaction.atomic():
+        snapshots.delete()
+        TranscriptSnapshot.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def rebuild_student_transcript(student_id):
+    return rebuild_transcripts(student_ids=[student_id])
+
+
+def get_transcript_courses(student_id):
+    """Graded course lines of a student, keyed by (academic_year_id, semester)"""
+    lines = (
+        Enrollment.objects.filter(GRADED, student_id=student_id)
+        .order_by('course__code')
+        .values(
+            'academic_year_id', 'course__semester', 'course__code', 'course__name',
+            'course__credits', 'grade', 'grade_points'
+        )
+    )
+    courses = {}
+    for line in lines:
+        courses.setdefault((line['academic_year_id'], line['course__semester']), []).append({
+            'code': line['course__code'],
+            'name': line['course__name'],
+            'credits': line['course__credits'],
+            'grade': line['grade'],
+            'grade_points': str(line['grade_points']),
+        })
+    return courses
@@ -1,15 +1,44 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'departments', views.DepartmentViewSet)
 router.register(r'academic-years', views.AcademicYearViewSet)
 router.register(r'courses', views.CourseViewSet)
+router.register(r'offerings', views.CourseOfferingViewSet)
 router.register(r'enrollments', views.EnrollmentViewSet)
+router.register(r'waitlist', views.WaitlistEntryViewSet)
 router.register(r'assignments', views.CourseAssignmentViewSet)
+router.register(r'rooms', views.RoomViewSet)
+router.register(r'time-slots', views.TimeSlotViewSet)
+router.register(r'sessions', views.ClassSessionViewSet)
 router.register(r'attendance', views.AttendanceViewSet)
+router.register(r'attendance-summary', views.AttendanceSummaryViewSet)
+router.register(r'exports', views.AnalyticsExportViewSet)
 
 urlpatterns = [
+    # Async read endpoints (served natively under ASGI)
+    path('async/academic-years/current/', async_views.current_academic_year, name='async-academic-year-current'),
+    path('async/courses/', async_views.course_list, name='async-course-list'),
+    path('async/enrollments/mine/', async_views.my_enrollments, name='async-my-enrollments'),
+    path('async/attendance/mine/', async_views.my_attendance, name='async-my-attendance'),
+    path('async/attendance-summary/', async_views.attendance_summaries, name='async-attendance-summary'),
+    # Attendance analytics only has list-level actions, so it gets explicit routes
+    path(
+        'attendance-analytics/courses/',
+        views.AttendanceAnalyticsViewSet.as_view({'get': 'courses'}),
+        name='attendance-analytics-courses'
+    ),
+    path(
+        'attendance-analytics/departments/',
+        views.AttendanceAnalyticsViewSet.as_view({'get': 'departments'}),
+        name='attendance-analytics-departments'
+    ),
+    path(
+        'attendance-analytics/at_risk/',
+        views.AttendanceAnalyticsViewSet.as_view({'get': 'at_risk'}),
+        name='attendance-analytics-at-risk'
+    ),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,14 +1,83 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import F, Value
+from django.http import FileResponse, Http404
 from django.utils import timezone
-from .models import Department, AcademicYear, Course, Enrollment, CourseAssignment, Attendance
+from accounts.models import StudentProfile
+from core.mixins import ConditionalGetMixin, EagerLoadingViewSetMixin, StreamingListMixin
+from .models import (
+    Department, AcademicYear, Course, CourseOffering, Enrollment, CourseAssignment, Attendance,
+    AttendanceSummary, AnalyticsExport, Room, TimeSlot, ClassSession, WaitlistEntry
+)
 from .serializers import (
     DepartmentSerializer, AcademicYearSerializer, CourseSerializer,
-    EnrollmentSerializer, CourseAssignmentSerializer, AttendanceSerializer
+    EnrollmentSerializer, CourseAssignmentSerializer, AttendanceSerializer,
+    BulkAttendanceSerializer, CourseQuerySerializer, AttendanceQuerySerializer, AttendanceSummarySerializer,
+    AnalyticsExportSerializer,
+    RoomSerializer, TimeSlotSerializer, ClassSessionSerializer, GenerateTimetableSerializer,
+    CourseOfferingSerializer, RegistrationSerializer, WaitlistEntrySerializer
 )
+from .analytics import get_attendance_analytics
+from .archive import ArchiveError, ArchivedRecords, find_archived_record
+from .exports import ExportError, create_export, get_export_path, submit_export
+from .cache import bump_version, get_current_academic_year, get_last_modified, get_versions
+from .grade_import import GradeImport, GradeImportError, iter_rows
+from .pagination import AttendanceCursorPagination, EnrollmentCursorPagination
+from .registration import RegistrationError, register_courses
+from .rollups import academic_year_for_date, get_shortage_threshold, rebuild_attendance_summaries
+from .scope import get_assigned_course_ids, is_assigned_to_course, resolve_scope_year_id
+from .timetable import TimetableError, check_attendance_date, generate_timetable
+from .waitlist import join_waitlist, with_positions
+
+class ReferenceConditionalMixin(ConditionalGetMixin):
+    """Conditional GETs validated by the reference-cache table versions"""
+    
+    def get_dependencies(self):
+        """Model labels the rendered response reads, including the serializer's live fields"""
+        serializer_class = self.get_serializer_class()
+        return getattr(serializer_class, 'conditional_dependencies', serializer_class.cache_dependencies)
+    
+    def get_etag(self, request):
+        return get_versions(*self.get_dependencies())
+    
+    def get_last_modified(self, request):
+        return get_last_modified(*self.get_dependencies())
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class RegistrationTargetMixin:
+    """Resolves who registers (a student themselves, or an admin on their behalf) and for which year"""
+    
+    def get_registration_target(self, request, data):
+        """(student, academic year, None), or (None, None, error response)"""
+        user = request.user
+        if user.user_type == 'student':
+            student = StudentProfile.objects.filter(user=user).first()
+        elif user.user_type == 'admin' or user.is_staff:
+            student_id = data.get('student_id')
+            student = StudentProfile.objects.filter(pk=student_id).first() if student_id else None
+        else:
+            return None, None, Response(
+                {'error': 'Only students and admins can register for courses'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        if student is None:
+            return None, None, Response(
+                {'error': 'Student not found'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        academic_year = data.get('academic_year') or get_current_academic_year()
+        if academic_year is None:
+            return None, None, Response(
+                {'error': 'No current academic year'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return student, academic_year, None
+
+class DepartmentViewSet(ReferenceConditionalMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for Department model"""
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
@@ -22,7 +91,7 @@ class DepartmentViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
 
-class AcademicYearViewSet(viewsets.ModelViewSet):
+class AcademicYearViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for Academic Year model"""
     queryset = AcademicYear.objects.all()
     serializer_class = AcademicYearSerializer
@@ -39,17 +108,16 @@ class AcademicYearViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def current(self, request):
         """Get current academic year"""
-        try:
-            current_year = AcademicYear.objects.get(is_current=True)
-            serializer = self.get_serializer(current_year)
-            return Response(serializer.data)
-        except AcademicYear.DoesNotExist:
+        current_year = get_current_academic_year()
+        if current_year is None:
             return Response(
                 {'error': 'No current academic year set'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        serializer = self.get_serializer(current_year)
+        return Response(serializer.data)
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ReferenceConditionalMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for Course model"""
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
@@ -64,26 +132,55 @@ class CourseViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        """Filter courses based on query parameters"""
+        """Filter courses by ?department= and ?semester= (a 400 on bad values)"""
         queryset = Course.objects.filter(is_active=True)
+        filters = CourseQuerySerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        for param, lookup in (('department', 'department_id'), ('semester', 'semester')):
+            value = filters.validated_data.get(param)
+            if value:
+                queryset = queryset.filter(**{lookup: value})
+        return queryset
+
+class CourseOfferingViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
+    """Courses open for registration, with their seats (current year unless ?academic_year= is given)"""
+    queryset = CourseOffering.objects.all()
+    serializer_class = CourseOfferingSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_permissions(self):
+        """Admin only for CUD operations"""
+        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+            permission_classes = [permissions.IsAdminUser]
+        else:
+            permission_classes = [permissions.IsAuthenticated]
+        return [permission() for permission in permission_classes]
+    
+    def get_queryset(self):
+        """Filter offerings by ?department=, ?semester= and ?open=true"""
+        queryset = CourseOffering.objects.filter(course__is_active=True).order_by('course__code')
+        if self.action == 'list':
+            year_id = resolve_scope_year_id(self.request)
+            if year_id is not None:
+                queryset = queryset.filter(academic_year_id=year_id)
         
-        # Filter by department
-        department_id = self.request.query_params.get('department')
-        if department_id:
-            queryset = queryset.filter(department_id=department_id)
-        
-        # Filter by semester
-        semester = self.request.query_params.get('semester')
-        if semester:
-            queryset = queryset.filter(semester=semester)
-        
+        params = self.request.query_params
+        for param, lookup in (('department', 'course__department_id'), ('semester', 'course__semester')):
+            value = params.get(param)
+            if value:
+                if not value.isdigit():
+                    return queryset.none()
+                queryset = queryset.filter(**{lookup: value})
+        if params.get('open', '').lower() in ('1', 'true', 'yes'):
+            queryset = queryset.filter(is_open=True)
         return queryset
 
-class EnrollmentViewSet(viewsets.ModelViewSet):
+class EnrollmentViewSet(RegistrationTargetMixin, EagerLoadingViewSetMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ViewSet for Enrollment model"""
     queryset = Enrollment.objects.all()
     serializer_class = EnrollmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = EnrollmentCursorPagination
     
     def get_queryset(self):
         """Filter enrollments based on user type"""
@@ -94,31 +191,223 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
             # Students see only their enrollments
             queryset = queryset.filter(student__user=user)
         elif user.user_type == 'faculty':
-            # Faculty see enrollments for their assigned courses
-            assigned_courses = CourseAssignment.objects.filter(
-                faculty__user=user
-            ).values_list('course', flat=True)
-            queryset = queryset.filter(course__in=assigned_courses)
+            # Faculty see enrollments for the courses they teach this year
+            queryset = queryset.filter(course_id__in=get_assigned_course_ids(self.request))
         
         return queryset
     
+    def create(self, request, *args, **kwargs):
+        """Register for one course; goes through the same checks and seat reservation as register"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        academic_year = AcademicYear.objects.filter(pk=data['academic_year_id']).first()
+        if academic_year is None:
+            return Response(
+                {'error': 'Academic year not found'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        student, academic_year, error = self.get_registration_target(
+            request, {'student_id': data['student_id'], 'academic_year': academic_year}
+        )
+        if error:
+            return error
+    
+        try:
+            enrollments = register_courses(student, academic_year, [data['course_id']])
+        except RegistrationError as exc:
+            return Response(
+                {'error': str(exc), 'errors': exc.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+        enrollment = self.setup_eager_loading(enrollments).get()
+        return Response(self.get_serializer(enrollment).data, status=status.HTTP_201_CREATED)
+    
     @action(detail=False, methods=['get'])
     def my_enrollments(self, request):
-        """Get current student's enrollments"""
+        """Get current student's enrollments (paginated, or streamed with ?stream=true)"""
         if request.user.user_type != 'student':
             return Response(
                 {'error': 'Only students can access this endpoint'}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        enrollments = Enrollment.objects.filter(
+        enrollments = self.setup_eager_loading(Enrollment.objects.filter(
             student__user=request.user, 
             is_active=True
+        )).order_by('-enrollment_date', '-id')
+        return self.get_list_response(enrollments)
+    
+    @action(detail=False, methods=['post'])
+    def register(self, request):
+        """Register for a whole cart of courses at once (all or nothing)"""
+        serializer = RegistrationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        student, academic_year, error = self.get_registration_target(request, serializer.validated_data)
+        if error:
+            return error
+        
+        try:
+            enrollments = register_courses(student, academic_year, serializer.validated_data['course_ids'])
+        except RegistrationError as exc:
+            return Response(
+                {'error': str(exc), 'errors': exc.errors}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        enrollments = self.setup_eager_loading(enrollments)
+        return Response(
+            self.get_serializer(enrollments, many=True).data,
+            status=status.HTTP_201_CREATED
         )
-        serializer = self.get_serializer(enrollments, many=True)
-        return Response(serializer.data)
+    
+    @action(detail=True, methods=['post'])
+    def drop(self, request, pk=None):
+        """Drop an enrollment; the freed seat goes to the course's waitlist"""
+        user = request.user
+        if user.user_type not in ('student', 'admin') and not user.is_staff:
+            return Response(
+                {'error': 'Only students and admins can drop enrollments'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        enrollment = self.get_object()
+        if not enrollment.is_active:
+            return Response(
+                {'error': 'The enrollment is already dropped'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if enrollment.grade:
+            return Response(
+                {'error': 'Graded enrollments cannot be dropped'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # save() runs the signals that free the seat and queue waitlist promotion
+        enrollment.is_active = False
+        enrollment.save(update_fields=['is_active', 'updated_at'])
+        return Response(self.get_serializer(enrollment).data)
+    
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def import_grades(self, request):
+        """Set grades from an uploaded CSV/XLSX file (all rows or none are applied)"""
+        user = request.user
+        if user.user_type not in ('faculty', 'admin') and not user.is_staff:
+            return Response(
+                {'error': 'Only faculty and admins can import grades'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'error': 'Upload the grades as "file"'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        academic_year_id = request.data.get('academic_year')
+        if academic_year_id:
+            academic_year = AcademicYear.objects.filter(pk=academic_year_id).first()
+        else:
+            academic_year = get_current_academic_year()
+        if academic_year is None:
+            return Response(
+                {'error': 'Academic year not found'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        course = None
+        if request.data.get('course'):
+            course = Course.objects.filter(pk=request.data['course']).first()
+            if course is None:
+                return Response(
+                    {'error': 'Course not found'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        allowed_course_ids = None
+        if user.user_type == 'faculty':
+            allowed_course_ids = get_assigned_course_ids(request, academic_year.pk)
+        
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        grade_import = GradeImport(academic_year, course=course, allowed_course_ids=allowed_course_ids)
+        try:
+            report = grade_import.run(iter_rows(upload, upload.name), dry_run=dry_run)
+        except GradeImportError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(
+            report,
+            status=status.HTTP_400_BAD_REQUEST if report['errors'] else status.HTTP_200_OK
+        )
+
+class WaitlistEntryViewSet(RegistrationTargetMixin, EagerLoadingViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """Waitlists of full course offerings; seats are handed out by academics.waitlist"""
+    queryset = WaitlistEntry.objects.all()
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """Filter entries by user type, ?course= and ?status="""
+        user = self.request.user
+        queryset = with_positions(WaitlistEntry.objects.order_by('offering_id', '-priority', 'id'))
+        
+        if user.user_type == 'student':
+            # Students see only their own entries
+            queryset = queryset.filter(student__user=user)
+        elif user.user_type == 'faculty':
+            # Faculty see the queues of the courses they teach
+            queryset = queryset.filter(offering__course_id__in=get_assigned_course_ids(self.request))
+        
+        params = self.request.query_params
+        course = params.get('course')
+        if course:
+            if not course.isdigit():
+                return queryset.none()
+            queryset = queryset.filter(offering__course_id=course)
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        return queryset
+    
+    def create(self, request, *args, **kwargs):
+        """Join the waitlist of a full course"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        student, academic_year, error = self.get_registration_target(request, serializer.validated_data)
+        if error:
+            return error
+        
+        # Only admins set priorities; students join at the default
+        priority = serializer.validated_data.get('priority', 0) if request.user.user_type != 'student' else 0
+        try:
+            entry = join_waitlist(student, academic_year, serializer.validated_data['course_id'], priority=priority)
+        except RegistrationError as exc:
+            return Response(
+                {'error': str(exc), 'errors': exc.errors}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        entry = self.filter_queryset(self.get_queryset()).get(pk=entry.pk)
+        return Response(self.get_serializer(entry).data, status=status.HTTP_201_CREATED)
+    
+    def destroy(self, request, *args, **kwargs):
+        """Leave the waitlist (the entry is kept as removed)"""
+        entry = self.get_object()
+        if request.user.user_type == 'faculty':
+            return Response(
+                {'error': 'Faculty cannot change waitlists'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        if entry.status != 'waiting':
+            return Response(
+                {'error': f'The entry is already {entry.status}'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        WaitlistEntry.objects.filter(pk=entry.pk, status='waiting').update(
+            status='removed', reason='Left the waitlist', resolved_at=timezone.now()
+        )
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-class CourseAssignmentViewSet(viewsets.ModelViewSet):
+class CourseAssignmentViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for Course Assignment model"""
     queryset = CourseAssignment.objects.all()
     serializer_class = CourseAssignmentSerializer
@@ -143,11 +432,114 @@ class CourseAssignmentViewSet(viewsets.ModelViewSet):
         
         return queryset
 
-class AttendanceViewSet(viewsets.ModelViewSet):
+class RoomViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
+    """ViewSet for Room model"""
+    queryset = Room.objects.all()
+    serializer_class = RoomSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_permissions(self):
+        """Admin only for CUD operations"""
+        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+            permission_classes = [permissions.IsAdminUser]
+        else:
+            permission_classes = [permissions.IsAuthenticated]
+        return [permission() for permission in permission_classes]
+
+class TimeSlotViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
+    """ViewSet for TimeSlot model"""
+    queryset = TimeSlot.objects.all()
+    serializer_class = TimeSlotSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_permissions(self):
+        """Admin only for CUD operations"""
+        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+            permission_classes = [permissions.IsAdminUser]
+        else:
+            permission_classes = [permissions.IsAuthenticated]
+        return [permission() for permission in permission_classes]
+
+class ClassSessionViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
+    """Timetable sessions of one academic year (the current one unless ?academic_year= is given)"""
+    queryset = ClassSession.objects.all()
+    serializer_class = ClassSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_permissions(self):
+        """Admin only for CUD operations and generation"""
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'generate']:
+            permission_classes = [permissions.IsAdminUser]
+        else:
+            permission_classes = [permissions.IsAuthenticated]
+        return [permission() for permission in permission_classes]
+    
+    def get_queryset(self):
+        """Filter sessions by user type and by ?term=, ?course= and ?room="""
+        user = self.request.user
+        queryset = ClassSession.objects.order_by('time_slot__day_of_week', 'time_slot__start_time', 'room__code')
+        
+        year_id = resolve_scope_year_id(self.request)
+        if year_id is not None:
+            queryset = queryset.filter(academic_year_id=year_id)
+        if user.user_type == 'student':
+            # Students see the sessions of the courses they are enrolled in
+            queryset = queryset.filter(
+                assignment__course__enrollments__student__user=user,
+                assignment__course__enrollments__academic_year=F('academic_year'),
+                assignment__course__enrollments__is_active=True
+            )
+        elif user.user_type == 'faculty':
+            # Faculty see the sessions they teach
+            queryset = queryset.filter(assignment__faculty__user=user)
+        
+        params = self.request.query_params
+        for param, lookup in (('term', 'term'), ('course', 'assignment__course_id'), ('room', 'room_id')):
+            value = params.get(param)
+            if value:
+                if not value.isdigit():
+                    return queryset.none()
+                queryset = queryset.filter(**{lookup: value})
+        return queryset
+    
+    @action(detail=False, methods=['post'])
+    def generate(self, request):
+        """Place the missing sessions of one term without clashes (admin only)"""
+        serializer = GenerateTimetableSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        academic_year = serializer.validated_data.get('academic_year') or get_current_academic_year()
+        if academic_year is None:
+            return Response(
+                {'error': 'No current academic year'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            report = generate_timetable(
+                academic_year,
+                serializer.validated_data['term'],
+                replace=serializer.validated_data['replace'],
+                dry_run=serializer.validated_data['dry_run']
+            )
+        except TimetableError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
+class AttendanceQueryMixin:
+    """Validated ?course=, ?student= and ?academic_year= (a 400 on bad values)"""
+    
+    def get_query_filters(self):
+        if not hasattr(self, '_query_filters'):
+            serializer = AttendanceQuerySerializer(data=self.request.query_params)
+            serializer.is_valid(raise_exception=True)
+            self._query_filters = serializer.validated_data
+        return self._query_filters
+
+class AttendanceViewSet(AttendanceQueryMixin, EagerLoadingViewSetMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ViewSet for Attendance model"""
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AttendanceCursorPagination
     
     def get_queryset(self):
         """Filter attendance based on user type"""
@@ -158,23 +550,385 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             # Students see only their attendance
             queryset = queryset.filter(student__user=user)
         elif user.user_type == 'faculty':
-            # Faculty see attendance for their assigned courses
-            assigned_courses = CourseAssignment.objects.filter(
-                faculty__user=user
-            ).values_list('course', flat=True)
-            queryset = queryset.filter(course__in=assigned_courses)
+            # Faculty see attendance for the courses they teach this year
+            # (or in the year given with ?academic_year=)
+            queryset = queryset.filter(course_id__in=get_assigned_course_ids(self.request))
         
-        return queryset.order_by('-date')
+        return self.filter_by_params(queryset).order_by('-date', '-id')
+    
+    def get_requested_academic_year(self):
+        """AcademicYear given with ?academic_year=, or None"""
+        if not hasattr(self, '_requested_academic_year'):
+            year_id = self.get_query_filters().get('academic_year')
+            self._requested_academic_year = (
+                AcademicYear.objects.filter(pk=year_id).first() if year_id else None
+            )
+        return self._requested_academic_year
+    
+    def filter_by_params(self, queryset):
+        """Apply the ?academic_year=, ?course= and ?student= filters to live attendance"""
+        filters = self.get_query_filters()
+        if 'academic_year' in filters:
+            academic_year = self.get_requested_academic_year()
+            if academic_year is None:
+                return queryset.none()
+            queryset = queryset.filter(
+                date__gte=academic_year.start_date,
+                date__lte=academic_year.end_date
+            )
+        if 'course' in filters:
+            queryset = queryset.filter(course_id=filters['course'])
+        if 'student' in filters:
+            queryset = queryset.filter(student_id=filters['student'])
+        return queryset
+    
+    def get_archived_response(self, academic_year):
+        """Page of an archived year's attendance, scoped like get_queryset() plus a course or student"""
+        user = self.request.user
+        course_ids = None
+        student_id = None
+        if user.user_type == 'student':
+            student_id = StudentProfile.objects.filter(user=user).values_list('pk', flat=True).first() or 0
+        elif user.user_type == 'faculty':
+            course_ids = get_assigned_course_ids(self.request, academic_year.pk)
+        
+        filters = self.get_query_filters()
+        if 'course' in filters:
+            course_ids = {filters['course']} if course_ids is None else course_ids & {filters['course']}
+        if 'student' in filters and student_id is None:
+            student_id = filters['student']
+        
+        try:
+            records = ArchivedRecords(academic_year, course_ids=course_ids, student_id=student_id)
+        except ArchiveError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        # Archived years are paginated by page number (?page=), by course and then newest first
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(records, self.request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        serializer.child.load_related(page)
+        return paginator.get_paginated_response(serializer.data)
+    
+    def list(self, request, *args, **kwargs):
+        """Attendance feed; archived years (?academic_year=) are read from the archive"""
+        academic_year = self.get_requested_academic_year()
+        if academic_year is not None and academic_year.attendance_archived:
+            return self.get_archived_response(academic_year)
+        return super().list(request, *args, **kwargs)
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Single record, falling back to the archive for records of archived years"""
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            pk = kwargs.get(self.lookup_field, '')
+            found = find_archived_record(int(pk)) if str(pk).isdigit() else None
+            if found is None or not self.can_view_archived(*found):
+                raise
+        
+        record = found[1]
+        serializer = self.get_serializer(record)
+        serializer.load_related([record])
+        return Response(serializer.data)
+    
+    def can_view_archived(self, academic_year_id, record):
+        user = self.request.user
+        if user.user_type == 'student':
+            return StudentProfile.objects.filter(pk=record.student_id, user=user).exists()
+        if user.user_type == 'faculty':
+            return record.course_id in get_assigned_course_ids(self.request, academic_year_id)
+        return True
     
     @action(detail=False, methods=['get'])
     def my_attendance(self, request):
-        """Get current student's attendance"""
+        """Get current student's attendance (paginated, or streamed with ?stream=true)"""
         if request.user.user_type != 'student':
             return Response(
                 {'error': 'Only students can access this endpoint'}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        attendance = Attendance.objects.filter(student__user=request.user)
-        serializer = self.get_serializer(attendance, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        academic_year = self.get_requested_academic_year()
+        if academic_year is not None and academic_year.attendance_archived:
+            return self.get_archived_response(academic_year)
+        
+        attendance = self.setup_eager_loading(self.filter_by_params(
+            Attendance.objects.filter(student__user=request.user)
+        )).order_by('-date', '-id')
+        return self.get_list_response(attendance)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_mark(self, request):
+        """Mark attendance for a whole class session in one request"""
+        user = request.user
+        if user.user_type not in ('faculty', 'admin') and not user.is_staff:
+            return Response(
+                {'error': 'Only faculty and admins can mark attendance'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = BulkAttendanceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        course_id = serializer.validated_data['course_id']
+        date = serializer.validated_data['date']
+        records = serializer.validated_data['records']
+        
+        academic_year = academic_year_for_date(date)
+        if academic_year is not None and academic_year.attendance_archived:
+            return Response(
+                {'error': f'Attendance for {academic_year} is archived and read-only'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        session_error = check_attendance_date(course_id, date, academic_year)
+        if session_error:
+            return Response({'error': session_error}, status=status.HTTP_400_BAD_REQUEST)
+        # Admins and staff without a faculty profile are recorded as marked_by=None
+        marked_by = getattr(user, 'faculty_profile', None)
+        if user.user_type == 'faculty':
+            if marked_by is None:
+                return Response(
+                    {'error': 'Faculty profile not found'}, 
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            if not is_assigned_to_course(
+                request, course_id, academic_year.pk if academic_year else None
+            ):
+                return Response(
+                    {'error': 'You are not assigned to this course'}, 
+                    status=status.HTTP_403_FORBIDDEN
+                )
+        
+        rows = [
+            Attendance(
+                student_id=record['student_id'],
+                course_id=course_id,
+                date=date,
+                is_present=record['is_present'],
+                remarks=record['remarks'],
+                marked_by=marked_by
+            )
+            for record in records
+        ]
+        with transaction.atomic():
+            Attendance.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['student', 'course', 'date'],
+                update_fields=['is_present', 'remarks', 'marked_by', 'updated_at']
+            )
+            # bulk_create skips the signals that maintain the rollups
+            if academic_year is not None:
+                rebuild_attendance_summaries(
+                    academic_year,
+                    course_ids=[course_id],
+                    student_ids=[record['student_id'] for record in records]
+                )
+            bump_version('academics.Attendance')
+        
+        present = sum(1 for record in records if record['is_present'])
+        return Response({
+            'course_id': course_id,
+            'date': date,
+            'marked': len(records),
+            'present': present,
+            'absent': len(records) - present
+        })
+
+class AttendanceSummaryViewSet(AttendanceQueryMixin, EagerLoadingViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """Read-only attendance percentages served from the rollup table"""
+    queryset = AttendanceSummary.objects.all()
+    serializer_class = AttendanceSummarySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """Filter summaries based on user type and query parameters"""
+        user = self.request.user
+        queryset = AttendanceSummary.objects.all()
+        
+        if user.user_type == 'student':
+            queryset = queryset.filter(student__user=user)
+        elif user.user_type == 'faculty':
+            queryset = queryset.filter(course_id__in=get_assigned_course_ids(self.request))
+        
+        filters = self.get_query_filters()
+        if 'course' in filters:
+            queryset = queryset.filter(course_id=filters['course'])
+        if 'academic_year' in filters:
+            queryset = queryset.filter(academic_year_id=filters['academic_year'])
+        if 'student' in filters:
+            queryset = queryset.filter(student_id=filters['student'])
+        
+        return queryset.order_by('course_id', 'student_id')
+    
+    @action(detail=False, methods=['get'])
+    def shortage(self, request):
+        """List students whose attendance is below the threshold (default 75%)"""
+        try:
+            threshold = float(request.query_params.get('threshold', get_shortage_threshold()))
+        except ValueError:
+            return Response(
+                {'error': 'threshold must be a number'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # present / total < threshold / 100, rewritten without division for the database
+        queryset = self.filter_queryset(self.get_queryset()).alias(
+            present_x100=F('present_count') * 100,
+            total_x_threshold=F('total_count') * Value(threshold)
+        ).filter(total_count__gt=0, present_x100__lt=F('total_x_threshold'))
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+class AttendanceAnalyticsViewSet(viewsets.ViewSet):
+    """Attendance trends and early-warning lists computed by academics.analytics"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_analytics(self, request):
+        """(analytics, None) for ?academic_year= or the current year, else (None, error response)"""
+        user = request.user
+        if user.user_type not in ('faculty', 'admin') and not user.is_staff:
+            return None, Response(
+                {'error': 'Only faculty and admins can access attendance analytics'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        year_id = request.query_params.get('academic_year')
+        if year_id:
+            academic_year = AcademicYear.objects.filter(pk=year_id).first() if year_id.isdigit() else None
+        else:
+            academic_year = get_current_academic_year()
+        if academic_year is None:
+            return None, Response(
+                {'error': 'Academic year not found'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return get_attendance_analytics(academic_year), None
+    
+    def get_course_scope(self, request, analytics):
+        """Faculty only see the courses they teach in the analysed year; None means all"""
+        if request.user.user_type == 'faculty':
+            return get_assigned_course_ids(request, analytics['academic_year'])
+        return None
+    
+    @action(detail=False, methods=['get'])
+    def courses(self, request):
+        """Weekly attendance per course (filters: department, course)"""
+        analytics, error = self.get_analytics(request)
+        if error:
+            return error
+        
+        scope = self.get_course_scope(request, analytics)
+        department_id = request.query_params.get('department')
+        course_id = request.query_params.get('course')
+        rows = [
+            row for row in analytics['courses']
+            if (scope is None or row['course_id'] in scope)
+            and (not department_id or str(row['department_id']) == department_id)
+            and (not course_id or str(row['course_id']) == course_id)
+        ]
+        return Response({
+            'academic_year': analytics['academic_year'],
+            'window': analytics['window'],
+            'computed_at': analytics['computed_at'],
+            'results': rows
+        })
+    
+    @action(detail=False, methods=['get'])
+    def departments(self, request):
+        """Weekly attendance per department"""
+        analytics, error = self.get_analytics(request)
+        if error:
+            return error
+        
+        return Response({
+            'academic_year': analytics['academic_year'],
+            'window': analytics['window'],
+            'computed_at': analytics['computed_at'],
+            'results': analytics['departments']
+        })
+    
+    @action(detail=False, methods=['get'])
+    def at_risk(self, request):
+        """Students below the shortage threshold or whose recent attendance dropped, per course (paginated)"""
+        analytics, error = self.get_analytics(request)
+        if error:
+            return error
+        
+        rows = analytics['at_risk']
+        scope = self.get_course_scope(request, analytics)
+        course_id = request.query_params.get('course')
+        rows = [
+            row for row in rows
+            if (scope is None or row['course_id'] in scope)
+            and (not course_id or str(row['course_id']) == course_id)
+        ]
+        flag = request.query_params.get('flag')
+        if flag:
+            rows = [row for row in rows if flag in row['flags']]
+        
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        profiles = {
+            profile['id']: profile for profile in StudentProfile.objects.filter(
+                pk__in=[row['student_id'] for row in page]
+            ).values('id', 'student_id', 'user__first_name', 'user__last_name')
+        }
+        results = []
+        for row in page:
+            profile = profiles.get(row['student_id'], {})
+            results.append({
+                **row,
+                'student_number': profile.get('student_id'),
+                'name': f"{profile.get('user__first_name', '')} {profile.get('user__last_name', '')}".strip(),
+            })
+        response = paginator.get_paginated_response(results)
+        response.data.update({
+            'threshold': analytics['threshold'],
+            'drop': analytics['drop'],
+            'recent_weeks': analytics['recent_weeks'],
+            'computed_at': analytics['computed_at'],
+        })
+        return response
+
+class AnalyticsExportViewSet(viewsets.ReadOnlyModelViewSet):
+    """Columnar analytics exports, run as background jobs (admin only)"""
+    queryset = AnalyticsExport.objects.all()
+    serializer_class = AnalyticsExportSerializer
+    permission_classes = [permissions.IsAdminUser]
+    
+    def create(self, request, *args, **kwargs):
+        """Start an export of the rows changed since the last one (or all rows with full=true)"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            job = create_export(
+                academic_year=serializer.validated_data.get('academic_year'),
+                fmt=serializer.validated_data.get('format'),
+                full=serializer.validated_data['full'],
+                requested_by=request.user
+            )
+        except ExportError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        submit_export(job)
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download one dataset file of a completed export (?dataset=attendance)"""
+        job = self.get_object()
+        dataset = request.query_params.get('dataset', '')
+        path = get_export_path(job, dataset)
+        if path is None or not path.exists():
+            return Response(
+                {'error': f'No {dataset or "dataset"} file for this export'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return FileResponse(
+            open(path, 'rb'), as_attachment=True, filename=f'export-{job.pk}-{path.name}'
+        )
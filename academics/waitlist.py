@@ -0,0 +1,250 @@
+"""
+Course waitlists and background seat promotion.
+
+A student who finds an offering full joins its waitlist (join_waitlist()).
+The queue is served highest priority first, then in arrival order, and
+registration treats an offering with a queue as full, so freed seats go to
+the queue first.
+
+When a seat frees up (an Enrollment is deactivated or deleted, or an
+offering is saved with more capacity), request_promotion() queues the
+offering once the transaction commits. Queued offering ids are collected
+in an in-process pending set that a single worker thread drains, so a
+burst of drops costs one promotion run per offering, not one per drop.
+
+promote_waitlisted() fills an offering's free seats from the head of its
+queue, PROMOTION_BATCH_SIZE entries per transaction and a fixed number of
+queries per batch. Entries whose student has enrolled since, or would go
+over the credit limit, leave the queue as 'removed'; the rest are enrolled
+and marked 'promoted' in the same transaction. Only waiting entries and
+free seats are acted on, so a repeated or concurrent run changes nothing
+twice. A batch that loses a race with another run is retried after a
+growing pause, up to PROMOTION_MAX_RETRIES times; then the offering is
+queued again for the worker rather than retried in a loop.
+`manage.py promote_waitlist` sweeps every offering, for runs lost to a
+restart.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .cache import bump_version
+from .models import ClassSession, Course, CourseOffering, Enrollment, WaitlistEntry
+from .registration import HAS_SEAT, RegistrationError, check_cart, get_max_credits, lock_cart
+
+logger = logging.getLogger(__name__)
+
+PROMOTION_BATCH_SIZE = 500
+PROMOTION_MAX_RETRIES = 5
+# Seconds before the first retry of a batch; doubled for each retry after it
+PROMOTION_RETRY_DELAY = 0.05
+
+
+def join_waitlist(student, academic_year, course_id, priority=0):
+    """Queue `student` for a full course; raises RegistrationError"""
+    try:
+        with transaction.atomic():
+            lock_cart(student, academic_year, [course_id])
+            offerings, _ = check_cart(student, academic_year, [course_id])
+            offering = offerings[0]
+            if not offering.waitlist.filter(status='waiting').exists() and CourseOffering.objects.filter(
+                HAS_SEAT, pk=offering.pk
+            ).exists():
+                raise RegistrationError({str(course_id): ['Seats are available; register instead']})
+            return WaitlistEntry.objects.create(offering=offering, student=student, priority=priority)
+    except IntegrityError:
+        raise RegistrationError({str(course_id): ['Already on the waitlist']})
+
+
+def with_positions(queryset):
+    """Annotate entries with their 1-based place in the queue (None once resolved)"""
+    ahead = WaitlistEntry.objects.filter(offering=OuterRef('offering'), status='waiting').filter(
+        Q(priority__gt=OuterRef('priority')) | Q(priority=OuterRef('priority'), pk__lt=OuterRef('pk'))
+    ).order_by().values('offering').annotate(total=Count('pk')).values('total')
+    return queryset.annotate(position=Case(
+        When(status='waiting', then=Coalesce(Subquery(ahead), 0) + 1), default=None
+    ))
+
+
+class _QueueChanged(Exception):
+    """Rolls a batch back when another run resolved some of its entries first"""
+
+
+def _promote_batch(offering_id, batch_size):
+    """(promoted, removed, more) for one transaction's worth of the queue"""
+    now = timezone.now()
+    # Touching the offering first takes its row lock (its write lock on
+    # SQLite), so promotion runs for one offering queue behind each other
+    if not CourseOffering.objects.filter(pk=offering_id, is_open=True).update(updated_at=now):
+        return 0, 0, False
+    offering = CourseOffering.objects.select_related('course').get(pk=offering_id)
+    limit = batch_size
+    if offering.capacity is not None:
+        limit = min(batch_size, offering.capacity - offering.seats_taken)
+    if limit <= 0:
+        return 0, 0, False
+    entries = list(offering.waitlist.filter(status='waiting').order_by('-priority', 'id').values_list(
+        'pk', 'student_id'
+    )[:limit])
+    if not entries:
+        return 0, 0, False
+
+    course = offering.course
+    student_ids = [student_id for pk, student_id in entries]
+    registered = set()
+    dropped = {}
+    for student_id, pk, is_active in Enrollment.objects.filter(
+        student_id__in=student_ids, course_id=course.pk, academic_year_id=offering.academic_year_id
+    ).values_list('student_id', 'pk', 'is_active'):
+        if is_active:
+            registered.add(student_id)
+        else:
+            dropped[student_id] = pk
+    term = ClassSession.term_for_semester(course.semester)
+    credits = Counter()
+    for student_id, semester, course_credits in Enrollment.objects.filter(
+        student_id__in=student_ids, academic_year_id=offering.academic_year_id, is_active=True
+    ).values_list('student_id', 'course__semester', 'course__credits'):
+        if ClassSession.term_for_semester(semester) == term:
+            credits[student_id] += course_credits
+
+    max_credits = get_max_credits()
+    promote = []
+    removed = defaultdict(list)
+    for pk, student_id in entries:
+        if student_id in registered:
+            removed[f'Already registered for {course.code}'].append(pk)
+        elif credits[student_id] + course.credits > max_credits:
+            removed[f'Over the {max_credits} credit limit'].append(pk)
+        else:
+            promote.append((pk, student_id))
+
+    promoted = 0
+    if promote:
+        # Only entries still waiting are taken, so no entry is promoted twice
+        promoted = WaitlistEntry.objects.filter(
+            pk__in=[pk for pk, student_id in promote], status='waiting'
+        ).update(status='promoted', resolved_at=now)
+        if promoted != len(promote):
+            raise _QueueChanged
+        if dropped:
+            Enrollment.objects.filter(pk__in=dropped.values()).update(is_active=True, updated_at=now)
+        Enrollment.objects.bulk_create([
+            Enrollment(student_id=student_id, course_id=course.pk, academic_year_id=offering.academic_year_id)
+            for pk, student_id in promote if student_id not in dropped
+        ])
+        # bulk_create and update() skip the signals that maintain the counters
+        CourseOffering.objects.filter(pk=offering_id).update(seats_taken=F('seats_taken') + promoted)
+        Course.objects.filter(pk=course.pk).update(active_enrollment_count=F('active_enrollment_count') + promoted)
+        bump_version('academics.Enrollment')
+    for reason, pks in removed.items():
+        WaitlistEntry.objects.filter(pk__in=pks, status='waiting').update(
+            status='removed', reason=reason, resolved_at=now
+        )
+    # Go on while the batch size, not the free seats, cut the queue short
+    more = len(entries) == limit and (limit == batch_size or promoted < limit)
+    return promoted, sum(len(pks) for pks in removed.values()), more
+
+
+def promote_waitlisted(offering_ids=None, batch_size=PROMOTION_BATCH_SIZE):
+    """Fill free seats from the waitlists of `offering_ids` (every queue when None); returns a report"""
+    if offering_ids is None:
+        offering_ids = WaitlistEntry.objects.filter(status='waiting').values_list('offering_id', flat=True)
+    report = {'offerings': 0, 'promoted': 0, 'removed': 0, 'batches': 0, 'retries': 0, 'requeued': []}
+    for offering_id in sorted(set(offering_ids)):
+        report['offerings'] += 1
+        retries = 0
+        more = True
+        while more:
+            try:
+                with transaction.atomic():
+                    promoted, removed, more = _promote_batch(offering_id, batch_size)
+            except _QueueChanged:
+                if retries == PROMOTION_MAX_RETRIES:
+                    # Other runs keep winning this queue; leave the rest to a later run
+                    _requeue(offering_id)
+                    report['requeued'].append(offering_id)
+                    break
+                time.sleep(PROMOTION_RETRY_DELAY * 2 ** retries)
+                retries += 1
+                report['retries'] += 1
+                continue
+            retries = 0
+            report['batches'] += 1
+            report['promoted'] += promoted
+            report['removed'] += removed
+    return report
+
+
+def use_background_promotion():
+    """Whether promotion runs in the worker thread (else inline after commit)"""
+    return getattr(settings, 'WAITLIST_BACKGROUND_PROMOTION', True)
+
+
+# Offerings waiting for the worker; a burst of requests is coalesced here
+_pending = set()
+_pending_lock = threading.Lock()
+_draining = False
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='waitlist-promotion')
+
+
+def _drain():
+    global _draining
+    try:
+        while True:
+            with _pending_lock:
+                batch = set(_pending)
+                _pending.clear()
+                if not batch:
+                    _draining = False
+                    return
+            try:
+                promote_waitlisted(batch)
+            except Exception:
+                logger.exception('Waitlist promotion failed for offerings %s', sorted(batch))
+    finally:
+        with _pending_lock:
+            _draining = False
+        connections.close_all()
+
+
+def _enqueue(offering_ids):
+    global _draining
+    with _pending_lock:
+        _pending.update(offering_ids)
+        if _draining:
+            return None
+        _draining = True
+    return _executor.submit(_drain)
+
+
+def _requeue(offering_id):
+    if use_background_promotion():
+        _enqueue([offering_id])
+    else:
+        logger.warning(
+            'Waitlist promotion for offering %s gave up after %s retries; run promote_waitlist',
+            offering_id, PROMOTION_MAX_RETRIES
+        )
+
+
+def request_promotion(offering_ids):
+    """Promote from the offerings' waitlists once the current transaction commits"""
+    offering_ids = list(offering_ids)
+    if not offering_ids:
+        return
+    if use_background_promotion():
+        transaction.on_commit(lambda: _enqueue(offering_ids))
+    else:
+        transaction.on_commit(lambda: promote_waitlisted(offering_ids))
+
+
+def wait_for_promotions(timeout=None):
+    """Block until the worker has drained everything queued so far (for tests and benchmarks)"""
+    _executor.submit(lambda: None).result(timeout)
@@ -0,0 +1,181 @@
+"""
+Token authentication with a cache in front of the Token/User lookup.
+
+DRF's TokenAuthentication joins Token and User on every request. The
+authenticator here keeps recently used tokens in a bounded in-process
+LRU/TTL tier and, when TOKEN_AUTH_SHARED_CACHE_ALIAS names a cache, in a
+shared tier as well, so most requests authenticate without touching the
+database.
+
+Entries are invalidated by accounts.signals whenever a Token is deleted
+(logout, rotation, expiry) and whenever its User is saved or deleted, which
+covers is_active/user_type changes. Both tiers are cleared in the process
+doing the write; other processes' in-process tiers keep an entry for at
+most TOKEN_AUTH_LOCAL_CACHE_TTL seconds, so multi-process deployments that
+need instant revocation everywhere should rely on the shared tier and set
+that TTL to 0. Queryset .update() calls bypass signals and must call
+invalidate_user() themselves.
+
+Tokens older than TOKEN_EXPIRY seconds are rejected and deleted; None keeps
+DRF's never-expiring behaviour.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def get_token_expiry():
+    """Token lifetime as a timedelta, or None when tokens never expire"""
+    seconds = getattr(settings, 'TOKEN_EXPIRY', None)
+    return None if seconds is None else timedelta(seconds=seconds)
+
+
+def is_token_expired(token):
+    expiry = get_token_expiry()
+    return expiry is not None and token.created + expiry <= timezone.now()
+
+
+class LocalTokenCache:
+    """Thread-safe LRU of token key -> (expires_at, user, token)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'TOKEN_AUTH_LOCAL_CACHE_SIZE', 10000)
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'TOKEN_AUTH_LOCAL_CACHE_TTL', 60)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def set(self, key, user, token):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl, user, token)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._discard(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry[1].pk)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[1].pk]
+
+
+local_cache = LocalTokenCache()
+
+
+def _shared_cache():
+    alias = getattr(settings, 'TOKEN_AUTH_SHARED_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+def _shared_key(key):
+    # Never use raw tokens as cache keys; they would show up in cache dumps
+    return 'authtoken:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_token(key):
+    """Forget a token in both tiers"""
+    local_cache.delete(key)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.delete(_shared_key(key))
+
+
+def invalidate_user(user_id):
+    """Forget every cached token of a user in both tiers"""
+    local_cache.delete_user(user_id)
+    shared = _shared_cache()
+    if shared is not None:
+        keys = Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+        shared.delete_many([_shared_key(key) for key in keys])
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication backed by the local and shared token caches"""
+
+    def authenticate_credentials(self, key):
+        cached = local_cache.get(key)
+        if cached is None:
+            cached = self._get_shared(key)
+            if cached is None:
+                cached = self._load(key)
+                self._set_shared(key, *cached)
+            local_cache.set(key, *cached)
+
+        user, token = cached
+        if is_token_expired(token):
+            # Deleting the token fires the signal that clears both tiers
+            Token.objects.filter(key=key).delete()
+            raise exceptions.AuthenticationFailed('Token has expired.')
+
+        # Hand out copies so per-request attribute changes never leak into
+        # the shared cached instances
+        user = copy.copy(user)
+        token = copy.copy(token)
+        token.user = user
+        return user, token
+
+    def _load(self, key):
+        try:
+            token = self.get_model().objects.select_related('user').get(key=key)
+        except self.get_model().DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return token.user, token
+
+    def _get_shared(self, key):
+        shared = _shared_cache()
+        return shared.get(_shared_key(key)) if shared is not None else None
+
+    def _set_shared(self, key, user, token):
+        shared = _shared_cache()
+        if shared is not None:
+            timeout = getattr(settings, 'TOKEN_AUTH_SHARED_CACHE_TTL', 300)
+            shared.set(_shared_key(key), (user, token), timeout)
@@ -0,0 +1,229 @@
+"""
+Bulk provisioning of users with their student or faculty profiles.
+
+Rows are read lazily from a CSV file and handled in batches. Each batch is
+validated with the model fields' own clean() (lengths, formats, required
+values), checked for username / student_id / employee_id conflicts with one
+query per table, has its passwords hashed (in a process pool for the
+provision_users command, in-process for the HTTP endpoint), and is written
+with one bulk_create per table inside a transaction. Batches are independent:
+valid rows are created and every rejected row is reported. A line that isn't
+valid UTF-8 CSV stops the run; the rows before it have been processed, so the
+report still lists them, with the reason in its 'failure' field.
+
+Columns: username plus the profile's required fields (student_id and
+enrollment_date, or employee_id, department, designation and joining_date);
+optionally password (blank means an unusable password), email, first_name,
+last_name, phone, date_of_birth, address and the optional profile fields.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from academics.cache import bump_version
+from core.uploads import CSVFileError, CSVReader
+from .models import StudentProfile, FacultyProfile
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+MIN_PASSWORD_LENGTH = 8
+USER_FIELDS = ['username', 'email', 'first_name', 'last_name', 'phone', 'date_of_birth', 'address']
+PROFILES = {
+    'student': (StudentProfile, 'student_id', [
+        'student_id', 'enrollment_date', 'current_semester', 'program',
+        'emergency_contact_name', 'emergency_contact_phone',
+    ]),
+    'faculty': (FacultyProfile, 'employee_id', [
+        'employee_id', 'department', 'designation', 'joining_date',
+        'qualification', 'experience_years',
+    ]),
+}
+
+
+class ProvisioningError(Exception):
+    """The file as a whole can't be processed (bad format or missing columns)"""
+
+
+def get_hash_workers():
+    """Processes the provision_users command hashes passwords with; 0 hashes in-process"""
+    workers = getattr(settings, 'PROVISIONING_HASH_WORKERS', None)
+    if workers is None:
+        return os.cpu_count() or 1
+    return workers
+
+
+def iter_csv_rows(fileobj):
+    """Yield (line number, row dict) from a binary (UTF-8) or text CSV file"""
+    try:
+        reader = CSVReader(fileobj)
+        if 'username' not in reader.fieldnames:
+            raise ProvisioningError('Missing column: username')
+        for line, row in reader:
+            yield line, {key: (value or '').strip() for key, value in row.items()}
+    except CSVFileError as exc:
+        raise ProvisioningError(str(exc))
+
+
+def _clean(model, names, row):
+    """Field values for `names` from a row, validated by the model fields"""
+    values = {}
+    for name in names:
+        field = model._meta.get_field(name)
+        raw = row.get(name, '')
+        if raw == '' and (field.has_default() or field.null):
+            continue
+        try:
+            values[name] = field.clean(raw, None)
+        except ValidationError as exc:
+            raise ValidationError(f"{name}: {' '.join(exc.messages)}")
+    return values
+
+
+def _hash_passwords(passwords, executor, workers):
+    if executor is None or len(passwords) < 2:
+        return [make_password(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(executor.map(make_password, passwords, chunksize=chunksize))
+
+
+class Provisioning:
+    """One provisioning run for a profile kind ('student' or 'faculty')"""
+
+    def __init__(self, kind, batch_size=BATCH_SIZE, workers=0):
+        if kind not in PROFILES:
+            raise ProvisioningError(f"Unknown kind: {kind} (expected {' or '.join(PROFILES)})")
+        self.kind = kind
+        self.profile_model, self.profile_key, self.profile_fields = PROFILES[kind]
+        self.batch_size = batch_size
+        self.workers = workers
+        self.processed = 0
+        self.created = 0
+        self.errors = []
+        self._usernames = set()
+        self._keys = set()
+
+    def run(self, rows):
+        started = time.perf_counter()
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        failure = None
+        try:
+            batch = []
+            try:
+                for row in rows:
+                    batch.append(row)
+                    if len(batch) >= self.batch_size:
+                        self._process(batch, executor)
+                        batch = []
+            except ProvisioningError as exc:
+                if not self.processed and not batch:
+                    raise
+                # Batches are independent, so the rows read before the bad line still count
+                failure = exc
+            if batch:
+                self._process(batch, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if self.created and self.kind == 'faculty':
+            # Faculty appear in cached department/course representations;
+            # bulk_create skips the signals that would invalidate them
+            bump_version('accounts.User', 'accounts.FacultyProfile')
+        elapsed = time.perf_counter() - started
+        return {
+            'kind': self.kind,
+            'processed': self.processed,
+            'created': self.created,
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(self.processed / elapsed, 1) if elapsed else None,
+            'errors': sorted(self.errors, key=lambda error: error['row']),
+            # Why the run stopped early, if it did
+            'failure': None if failure is None else str(failure),
+        }
+
+    def _error(self, line, row, message):
+        self.errors.append({
+            'row': line, 'username': row.get('username', ''),
+            self.profile_key: row.get(self.profile_key, ''), 'error': message
+        })
+
+    def _validate(self, batch):
+        valid = []
+        for line, row in batch:
+            self.processed += 1
+            try:
+                user_values = _clean(User, USER_FIELDS, row)
+                profile_values = _clean(self.profile_model, self.profile_fields, row)
+            except ValidationError as exc:
+                self._error(line, row, ' '.join(exc.messages))
+                continue
+            password = row.get('password') or None
+            if password is not None and len(password) < MIN_PASSWORD_LENGTH:
+                self._error(line, row, f'password: must be at least {MIN_PASSWORD_LENGTH} characters')
+                continue
+
+            username = user_values['username']
+            key = profile_values[self.profile_key]
+            if username in self._usernames:
+                self._error(line, row, 'Duplicate username in file')
+                continue
+            if key in self._keys:
+                self._error(line, row, f'Duplicate {self.profile_key} in file')
+                continue
+            self._usernames.add(username)
+            self._keys.add(key)
+            valid.append((line, row, user_values, profile_values, password))
+        return valid
+
+    def _process(self, batch, executor):
+        valid = self._validate(batch)
+        if not valid:
+            return
+
+        # Conflicts with existing rows, one query per table
+        taken_usernames = set(User.objects.filter(
+            username__in=[item[2]['username'] for item in valid]
+        ).values_list('username', flat=True))
+        taken_keys = set(self.profile_model.objects.filter(**{
+            f'{self.profile_key}__in': [item[3][self.profile_key] for item in valid]
+        }).values_list(self.profile_key, flat=True))
+        rows = []
+        for item in valid:
+            line, row, user_values, profile_values, password = item
+            if user_values['username'] in taken_usernames:
+                self._error(line, row, 'Username already exists')
+            elif profile_values[self.profile_key] in taken_keys:
+                self._error(line, row, f'{self.profile_key} already exists')
+            else:
+                rows.append(item)
+        if not rows:
+            return
+
+        hashes = _hash_passwords([item[4] for item in rows], executor, self.workers)
+        users = [
+            User(user_type=self.kind, password=password_hash, **item[2])
+            for item, password_hash in zip(rows, hashes)
+        ]
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                if not connection.features.can_return_rows_from_bulk_insert:
+                    pks = dict(User.objects.filter(
+                        username__in=[user.username for user in users]
+                    ).values_list('username', 'pk'))
+                    for user in users:
+                        user.pk = pks[user.username]
+                self.profile_model.objects.bulk_create([
+                    self.profile_model(user=user, **item[3]) for item, user in zip(rows, users)
+                ])
+        except IntegrityError:
+            # Lost a race with a concurrent write; nothing in this batch was saved
+            for line, row, *rest in rows:
+                self._error(line, row, 'Conflicts with a concurrent change; retry this row')
+            return
+        self.created += len(rows)
@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from core.serializers import EagerLoadingMixin, SparseFieldsetMixin, TimedSerializerMixin
 from .models import StudentProfile, FacultyProfile
 
 User = get_user_model()
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for User model"""
     password = serializers.CharField(write_only=True, min_length=8)
     
@@ -20,17 +21,15 @@ class UserSerializer(serializers.ModelSerializer):
         }
     
     def create(self, validated_data):
-        password = validated_data.pop('password')
-        user = User.objects.create_user(**validated_data)
-        user.set_password(password)
-        user.save()
-        return user
+        # create_user hashes the password before the single INSERT
+        return User.objects.create_user(**validated_data)
 
-class StudentProfileSerializer(serializers.ModelSerializer):
+class StudentProfileSerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Student Profile"""
     #user = UserSerializer(read_only=True)
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.filter(user_type='student'))
     user_details = serializers.SerializerMethodField()
+    select_related_fields = ('user',)
     
     class Meta:
         model = StudentProfile
@@ -47,11 +46,12 @@ class StudentProfileSerializer(serializers.ModelSerializer):
             'user_type': obj.user.user_type
         }
 
-class FacultyProfileSerializer(serializers.ModelSerializer):
+class FacultyProfileSerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Faculty Profile"""
     #user = UserSerializer(read_only=True)
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.filter(user_type='faculty'))
     user_details = serializers.SerializerMethodField()
+    select_related_fields = ('user',)
     
     class Meta:
         model = FacultyProfile
@@ -69,21 +69,21 @@ class FacultyProfileSerializer(serializers.ModelSerializer):
         }
 
 # Simple serializers for dropdowns
-class UserBasicSerializer(serializers.ModelSerializer):
+class UserBasicSerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
     full_name = serializers.CharField(source='get_full_name', read_only=True)
     
     class Meta:
         model = User
         fields = ['id', 'username', 'full_name', 'user_type']
 
-class StudentBasicSerializer(serializers.ModelSerializer):
+class StudentBasicSerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
     user = UserBasicSerializer(read_only=True)
     
     class Meta:
         model = StudentProfile
         fields = ['id', 'student_id', 'user', 'current_semester', 'program']
 
-class FacultyBasicSerializer(serializers.ModelSerializer):
+class FacultyBasicSerializer(TimedSerializerMixin, SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
     user = UserBasicSerializer(read_only=True)
     
     class Meta:
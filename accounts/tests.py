@@ -1,3 +1,176 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+from .authentication import _shared_key, local_cache
+from .models import User, StudentProfile
+from .urls import router
 
-# Create your tests here.
+
+class ProvisioningTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            'admin', password='x', user_type='admin', is_staff=True
+        ))
+
+    def provision(self, content):
+        return self.client.post('/api/accounts/users/provision/', {
+            'kind': 'student',
+            'file': SimpleUploadedFile('students.csv', content, content_type='text/csv'),
+        })
+
+    def test_non_utf8_file_is_400_naming_the_line(self):
+        content = (
+            'username,student_id,enrollment_date,first_name\n'
+            'ada,S00001,2024-07-01,Ada\n'
+            'rene,S00002,2024-07-01,René\n'
+        ).encode('cp1252')
+        response = self.provision(content)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Line 3', response.data['failure'])
+        # Batches are independent: the row before the bad line was still created and is reported
+        self.assertEqual((response.data['processed'], response.data['created']), (1, 1))
+        self.assertTrue(StudentProfile.objects.filter(student_id='S00001').exists())
+        self.assertFalse(User.objects.filter(username='rene').exists())
+
+    def test_bad_first_line_is_a_plain_400(self):
+        response = self.provision(b'username,student_id,enrollment_date\n\xff,S1,2024-07-01\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Line 2', response.data['error'])
+
+    def test_endpoint_hashes_in_process(self):
+        content = b'username,student_id,enrollment_date,password\nada,S00001,2024-07-01,correcthorse\n'
+        with mock.patch('accounts.provisioning.ProcessPoolExecutor') as pool:
+            response = self.provision(content)
+        self.assertEqual(response.status_code, 200)
+        pool.assert_not_called()
+        self.assertIsNone(response.data['failure'])
+        self.assertTrue(User.objects.get(username='ada').check_password('correcthorse'))
+
+    def test_utf8_file_with_bom(self):
+        content = (
+            '﻿username,student_id,enrollment_date,first_name\n'
+            'rene,S00002,2024-07-01,René\n'
+        ).encode('utf-8')
+        response = self.provision(content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(User.objects.get(username='rene').first_name, 'René')
+
+
+class ListQueryCountTests(TestCase):
+    """Listing a page costs the same number of queries whatever the page size"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_data', students=30, departments=2, class_days=1, no_timetable=True, stdout=StringIO())
+        cls.admin = User.objects.create_user('admin', password='x', user_type='admin', is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def list_rows(self, url, page_size):
+        """Rows of a cold-cache list request with `page_size` rows per page"""
+        for cache in caches.all():
+            cache.clear()
+        with mock.patch.object(PageNumberPagination, 'page_size', page_size):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(response.data['results'])
+
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        for prefix, viewset, basename in router.registry:
+            url = reverse(f'{basename}-list')
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    rows = self.list_rows(url, 2)
+                with self.assertNumQueries(len(queries)):
+                    self.assertGreater(self.list_rows(url, 20), rows)
+
+
+@override_settings(TOKEN_AUTH_SHARED_CACHE_ALIAS='default', TOKEN_AUTH_LOCAL_CACHE_TTL=60)
+class TokenCacheTests(TestCase):
+
+    def setUp(self):
+        local_cache.clear()
+        caches['default'].clear()
+        self.user = User.objects.create_user('student', password='x', user_type='student')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+
+    def get_profile(self, key=None):
+        """(status code, whether the token table was queried)"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {key or self.token.key}')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/accounts/users/profile/')
+        looked_up = any('authtoken_token' in query['sql'] for query in queries.captured_queries)
+        return response.status_code, looked_up
+
+    def assertForgotten(self, key):
+        self.assertIsNone(local_cache.get(key))
+        self.assertIsNone(caches['default'].get(_shared_key(key)))
+
+    def test_hits(self):
+        self.assertEqual(self.get_profile(), (200, True))
+        self.assertEqual(self.get_profile(), (200, False))
+        # Another process: empty in-process tier, warm shared tier
+        local_cache.clear()
+        self.assertEqual(self.get_profile(), (200, False))
+
+    def test_local_ttl_expiry(self):
+        self.get_profile()
+        caches['default'].clear()
+        later = time.monotonic() + 61
+        with mock.patch('accounts.authentication.time.monotonic', return_value=later):
+            self.assertEqual(self.get_profile(), (200, True))
+
+    @override_settings(TOKEN_AUTH_SHARED_CACHE_TTL=30)
+    def test_shared_ttl_expiry(self):
+        self.get_profile()
+        local_cache.clear()
+        later = time.time() + 31
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            self.assertEqual(self.get_profile(), (200, True))
+
+    def test_logout_invalidates(self):
+        self.get_profile()
+        self.client.post('/api/accounts/users/logout/')
+        self.assertForgotten(self.token.key)
+        self.assertEqual(self.get_profile()[0], 401)
+
+    def test_rotation_invalidates(self):
+        self.get_profile()
+        response = self.client.post('/api/accounts/users/rotate_token/')
+        self.assertForgotten(self.token.key)
+        self.assertEqual(self.get_profile()[0], 401)
+        self.assertEqual(self.get_profile(response.data['token'])[0], 200)
+
+    def test_deactivation_invalidates(self):
+        self.get_profile()
+        self.user.is_active = False
+        self.user.save()
+        self.assertForgotten(self.token.key)
+        self.assertEqual(self.get_profile()[0], 401)
+
+    def test_profile_etag_reads_fresh(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        first = self.client.get('/api/accounts/users/profile/')
+        self.assertEqual(self.client.get('/api/accounts/users/profile/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        # A change made elsewhere, which this process's token cache never hears of
+        User.objects.filter(pk=self.user.pk).update(first_name='Renamed', updated_at=self.user.updated_at + timedelta(seconds=5))
+        response = self.client.get('/api/accounts/users/profile/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['first_name'], 'Renamed')
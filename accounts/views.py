@@ -1,8 +1,18 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+from rest_framework.authtoken.views import ObtainAuthToken
+from django.contrib.auth import get_user_model, logout
+from django.db import transaction
+from core.mixins import ConditionalGetMixin, EagerLoadingViewSetMixin
+from academics.models import TranscriptSnapshot
+from academics.serializers import TranscriptSnapshotSerializer
+from academics.transcripts import get_transcript_courses
+from .authentication import is_token_expired
 from .models import StudentProfile, FacultyProfile
+from .provisioning import Provisioning, ProvisioningError, iter_csv_rows
 from .serializers import (
     UserSerializer, StudentProfileSerializer, FacultyProfileSerializer,
     StudentBasicSerializer, FacultyBasicSerializer
@@ -10,14 +20,31 @@ from .serializers import (
 
 User = get_user_model()
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ConditionalGetMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for User model"""
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    conditional_actions = ('profile',)
+    
+    def get_profile_updated_at(self, request):
+        """updated_at as stored now; request.user may come from the token cache and be stale"""
+        if not hasattr(self, '_profile_updated_at'):
+            self._profile_updated_at = User.objects.filter(
+                pk=request.user.pk
+            ).values_list('updated_at', flat=True).first()
+        return self._profile_updated_at
+    
+    def get_etag(self, request):
+        """Per-user version stamp for the profile endpoint"""
+        updated_at = self.get_profile_updated_at(request)
+        return None if updated_at is None else f'{request.user.pk}:{updated_at.timestamp()}'
+    
+    def get_last_modified(self, request):
+        return self.get_profile_updated_at(request)
     
     def get_permissions(self):
         """Set permissions based on action"""
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'provision']:
             permission_classes = [permissions.IsAdminUser]
         else:
             permission_classes = [permissions.IsAuthenticated]
@@ -25,11 +52,64 @@ class UserViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def profile(self, request):
-        """Get current user's profile"""
-        serializer = self.get_serializer(request.user)
+        """Get current user's profile (read fresh, like its ETag)"""
+        user = self.setup_eager_loading(User.objects.filter(pk=request.user.pk)).get()
+        serializer = self.get_serializer(user)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['post'])
+    def logout(self, request):
+        """Revoke the current user's token and end their session"""
+        Token.objects.filter(user=request.user).delete()
+        logout(request._request)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=False, methods=['post'])
+    def rotate_token(self, request):
+        """Replace the current user's token with a new one"""
+        with transaction.atomic():
+            Token.objects.filter(user=request.user).delete()
+            token = Token.objects.create(user=request.user)
+        return Response({'token': token.key})
+    
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def provision(self, request):
+        """Create users with student or faculty profiles from an uploaded CSV"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'error': 'Upload the users as "file"'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            # Passwords are hashed in this process: no worker pool per request
+            provisioning = Provisioning(request.data.get('kind', 'student'), workers=0)
+            report = provisioning.run(iter_csv_rows(upload))
+        except ProvisioningError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # A run cut short by a bad line still reports the rows before it
+        return Response(
+            report,
+            status=status.HTTP_400_BAD_REQUEST if report['failure'] else status.HTTP_200_OK
+        )
+
+class ObtainExpiringAuthToken(ObtainAuthToken):
+    """Token login that issues a fresh token once the old one has expired"""
+    
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        with transaction.atomic():
+            token, created = Token.objects.get_or_create(user=user)
+            if not created and is_token_expired(token):
+                token.delete()
+                token = Token.objects.create(user=user)
+        return Response({'token': token.key})
 
-class StudentProfileViewSet(viewsets.ModelViewSet):
+class StudentProfileViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for Student Profile"""
     queryset = StudentProfile.objects.all()
     serializer_class = StudentProfileSerializer
@@ -63,8 +143,31 @@ class StudentProfileViewSet(viewsets.ModelViewSet):
                 {'error': 'Student profile not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+    
+    @action(detail=True, methods=['get'])
+    def transcript(self, request, pk=None):
+        """Semester GPAs and CGPA from the transcript snapshots"""
+        student = self.get_object()
+        snapshots = list(TranscriptSnapshotSerializer().setup_eager_loading(
+            TranscriptSnapshot.objects.filter(student=student)
+        ))
+        courses = get_transcript_courses(student.pk)
+        
+        terms = TranscriptSnapshotSerializer(
+            snapshots, many=True, context=self.get_serializer_context()
+        ).data
+        for snapshot, term in zip(snapshots, terms):
+            term['courses'] = courses.get((snapshot.academic_year_id, snapshot.semester), [])
+        
+        latest = terms[-1] if terms else None
+        return Response({
+            'student_id': student.student_id,
+            'cgpa': latest['cgpa'] if latest else None,
+            'credits': latest['cumulative_credits'] if latest else 0,
+            'terms': terms
+        })
 
-class FacultyProfileViewSet(viewsets.ModelViewSet):
+class FacultyProfileViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for Faculty Profile"""
     queryset = FacultyProfile.objects.all()
     serializer_class = FacultyProfileSerializer
@@ -34,6 +34,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryInstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -72,6 +73,30 @@ DATABASES = {
     }
 }
 
+# Caches
+# The 'reference' alias backs academics.cache. It defaults to local memory;
+# point REFERENCE_CACHE_BACKEND/LOCATION at a shared backend (e.g.
+# django.core.cache.backends.redis.RedisCache) when running several workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reference': {
+        'BACKEND': os.environ.get(
+            'REFERENCE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('REFERENCE_CACHE_LOCATION', 'reference-data'),
+        'TIMEOUT': 3600,
+    },
+}
+REFERENCE_CACHE_ALIAS = 'reference'
+
+# Seconds a faculty member's assigned course ids stay cached (see academics.scope)
+FACULTY_SCOPE_CACHE_TTL = 300
+
+# Render nested departments/courses/academic years from the reference cache
+ACADEMICS_REFERENCE_CACHE_NESTED = True
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -111,7 +136,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachingTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -121,6 +146,58 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# Token authentication cache (see accounts.authentication). The in-process
+# tier is per worker; name a shared cache alias to add a cross-process tier.
+TOKEN_AUTH_LOCAL_CACHE_SIZE = 10000
+TOKEN_AUTH_LOCAL_CACHE_TTL = 60
+TOKEN_AUTH_SHARED_CACHE_ALIAS = None
+TOKEN_AUTH_SHARED_CACHE_TTL = 300
+
+# Token lifetime in seconds; None means tokens never expire
+TOKEN_EXPIRY = None
+
+# Default processes hashing passwords in the provision_users command
+# (accounts.provisioning); None uses one per CPU, 0 hashes in-process.
+# The HTTP provision endpoint always hashes in the request process
+PROVISIONING_HASH_WORKERS = None
+
+# Serve Department/Course totals from denormalized counter columns instead
+# of per-queryset COUNT annotations (see academics.counters). The columns
+# are only kept up to date while this is on; run rebuild_counters after
+# turning it on.
+ACADEMICS_MATERIALIZED_COUNTERS = False
+
+# Credits a student may register for in one term (academics.registration)
+REGISTRATION_MAX_CREDITS = 24
+
+# Promote waitlisted students into freed seats in a background thread of the
+# web process (academics.waitlist); False promotes in the request instead
+WAITLIST_BACKGROUND_PROMOTION = True
+
+# Attendance percentage below which a student is listed as short
+ATTENDANCE_SHORTAGE_THRESHOLD = 75
+
+# Attendance analytics (academics.analytics): weeks in the rolling window,
+# and the drop in percentage points that flags a student as at risk
+ATTENDANCE_TREND_WINDOW = 4
+ATTENDANCE_RISK_DROP = 15
+
+# Format of new attendance archives (academics.archive): 'jsonl.gz', or
+# 'parquet' when pyarrow is installed
+ATTENDANCE_ARCHIVE_FORMAT = 'jsonl.gz'
+
+# Analytics exports (academics.exports): 'parquet' or 'arrow' need pyarrow;
+# None picks Parquet when it is installed and gzipped CSV otherwise
+ANALYTICS_EXPORT_FORMAT = None
+ANALYTICS_EXPORT_DIR = BASE_DIR / 'exports'
+# Seconds before the previous watermark an incremental export re-reads, for
+# writes that committed after it; longer than the longest write transaction
+ANALYTICS_EXPORT_OVERLAP = 300
+
+# Log a warning (with the issuing stack) when one SQL statement runs this
+# many times in a request; None disables the check (see core.middleware)
+INSTRUMENTATION_N_PLUS_ONE_THRESHOLD = 10
+
 # CORS settings (for development only)
 CORS_ALLOW_ALL_ORIGINS = True
 
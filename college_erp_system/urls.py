@@ -2,16 +2,17 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from rest_framework.authtoken.views import obtain_auth_token
+from accounts.views import ObtainExpiringAuthToken
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     
     # API URLs
     path('api/auth/', include('rest_framework.urls')),
-    path('api/token/', obtain_auth_token, name='api_token_auth'),
+    path('api/token/', ObtainExpiringAuthToken.as_view(), name='api_token_auth'),
     path('api/accounts/', include('accounts.urls')),
     path('api/academics/', include('academics.urls')),
+    path('api/core/', include('core.urls')),
 ]
 
 # Serve media files during development
@@ -0,0 +1,104 @@
+"""
+Helpers for read-only async JSON views.
+
+DRF views are synchronous, so the async endpoints are plain Django async
+views. These helpers keep them consistent with the DRF API: requests are
+authenticated by the configured DRF authentication classes, lists use the
+PageNumberPagination response shape (or the response shape of a given
+paginator, e.g. a keyset cursor), and bodies are encoded with DRF's
+JSONEncoder.
+"""
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+def _authenticate(request):
+    # Wrapping the request in a DRF Request runs the same authenticators
+    # (token cache, session) as the synchronous API
+    drf_request = Request(
+        request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    )
+    return drf_request.user
+
+
+def async_api_view(view):
+    """Decorator for async GET views that require an authenticated user"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return json_response({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+        try:
+            user = await sync_to_async(_authenticate)(request)
+        except exceptions.AuthenticationFailed as exc:
+            return json_response({'detail': str(exc.detail)}, status=401)
+        if not user.is_authenticated:
+            return json_response({'detail': 'Authentication credentials were not provided.'}, status=401)
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def aserialize(serializer_class, instance, request, many=False):
+    """
+    Serialized data for already-fetched objects.
+
+    Serializers may still touch the database or a cache backend on a miss
+    (e.g. nested reference data), so they run in the request's sync thread
+    rather than on the event loop.
+    """
+    return await sync_to_async(
+        lambda: serializer_class(instance, many=many, context={'request': request}).data
+    )()
+
+
+async def apaginate(request, queryset, serializer_class, paginator=None):
+    """
+    Page-number pagination (?page=) using the async ORM.
+
+    A `paginator` providing apaginate_queryset() and get_paginated_data()
+    (e.g. a KeysetCursorPagination) pages the queryset instead, so feeds
+    keep the cursor of their DRF counterparts rather than COUNT and OFFSET.
+    """
+    if paginator is not None:
+        try:
+            rows = await paginator.apaginate_queryset(queryset, Request(request))
+        except exceptions.NotFound as exc:
+            return json_response({'detail': str(exc.detail)}, status=404)
+        return json_response(paginator.get_paginated_data(
+            await aserialize(serializer_class, rows, request, many=True)
+        ))
+
+    page_size = api_settings.PAGE_SIZE
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+    offset = (page - 1) * page_size
+
+    count = await queryset.acount()
+    rows = [obj async for obj in queryset[offset:offset + page_size]]
+    url = request.build_absolute_uri()
+    next_url = replace_query_param(url, 'page', page + 1) if offset + page_size < count else None
+    if page <= 1:
+        previous_url = None
+    elif page == 2:
+        previous_url = remove_query_param(url, 'page')
+    else:
+        previous_url = replace_query_param(url, 'page', page - 1)
+
+    return json_response({
+        'count': count,
+        'next': next_url,
+        'previous': previous_url,
+        'results': await aserialize(serializer_class, rows, request, many=True),
+    })
@@ -0,0 +1,216 @@
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from accounts.models import FacultyProfile, StudentProfile
+from academics.urls import router as academics_router
+from accounts.urls import router as accounts_router
+
+User = get_user_model()
+
+ROUTERS = [academics_router, accounts_router]
+# GET routes registered with path() rather than a router
+EXTRA_ENDPOINTS = [
+    'attendance-analytics-courses',
+    'attendance-analytics-departments',
+    'attendance-analytics-at-risk',
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database and benchmark every GET endpoint of the '
+        'academics and accounts routers as admin, faculty and student. Records '
+        'latency percentiles, cold- and warm-cache query counts and peak memory, '
+        'and fails when query counts regress against a baseline file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=500)
+        parser.add_argument('--departments', type=int, default=4)
+        parser.add_argument('--years', type=int, default=1)
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per endpoint and role')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write results as JSON to this file')
+        parser.add_argument('--baseline', help='Results file to compare query counts against')
+        parser.add_argument(
+            '--query-tolerance', type=int, default=0,
+            help='Extra queries per endpoint allowed before a regression is reported'
+        )
+        parser.add_argument('--keepdb', action='store_true', help='Reuse the test database between runs')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb']
+        )
+        try:
+            if not options['keepdb'] or not StudentProfile.objects.exists():
+                self.stdout.write('Seeding benchmark dataset...')
+                call_command(
+                    'seed_data', students=options['students'], departments=options['departments'],
+                    years=options['years'], seed=options['seed'], prefix='BENCH',
+                    stdout=self.stdout if options['verbosity'] > 1 else StringIO()
+                )
+            results = self.run_benchmarks(options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        report = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'dataset': {
+                key: options[key] for key in ('students', 'departments', 'years', 'seed')
+            },
+            'iterations': options['iterations'],
+            'endpoints': results,
+        }
+        self.print_report(results)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2, sort_keys=True)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['query_tolerance'])
+
+    def get_users(self):
+        admin = User.objects.create_superuser('bench_admin', password='benchmark', user_type='admin')
+        faculty = FacultyProfile.objects.filter(assignments__isnull=False).select_related('user').first()
+        student = StudentProfile.objects.filter(
+            enrollments__academic_year__is_current=True
+        ).select_related('user').first()
+        return {'admin': admin, 'faculty': faculty.user, 'student': student.user}
+
+    def get_endpoints(self):
+        """(name, url, detail basename or None) for every list route, GET-able list-level extra action and extra endpoint"""
+        endpoints = []
+        for router in ROUTERS:
+            for prefix, viewset, basename in router.registry:
+                # Routes without a list action (e.g. a ViewSet of custom actions) have no -list URL
+                if hasattr(viewset, 'list'):
+                    detail = basename if hasattr(viewset, 'retrieve') else None
+                    endpoints.append((f'{basename}-list', reverse(f'{basename}-list'), detail))
+                for extra_action in viewset.get_extra_actions():
+                    if not extra_action.detail and 'get' in extra_action.mapping:
+                        name = f'{basename}-{extra_action.url_name}'
+                        endpoints.append((name, reverse(name), None))
+        endpoints.extend((name, reverse(name), None) for name in EXTRA_ENDPOINTS)
+        return endpoints
+
+    def run_benchmarks(self, iterations):
+        results = {}
+        for role, user in self.get_users().items():
+            client = Client()
+            client.force_login(user)
+            for name, url, detail in self.get_endpoints():
+                results[f'{role}:{name}'] = self.measure(client, url, iterations)
+                detail_url = self.get_detail_url(client, detail, url)
+                if detail_url:
+                    results[f'{role}:{detail}-detail'] = self.measure(client, detail_url, iterations)
+        return results
+
+    def get_detail_url(self, client, basename, url):
+        """Detail URL of the first listed row, or None when the list is unusable"""
+        if basename is None:
+            return None
+        response = client.get(url)
+        if response.status_code != 200 or response.streaming:
+            return None
+        data = response.json()
+        rows = data.get('results') if isinstance(data, dict) else data
+        if not isinstance(rows, list) or not rows or not isinstance(rows[0], dict) or 'id' not in rows[0]:
+            return None
+        return reverse(f'{basename}-detail', args=[rows[0]['id']])
+
+    def measure(self, client, url, iterations):
+        # Cold request: empty caches, so a regression in cache-miss paths shows up
+        for cache in caches.all():
+            cache.clear()
+        # The query log is capped; start empty so captures are not truncated
+        reset_queries()
+        with CaptureQueriesContext(connection) as cold_queries:
+            response = client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        cold_query_count = len(cold_queries.captured_queries)
+
+        # Warm-up happened above, so caches and lazy imports don't skew the samples
+
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = client.get(url)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            tracemalloc.start()
+            response = client.get(url)
+            if response.streaming:
+                body_size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                body_size = len(response.content)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        return {
+            'url': url,
+            'status': response.status_code,
+            'queries': len(queries.captured_queries),
+            'cold_queries': cold_query_count,
+            'p50_ms': round(statistics.median(latencies), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'peak_memory_kb': round(peak / 1024, 1),
+            'response_bytes': body_size,
+        }
+
+    def print_report(self, results):
+        self.stdout.write(
+            f"{'endpoint':<52} {'status':>6} {'queries':>7} {'cold':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak KB':>9}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<52} {result['status']:>6} {result['queries']:>7} {result['cold_queries']:>5} {result['p50_ms']:>8.2f} "
+                f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['peak_memory_kb']:>9.1f}"
+            )
+
+    def compare(self, results, baseline_path, tolerance):
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)['endpoints']
+
+        regressions = []
+        for name, result in results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            if result['queries'] > previous['queries'] + tolerance:
+                regressions.append(f"{name}: {previous['queries']} -> {result['queries']} queries")
+            elif 'cold_queries' in previous and result['cold_queries'] > previous['cold_queries'] + tolerance:
+                regressions.append(
+                    f"{name}: {previous['cold_queries']} -> {result['cold_queries']} queries (cold caches)"
+                )
+            elif result['p95_ms'] > 2 * previous['p95_ms']:
+                self.stdout.write(self.style.WARNING(
+                    f"{name}: p95 {previous['p95_ms']} -> {result['p95_ms']} ms"
+                ))
+
+        if regressions:
+            raise CommandError('Query count regressions:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('✅ No query count regressions'))
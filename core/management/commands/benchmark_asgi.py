@@ -0,0 +1,219 @@
+import asyncio
+import json
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from io import BytesIO, StringIO
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.authtoken.models import Token
+from accounts.models import StudentProfile
+from .benchmark_api import percentile
+
+# (name, synchronous DRF endpoint, async endpoint)
+ENDPOINTS = [
+    ('current-academic-year', '/api/academics/academic-years/current/', '/api/academics/async/academic-years/current/'),
+    ('courses', '/api/academics/courses/', '/api/academics/async/courses/'),
+    ('my-enrollments', '/api/academics/enrollments/my_enrollments/', '/api/academics/async/enrollments/mine/'),
+    ('my-attendance', '/api/academics/attendance/my_attendance/', '/api/academics/async/attendance/mine/'),
+    ('attendance-summary', '/api/academics/attendance-summary/', '/api/academics/async/attendance-summary/'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare throughput of the synchronous endpoints served through WSGI with '
+        'their async counterparts served through ASGI, at several client '
+        'concurrency levels. Runs in-process against a seeded test database; '
+        '--db-latency-ms adds a simulated round trip to every query, since an '
+        'in-process SQLite database never makes a worker wait.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=200)
+        parser.add_argument('--departments', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--concurrency', default='1,8,32',
+            help='Comma-separated numbers of concurrent clients'
+        )
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and level')
+        parser.add_argument('--threads', type=int, default=8, help='WSGI worker threads')
+        parser.add_argument('--db-latency-ms', type=float, default=5.0)
+        parser.add_argument('--output', help='Write results as JSON to this file')
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        latency = options['db_latency_ms'] / 1000
+        wrapper = self._latency_wrapper(latency)
+        try:
+            self.stdout.write('Seeding benchmark dataset...')
+            call_command(
+                'seed_data', students=options['students'], departments=options['departments'],
+                years=1, seed=options['seed'], prefix='BENCH',
+                stdout=self.stdout if options['verbosity'] > 1 else StringIO()
+            )
+            token = self.get_token()
+
+            if latency:
+                # Every thread opens its own connection; add the delay to each
+                connection_created.connect(self._add_wrapper(wrapper), weak=False, dispatch_uid='benchmark_asgi')
+                for conn in connections.all():
+                    conn.execute_wrappers.append(wrapper)
+            # Cold-cache warm-up requests would otherwise log N+1 warnings
+            logging.getLogger('core.instrumentation').disabled = True
+            results = self.run_benchmarks(token, levels, options['requests'], options['threads'])
+        finally:
+            logging.getLogger('core.instrumentation').disabled = False
+            connection_created.disconnect(dispatch_uid='benchmark_asgi')
+            for conn in connections.all():
+                if wrapper in conn.execute_wrappers:
+                    conn.execute_wrappers.remove(wrapper)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.print_report(results)
+        if options['output']:
+            report = {
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'options': {
+                    key: options[key] for key in (
+                        'students', 'departments', 'seed', 'requests', 'threads', 'db_latency_ms'
+                    )
+                },
+                'results': results,
+            }
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2, sort_keys=True)
+            self.stdout.write(f"Results written to {options['output']}")
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark finished'))
+
+    def _latency_wrapper(self, latency):
+        def wrapper(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+        return wrapper
+
+    def _add_wrapper(self, wrapper):
+        def receiver(sender, connection, **kwargs):
+            if wrapper not in connection.execute_wrappers:
+                connection.execute_wrappers.append(wrapper)
+        return receiver
+
+    def get_token(self):
+        student = StudentProfile.objects.filter(
+            enrollments__academic_year__is_current=True
+        ).select_related('user').first()
+        return Token.objects.get_or_create(user=student.user)[0].key
+
+    def run_benchmarks(self, token, levels, requests, threads):
+        wsgi = WSGIHandler()
+        asgi = ASGIHandler()
+        results = []
+        for name, sync_url, async_url in ENDPOINTS:
+            # Warm caches and lazy imports through both stacks first
+            self.wsgi_request(wsgi, sync_url, token)
+            asyncio.run(self.asgi_request(asgi, async_url, token))
+            for level in levels:
+                results.append({
+                    'endpoint': name,
+                    'concurrency': level,
+                    'wsgi': self.measure_wsgi(wsgi, sync_url, token, level, requests, threads),
+                    'asgi': self.measure_asgi(asgi, async_url, token, level, requests),
+                })
+        return results
+
+    def summarize(self, latencies, statuses, elapsed):
+        return {
+            'requests_per_second': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(statistics.median(latencies), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'errors': sum(1 for status in statuses if status >= 400),
+        }
+
+    def wsgi_request(self, handler, url, token):
+        path, _, query = url.partition('?')
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+            'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SCRIPT_NAME': '',
+            'HTTP_AUTHORIZATION': f'Token {token}',
+            'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http',
+        }
+        status = []
+        body = handler(environ, lambda code, headers, exc_info=None: status.append(int(code[:3])))
+        b''.join(body)
+        body.close()
+        return status[0]
+
+    def measure_wsgi(self, handler, url, token, concurrency, requests, threads):
+        def timed(_):
+            start = time.perf_counter()
+            status = self.wsgi_request(handler, url, token)
+            return (time.perf_counter() - start) * 1000, status
+
+        # Clients beyond the worker threads queue up, as they would in a real WSGI server
+        with ThreadPoolExecutor(max_workers=min(concurrency, threads)) as executor:
+            start = time.perf_counter()
+            samples = list(executor.map(timed, range(requests)))
+            elapsed = time.perf_counter() - start
+        return self.summarize([s[0] for s in samples], [s[1] for s in samples], elapsed)
+
+    async def asgi_request(self, handler, url, token):
+        path, _, query = url.partition('?')
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'root_path': '', 'query_string': query.encode(),
+            'headers': [(b'host', b'testserver'), (b'authorization', f'Token {token}'.encode())],
+            'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+        }
+        status = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        await handler(scope, receive, send)
+        return status[0]
+
+    def measure_asgi(self, handler, url, token, concurrency, requests):
+        async def client(count, samples):
+            for _ in range(count):
+                start = time.perf_counter()
+                status = await self.asgi_request(handler, url, token)
+                samples.append(((time.perf_counter() - start) * 1000, status))
+
+        async def run():
+            samples = []
+            counts = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+            start = time.perf_counter()
+            await asyncio.gather(*(client(count, samples) for count in counts if count))
+            return samples, time.perf_counter() - start
+
+        samples, elapsed = asyncio.run(run())
+        return self.summarize([s[0] for s in samples], [s[1] for s in samples], elapsed)
+
+    def print_report(self, results):
+        self.stdout.write(
+            f"{'endpoint':<22} {'clients':>7} {'WSGI req/s':>11} {'p95 ms':>8} {'ASGI req/s':>11} {'p95 ms':>8} {'errors':>7}"
+        )
+        for result in results:
+            wsgi, asgi = result['wsgi'], result['asgi']
+            self.stdout.write(
+                f"{result['endpoint']:<22} {result['concurrency']:>7} "
+                f"{wsgi['requests_per_second']:>11.1f} {wsgi['p95_ms']:>8.1f} "
+                f"{asgi['requests_per_second']:>11.1f} {asgi['p95_ms']:>8.1f} "
+                f"{wsgi['errors'] + asgi['errors']:>7}"
+            )
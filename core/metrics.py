@@ -0,0 +1,125 @@
+"""
+In-process request metrics.
+
+RequestStats collects the numbers for the request being served (through a
+context variable, so it also works under ASGI); the module-level registry
+aggregates them per route into fixed-bucket histograms that the metrics
+endpoint exposes. Each process keeps its own registry.
+"""
+import bisect
+import threading
+from contextvars import ContextVar
+
+DURATION_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+QUERY_COUNT_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100, 200]
+SIZE_BUCKETS_BYTES = [1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024]
+
+_current_stats = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """Counters for a single request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.statements = {}
+        self.duplicate_stack = None
+
+    def activate(self):
+        return _current_stats.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current_stats.reset(token)
+
+
+def get_current_stats():
+    """Stats of the request being served, or None outside the middleware"""
+    return _current_stats.get()
+
+
+def add_serializer_time(seconds):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.serializer_seconds += seconds
+
+
+class Histogram:
+    """
+    Histogram with fixed upper bounds.
+
+    Observations are counted per bucket; snapshot() reports them
+    cumulatively, like Prometheus `le` buckets: each bound counts the
+    observations less than or equal to it, and +Inf equals the total count.
+    """
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def snapshot(self):
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets['+Inf'] = self.total
+        return {'count': self.total, 'sum': round(self.sum, 3), 'buckets': buckets}
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.duration_ms = Histogram(DURATION_BUCKETS_MS)
+        self.db_ms = Histogram(DURATION_BUCKETS_MS)
+        self.serializer_ms = Histogram(DURATION_BUCKETS_MS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS_BYTES)
+        self.n_plus_one = 0
+
+    def snapshot(self):
+        return {
+            'duration_ms': self.duration_ms.snapshot(),
+            'db_ms': self.db_ms.snapshot(),
+            'serializer_ms': self.serializer_ms.snapshot(),
+            'queries': self.queries.snapshot(),
+            'response_bytes': self.response_bytes.snapshot(),
+            'n_plus_one_detected': self.n_plus_one,
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route, duration_ms, stats, response_bytes, n_plus_one):
+        with self._lock:
+            metrics = self._routes.setdefault(route, RouteMetrics())
+            metrics.duration_ms.observe(duration_ms)
+            metrics.db_ms.observe(stats.db_seconds * 1000)
+            metrics.serializer_ms.observe(stats.serializer_seconds * 1000)
+            metrics.queries.observe(stats.queries)
+            if response_bytes is not None:
+                metrics.response_bytes.observe(response_bytes)
+            if n_plus_one:
+                metrics.n_plus_one += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {route: metrics.snapshot() for route, metrics in sorted(self._routes.items())}
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,126 @@
+import logging
+import time
+import traceback
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from .metrics import RequestStats, registry
+
+logger = logging.getLogger('core.instrumentation')
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Per-request SQL and timing instrumentation.
+
+    Queries are counted through connection execute wrappers, so this works
+    with DEBUG=False. Each response gets a Server-Timing header (db, serializer
+    and total time, query count, response size) and the numbers are added to
+    the per-route histograms in core.metrics. When one SQL statement repeats
+    at least INSTRUMENTATION_N_PLUS_ONE_THRESHOLD times in a request, the
+    statement and the stack that issued it are logged.
+
+    Works for both sync and async views. Work done while a streaming response
+    is consumed happens after the middleware returns and is not included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.n_plus_one_threshold = getattr(settings, 'INSTRUMENTATION_N_PLUS_ONE_THRESHOLD', None)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = stats.activate()
+        wrapper = self._wrapper(stats)
+        start = time.perf_counter()
+        self._install(wrapper)
+        try:
+            response = self.get_response(request)
+        finally:
+            self._uninstall(wrapper)
+            RequestStats.deactivate(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = stats.activate()
+        wrapper = self._wrapper(stats)
+        start = time.perf_counter()
+        # Async views run their queries in the request's sync thread, so the
+        # wrapper has to be installed on that thread's connections
+        await sync_to_async(self._install)(wrapper)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(self._uninstall)(wrapper)
+            RequestStats.deactivate(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    def _install(self, wrapper):
+        for connection in connections.all():
+            connection.execute_wrappers.append(wrapper)
+
+    def _uninstall(self, wrapper):
+        for connection in connections.all():
+            if wrapper in connection.execute_wrappers:
+                connection.execute_wrappers.remove(wrapper)
+
+    def _finish(self, request, response, stats, duration):
+        response_bytes = None if response.streaming else len(response.content)
+        n_plus_one = self._report_duplicates(request, stats)
+        registry.record(self._route(request), duration * 1000, stats, response_bytes, n_plus_one)
+
+        timings = [
+            f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries"',
+            f'serializer;dur={stats.serializer_seconds * 1000:.2f}',
+            f'total;dur={duration * 1000:.2f}',
+        ]
+        if response_bytes is not None:
+            timings.append(f'size;desc="{response_bytes} bytes"')
+        response['Server-Timing'] = ', '.join(timings)
+        return response
+
+    def _wrapper(self, stats):
+        threshold = self.n_plus_one_threshold
+
+        def wrapper(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats.db_seconds += time.perf_counter() - start
+                stats.queries += 1
+                count = stats.statements.get(sql, 0) + 1
+                stats.statements[sql] = count
+                if threshold and count == threshold and stats.duplicate_stack is None:
+                    stats.duplicate_stack = (sql, traceback.format_stack()[:-2])
+
+        return wrapper
+
+    def _report_duplicates(self, request, stats):
+        if not self.n_plus_one_threshold or stats.duplicate_stack is None:
+            return False
+        sql, stack = stats.duplicate_stack
+        # Keep the project's own frames; library frames only add noise
+        project_frames = [
+            frame for frame in stack
+            if str(settings.BASE_DIR) in frame and 'site-packages' not in frame and __file__ not in frame
+        ]
+        logger.warning(
+            'Possible N+1 on %s %s: statement ran %d times\n%s\n%s',
+            request.method, request.path, stats.statements[sql], sql,
+            ''.join(project_frames or stack)
+        )
+        return True
+
+    def _route(self, request):
+        match = getattr(request, 'resolver_match', None)
+        name = match.view_name if match and match.view_name else request.path
+        return f'{request.method} {name}'
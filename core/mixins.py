@@ -0,0 +1,113 @@
+import hashlib
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+from .serializers import EagerLoadingMixin
+from .streaming import streaming_json_response
+
+
+class EagerLoadingViewSetMixin:
+    """
+    ViewSet mixin that eager-loads the relations rendered by the serializer.
+
+    Loading is applied in filter_queryset() so it covers list, retrieve and
+    the write actions without each viewset having to repeat it in its own
+    get_queryset(). Custom actions can call setup_eager_loading() directly.
+    """
+
+    def filter_queryset(self, queryset):
+        return self.setup_eager_loading(super().filter_queryset(queryset))
+
+    def setup_eager_loading(self, queryset):
+        serializer = self.get_serializer()
+        if isinstance(serializer, EagerLoadingMixin):
+            return serializer.setup_eager_loading(queryset)
+        return queryset
+
+
+class StreamingListMixin:
+    """
+    ViewSet mixin for custom list actions.
+
+    Responses are paginated with the viewset's paginator by default. Passing
+    ?stream=true switches to a streamed JSON array built from a server-side
+    iterator, so memory stays flat regardless of how many rows match.
+    """
+    stream_chunk_size = 500
+
+    def get_list_response(self, queryset):
+        if self.request.query_params.get('stream', '').lower() in ('1', 'true', 'yes'):
+            return streaming_json_response(
+                queryset,
+                lambda objects: self.get_serializer(objects, many=True).data,
+                chunk_size=self.stream_chunk_size
+            )
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+
+class _NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet mixin answering conditional GETs (ETag / Last-Modified).
+
+    Viewsets provide a cheap validator through get_etag() and/or
+    get_last_modified() (e.g. a table version stamp). The check runs after
+    authentication and permissions but before the handler, so a matching
+    If-None-Match / If-Modified-Since returns 304 without touching the
+    serializers.
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def get_etag(self, request):
+        """Version string for the resource, or None"""
+        return None
+
+    def get_last_modified(self, request):
+        """Aware datetime of the last change to the resource, or None"""
+        return None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._conditional_headers = None
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return
+
+        version = self.get_etag(request)
+        last_modified = self.get_last_modified(request)
+        etag = None
+        if version is not None:
+            # The same version renders differently per URL and media type
+            raw = f'{version}|{request.get_full_path()}|{request.accepted_media_type}'
+            etag = quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        self._conditional_headers = (etag, timestamp)
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            raise _NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        headers = getattr(self, '_conditional_headers', None)
+        if headers and response.status_code in (200, 304):
+            etag, timestamp = headers
+            if etag:
+                response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
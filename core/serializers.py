@@ -0,0 +1,159 @@
+import time
+from django.db.models import Prefetch, prefetch_related_objects
+from rest_framework import serializers
+from .metrics import add_serializer_time
+
+
+def _is_root_serializer(serializer):
+    """True for the serializer a view renders (or each item of its list)"""
+    parent = serializer.parent
+    if isinstance(parent, serializers.ListSerializer):
+        parent = parent.parent
+    return parent is None
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin that reports rendering time to the request metrics.
+
+    Only the root serializer is timed, so nested serializers are counted as
+    part of their parent rather than twice.
+    """
+
+    def to_representation(self, instance):
+        if not _is_root_serializer(self):
+            return super().to_representation(instance)
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            add_serializer_time(time.perf_counter() - start)
+
+
+class EagerLoadingMixin:
+    """
+    Serializer mixin that describes the relations a serializer renders.
+
+    Nested serializers that also use this mixin are discovered automatically,
+    so a serializer only has to declare the relations it reads outside of
+    nested fields (e.g. inside a SerializerMethodField). Serializers that
+    read aggregates declare them in get_annotations(); a nested serializer
+    with annotations is loaded through a Prefetch so the aggregate is still
+    computed once per queryset instead of once per row. Nested serializers
+    with `self_loading` set fetch their own data (e.g. from a cache) and are
+    left out of the parent's lookups.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    self_loading = False
+
+    def get_annotations(self):
+        """Return the annotations this serializer reads, keyed by attribute name"""
+        return {}
+
+    def get_eager_loading(self, prefix=''):
+        """Return the (select_related, prefetch_related) lookups for this serializer"""
+        select_related = [prefix + lookup for lookup in self.select_related_fields]
+        prefetch_related = [prefix + lookup for lookup in self.prefetch_related_fields]
+
+        for field in self.fields.values():
+            if field.write_only or field.source == '*':
+                continue
+
+            many = isinstance(field, serializers.ListSerializer)
+            nested = field.child if many else field
+            if not isinstance(nested, EagerLoadingMixin) or nested.self_loading:
+                continue
+
+            path = prefix + '__'.join(field.source_attrs)
+            if many or nested.get_annotations():
+                queryset = nested.Meta.model._default_manager.all()
+                prefetch_related.append(
+                    Prefetch(path, queryset=nested.setup_eager_loading(queryset))
+                )
+            else:
+                child_select, child_prefetch = nested.get_eager_loading(path + '__')
+                select_related.append(path)
+                select_related.extend(child_select)
+                prefetch_related.extend(child_prefetch)
+
+        return select_related, prefetch_related
+
+    def setup_eager_loading(self, queryset):
+        """Apply annotations and related-object loading for everything this serializer renders"""
+        annotations = self.get_annotations()
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        select_related, prefetch_related = self.get_eager_loading()
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+    def load_related(self, instances):
+        """Load the related objects this serializer renders onto already-fetched instances (annotations are not applied)"""
+        select_related, prefetch_related = self.get_eager_loading()
+        prefetch_related_objects(instances, *select_related, *prefetch_related)
+
+
+def _parse_field_paths(value):
+    """Turn 'id,course.code,course.department' into a nested dict of names"""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin implementing ?fields= and ?expand= query parameters.
+
+    When either parameter is present, only the requested fields are rendered
+    and nested relations collapse to primary keys unless they are listed in
+    `expand` (or selected with a dotted path in `fields`). Without either
+    parameter the serializer renders its full representation. Because pruned
+    fields never reach EagerLoadingMixin, joins and annotations shrink too.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec = getattr(self, '_sparse_spec', None)
+        if spec is None and _is_root_serializer(self):
+            spec = self._get_request_spec()
+        if spec is None:
+            return fields
+
+        only, expand = spec
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only}
+
+        for name, field in list(fields.items()):
+            many = isinstance(field, serializers.ListSerializer)
+            nested = field.child if many else field
+            if not isinstance(nested, serializers.BaseSerializer) or field.write_only:
+                continue
+
+            nested_only = (only or {}).get(name) or None
+            if name in expand or nested_only:
+                nested._sparse_spec = (nested_only, expand.get(name, {}))
+                continue
+
+            kwargs = {'read_only': True, 'many': many}
+            if field.source not in (None, name):
+                kwargs['source'] = field.source
+            fields[name] = serializers.PrimaryKeyRelatedField(**kwargs)
+        return fields
+
+    def _get_request_spec(self):
+        request = self.context.get('request')
+        if request is None:
+            return None
+        params = getattr(request, 'query_params', request.GET)
+        if 'fields' not in params and 'expand' not in params:
+            return None
+        only = _parse_field_paths(params['fields']) if params.get('fields') else None
+        return only, _parse_field_paths(params.get('expand', ''))
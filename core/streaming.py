@@ -0,0 +1,35 @@
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def stream_json_list(queryset, serialize, chunk_size=500):
+    """
+    Yield a JSON array for `queryset` without materializing it.
+
+    Rows are pulled with a server-side iterator and serialized `chunk_size`
+    at a time through `serialize(objects) -> list`, so memory use depends on
+    the chunk size rather than on the number of rows.
+    """
+    encoder = JSONEncoder()
+    yield '['
+    separator = ''
+    batch = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        batch.append(obj)
+        if len(batch) == chunk_size:
+            for item in serialize(batch):
+                yield separator + encoder.encode(item)
+                separator = ','
+            batch = []
+    for item in serialize(batch):
+        yield separator + encoder.encode(item)
+        separator = ','
+    yield ']'
+
+
+def streaming_json_response(queryset, serialize, chunk_size=500):
+    """StreamingHttpResponse wrapping stream_json_list()"""
+    return StreamingHttpResponse(
+        stream_json_list(queryset, serialize, chunk_size),
+        content_type='application/json'
+    )
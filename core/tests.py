@@ -1,3 +1,35 @@
-from django.test import TestCase
+import json
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from .metrics import Histogram
+from .streaming import stream_json_list
 
-# Create your tests here.
+User = get_user_model()
+
+
+class HistogramTests(SimpleTestCase):
+
+    def test_snapshot_buckets_are_cumulative(self):
+        histogram = Histogram([1, 5, 10])
+        for value in (0, 1, 3, 5, 7, 50):
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot['buckets'], {'1': 2, '5': 4, '10': 5, '+Inf': 6})
+        self.assertEqual(snapshot['count'], 6)
+
+
+class StreamJsonListTests(TestCase):
+
+    def stream(self, chunk_size):
+        queryset = User.objects.order_by('pk')
+        return json.loads(''.join(stream_json_list(
+            queryset, lambda users: [{'id': user.pk, 'username': user.username} for user in users], chunk_size
+        )))
+
+    def test_valid_json_across_chunk_boundaries(self):
+        self.assertEqual(self.stream(3), [])
+        User.objects.bulk_create([User(username=f'user{i}') for i in range(9)])
+        expected = [{'id': pk, 'username': name} for pk, name in User.objects.order_by('pk').values_list('pk', 'username')]
+        # Partial last chunk, exact multiple, one row per chunk, one chunk
+        for chunk_size in (4, 3, 1, 100):
+            self.assertEqual(self.stream(chunk_size), expected, chunk_size)
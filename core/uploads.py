@@ -0,0 +1,53 @@
+import csv
+
+
+class CSVFileError(ValueError):
+    """An uploaded CSV file can't be read; the message names the line"""
+
+
+def _decoded_lines(fileobj):
+    """Decode a binary file one line at a time, so a bad byte is reported on its own line"""
+    for number, line in enumerate(fileobj, start=1):
+        if isinstance(line, bytes):
+            try:
+                line = line.decode('utf-8-sig' if number == 1 else 'utf-8')
+            except UnicodeDecodeError:
+                raise CSVFileError(f'Line {number} is not valid UTF-8 text; save the file as UTF-8 CSV')
+        yield line
+
+
+class CSVReader:
+    """
+    csv.DictReader over an uploaded file.
+
+    Binary files are decoded as UTF-8 (with or without a BOM) line by line;
+    text files are read as they are. Column names are stripped and unnamed
+    columns dropped. Undecodable bytes and malformed CSV raise CSVFileError
+    naming the line instead of escaping as UnicodeDecodeError or csv.Error.
+    """
+
+    def __init__(self, fileobj):
+        self.reader = csv.DictReader(_decoded_lines(fileobj))
+        self.fieldnames = [name.strip() for name in self._read(lambda: self.reader.fieldnames) or []]
+
+    def _read(self, read):
+        try:
+            return read()
+        except UnicodeDecodeError:
+            # Raised by a text file's own decoder, which reads ahead
+            raise CSVFileError(f'Line {self.line_num + 1} or shortly after is not valid text')
+        except csv.Error as exc:
+            raise CSVFileError(f'Line {self.line_num}: {exc}')
+
+    @property
+    def line_num(self):
+        # DictReader only updates its own line_num once a row has parsed
+        return self.reader.reader.line_num
+
+    def __iter__(self):
+        """Yield (line number, row dict)"""
+        while True:
+            row = self._read(lambda: next(self.reader, None))
+            if row is None:
+                return
+            yield self.reader.line_num, {key.strip(): value for key, value in row.items() if key}
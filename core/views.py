@@ -1,3 +1,16 @@
-from django.shortcuts import render
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .metrics import registry
 
-# Create your views here.
+
+class MetricsView(APIView):
+    """Per-route request histograms collected by QueryInstrumentationMiddleware"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(registry.snapshot())
+
+    def delete(self, request):
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)